@@ -9,6 +9,9 @@ from dotenv import load_dotenv
 import os
 
 from database import init_db, db
+from serialization import init_serialization
+from notification_retention import start_retention_scheduler
+from identity_index import ensure_identity_index
 from routes.upload import upload_bp
 from routes.compare import compare_bp
 from routes.uploads import uploads_bp
@@ -30,11 +33,23 @@ app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_UPLOAD_SIZE', 52428800))
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
 
 # CORS Configuration - Allow all origins for hackathon demo
-CORS(app, resources={r"/api/*": {"origins": "*"}})
+# X-Next-Cursor carries the next notifications page; browsers hide unlisted headers from cross-origin code
+CORS(app, resources={r"/api/*": {"origins": "*"}}, expose_headers=['X-Next-Cursor'])
 
 # Initialize database
 init_db(app)
 
+# Re-key or backfill the cross-roll identity index once, instead of on every lookup
+with app.app_context():
+    try:
+        ensure_identity_index()
+    except Exception as e:
+        print(f"Identity index backfill warning: {e}")
+        db.session.rollback()
+
+# Fast JSON encoding, response compression and Server-Timing
+init_serialization(app)
+
 # Register blueprints
 app.register_blueprint(upload_bp)
 app.register_blueprint(compare_bp)
@@ -45,6 +60,9 @@ app.register_blueprint(diffviewer_bp)
 app.register_blueprint(investigation_bp)
 app.register_blueprint(forensic_bp)
 
+# Compact and expire old notifications in the background
+start_retention_scheduler(app)
+
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({
@@ -3,21 +3,72 @@ Database configuration and initialization
 """
 
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, literal, text
 
 db = SQLAlchemy()
 
+
+def _column_ddl(column, dialect):
+    """Column definition for ALTER TABLE ... ADD COLUMN, with its scalar default so existing rows get it"""
+    ddl = f'{dialect.identifier_preparer.quote(column.name)} {column.type.compile(dialect)}'
+    default = column.default.arg if column.default is not None and column.default.is_scalar else None
+    if default is not None:
+        ddl += f" DEFAULT {literal(default, column.type).compile(dialect=dialect, compile_kwargs={'literal_binds': True})}"
+        if not column.nullable:
+            ddl += ' NOT NULL'
+    return ddl
+
+
+def add_missing_columns():
+    """
+    create_all skips existing tables, so columns added to a model after its
+    table was created are added here. Returns the 'table.column' names added.
+    Columns without a scalar default are added as nullable.
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    dialect = db.engine.dialect
+    added = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        present = {c['name'] for c in inspector.get_columns(table.name)}
+        missing = [c for c in table.columns if c.name not in present and not c.primary_key]
+        for column in missing:
+            with db.engine.begin() as connection:
+                connection.execute(text(
+                    f'ALTER TABLE {dialect.identifier_preparer.quote(table.name)} ADD COLUMN {_column_ddl(column, dialect)}'))
+            added.append(f'{table.name}.{column.name}')
+    return added
+
+
+def create_missing_indexes():
+    """Create every model index that does not exist yet; returns (index name, error) for those that failed"""
+    failures = []
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(db.engine, checkfirst=True)
+            except Exception as e:
+                failures.append((index.name, e))
+    return failures
+
+
 def init_db(app):
     """Initialize database with Flask app"""
     db.init_app(app)
-    
+
     with app.app_context():
-        from models import ElectoralRoll, VoterRecord
+        from models import ElectoralRoll, VoterRecord, VoterTombstone, VoterIdentity, RollBucket, QuarantinedRow, Notification, NotificationArchive, Counter
         try:
             db.create_all()
+            for name in add_missing_columns():
+                print(f"Added column {name}")
             print("Database tables created successfully")
         except Exception as e:
-            # If tables already exist, that's okay
-            if "already exists" not in str(e).lower():
-                print(f"Database initialization warning: {e}")
-            else:
-                print("Database tables already exist, skipping creation")
+            print(f"Database initialization warning: {e}")
+
+        # create_all skips existing tables, so indexes added to them later are created here;
+        # each on its own, so one failure does not leave the others missing
+        for failed, error in create_missing_indexes():
+            print(f"Database index warning: {failed}: {error}")
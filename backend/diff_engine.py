@@ -1,119 +1,298 @@
 """
 Diff Engine - Core algorithm for comparing electoral rolls
 Owner: Vansh (Backend Developer)
+
+Both rolls are brought into the columnar, voter_id-sorted layout of
+snapshot_store (memory-mapped when snapshots are enabled), then classified
+with a single sorted merge. Per-row dicts are only built for changed rows.
+Without snapshots, rolls with fingerprint trees (fingerprint.py) load only
+the buckets whose fingerprints differ.
 """
 
+import os
+import threading
+from collections import OrderedDict
 import pandas as pd
+import numpy as np
 import hashlib
-from models import VoterRecord
+from snapshot_store import snapshots_enabled, load_roll_columns, roll_columns, columns_frame
+from fingerprint import FINGERPRINT_CHUNK_SIZE, fingerprint_row_hashes, localized_rows
 
-def compare_rolls(old_upload_id, new_upload_id):
-    """Compare two electoral rolls and return differences"""
-    
-    old_records = VoterRecord.query.filter_by(upload_id=old_upload_id).all()
-    new_records = VoterRecord.query.filter_by(upload_id=new_upload_id).all()
-    
-    old_df = pd.DataFrame([{
-        'voter_id': r.voter_id,
-        'name': r.name,
-        'age': r.age,
-        'address': r.address,
-        'constituency': r.constituency,
-        'registration_date': r.registration_date,
-        'row_hash': r.row_hash
-    } for r in old_records])
-    
-    new_df = pd.DataFrame([{
-        'voter_id': r.voter_id,
-        'name': r.name,
-        'age': r.age,
-        'address': r.address,
-        'constituency': r.constituency,
-        'registration_date': r.registration_date,
-        'row_hash': r.row_hash
-    } for r in new_records])
-    
-    if old_df.empty and new_df.empty:
-        return {
-            'added': [], 'deleted': [], 'modified': [],
-            'stats': {'total_added': 0, 'total_deleted': 0, 'total_modified': 0, 'old_count': 0, 'new_count': 0}
-        }
-    
-    if old_df.empty:
-        return {
-            'added': new_df.drop(columns=['row_hash']).to_dict('records'),
-            'deleted': [], 'modified': [],
-            'stats': {'total_added': len(new_df), 'total_deleted': 0, 'total_modified': 0, 'old_count': 0, 'new_count': len(new_df)}
-        }
-    
-    if new_df.empty:
-        return {
-            'added': [],
-            'deleted': old_df.drop(columns=['row_hash']).to_dict('records'),
-            'modified': [],
-            'stats': {'total_added': 0, 'total_deleted': len(old_df), 'total_modified': 0, 'old_count': len(old_df), 'new_count': 0}
-        }
-    
-    old_hashes = set(old_df['row_hash'])
-    new_hashes = set(new_df['row_hash'])
-    
-    deleted_hashes = old_hashes - new_hashes
-    added_hashes = new_hashes - old_hashes
-    
-    deleted_records = old_df[old_df['row_hash'].isin(deleted_hashes)].drop(columns=['row_hash']).to_dict('records')
-    added_records = new_df[new_df['row_hash'].isin(added_hashes)].drop(columns=['row_hash']).to_dict('records')
+# Fields compared for modified voters -> column holding them in the columnar layout
+DIFF_FIELDS = {
+    'name': 'name',
+    'age': 'age',
+    'address': 'address',
+    'constituency': 'constituency',
+    'registration_date': 'registration_days',
+}
+
+# Bit per field in the change_mask of a modified voter
+FIELD_BITS = {field: 1 << i for i, field in enumerate(DIFF_FIELDS)}
+
+CHANGE_TYPES = ('added', 'deleted', 'modified')
+
+# Columns carried into change frames so regions can be summarized by them
+REGION_FIELDS = ('constituency', 'ward')
+
+# Rolls are immutable once uploaded, so a diff never goes stale; only the count is bounded
+DIFF_CACHE_SIZE = int(os.getenv('DIFF_CACHE_SIZE', 32))
+_diff_cache = OrderedDict()
+_diff_cache_lock = threading.Lock()
+
+
+def merge_sorted_ids(old_ids, new_ids):
+    """
+    Merge two sorted, unique voter_id arrays.
+    Returns (old_common, new_common, deleted, added) as index arrays.
+    """
+    pos = np.searchsorted(new_ids, old_ids)
+    in_range = pos < len(new_ids)
+    matched = np.zeros(len(old_ids), dtype=bool)
+    matched[in_range] = new_ids[pos[in_range]] == old_ids[in_range]
+
+    old_common = np.flatnonzero(matched)
+    new_common = pos[matched]
+    new_matched = np.zeros(len(new_ids), dtype=bool)
+    new_matched[new_common] = True
+    return old_common, new_common, np.flatnonzero(~matched), np.flatnonzero(~new_matched)
+
+
+def diff_columns(old, new):
+    """
+    Classify two sorted columnar rolls into added / deleted / modified.
+    Returns index arrays into old/new plus a change_mask (FIELD_BITS) per modified row.
+    """
+    old_common, new_common, deleted, added = merge_sorted_ids(old['voter_id'], new['voter_id'])
+    differs = (old['row_hash'][old_common] != new['row_hash'][new_common]).any(axis=1)
+    modified_old = old_common[differs]
+    modified_new = new_common[differs]
     
-    old_voter_ids = set(old_df['voter_id'])
-    new_voter_ids = set(new_df['voter_id'])
-    common_voter_ids = old_voter_ids & new_voter_ids
+    # Only rows whose hash differs are compared field by field
+    change_mask = np.zeros(len(modified_old), dtype=np.uint8)
+    for field, column in DIFF_FIELDS.items():
+        changed = np.asarray(old[column][modified_old] != new[column][modified_new], dtype=bool)
+        change_mask |= changed.astype(np.uint8) * np.uint8(FIELD_BITS[field])
+    return {
+        'added': added,
+        'deleted': deleted,
+        'modified_old': modified_old,
+        'modified_new': modified_new,
+        'change_mask': change_mask,
+        'unchanged': int(len(old_common) - len(modified_old)),
+        'old_count': len(old['voter_id']),
+        'new_count': len(new['voter_id'])
+    }
+
+
+def _records(columns, index):
+    return columns_frame(columns, index).drop(columns=['row_hash']).to_dict('records')
+
+
+def format_diff(old, new, diff):
+    """Materialize a diff_columns result in the /api/compare response shape"""
+    old_rows = _records(old, diff['modified_old'])
+    new_rows = _records(new, diff['modified_new'])
+    change_mask = diff['change_mask']
     
     modified_records = []
-    old_dict = {row['voter_id']: row for row in old_df.to_dict('records')}
-    new_dict = {row['voter_id']: row for row in new_df.to_dict('records')}
-    
-    for voter_id in common_voter_ids:
-        old_row = old_dict[voter_id]
-        new_row = new_dict[voter_id]
-        
-        if old_row['row_hash'] != new_row['row_hash']:
-            old_data = {k: v for k, v in old_row.items() if k != 'row_hash'}
-            new_data = {k: v for k, v in new_row.items() if k != 'row_hash'}
-            
-            changes = {}
-            for key in old_data.keys():
-                if old_data[key] != new_data[key]:
-                    changes[key] = {'old': old_data[key], 'new': new_data[key]}
-            
-            modified_records.append({
-                'voter_id': voter_id,
-                'old': old_data,
-                'new': new_data,
-                'changes': changes
-            })
+    for old_data, new_data, mask in zip(old_rows, new_rows, change_mask.tolist()):
+        modified_records.append({
+            'voter_id': old_data['voter_id'],
+            'old': old_data,
+            'new': new_data,
+            'changes': {field: {'old': old_data[field], 'new': new_data[field]} for field, bit in FIELD_BITS.items() if mask & bit},
+            'change_mask': mask
+        })
     
     return {
-        'added': added_records,
-        'deleted': deleted_records,
+        'added': _records(new, diff['added']),
+        'deleted': _records(old, diff['deleted']),
         'modified': modified_records,
         'stats': {
-            'total_added': len(added_records),
-            'total_deleted': len(deleted_records),
+            'total_added': len(diff['added']),
+            'total_deleted': len(diff['deleted']),
             'total_modified': len(modified_records),
-            'old_count': len(old_df),
-            'new_count': len(new_df),
-            'unchanged': len(common_voter_ids) - len(modified_records)
+            'old_count': diff['old_count'],
+            'new_count': diff['new_count'],
+            'unchanged': diff['unchanged'],
+            'field_changes': {field: int(np.count_nonzero(change_mask & bit)) for field, bit in FIELD_BITS.items()}
         }
     }
 
 
+def change_frame(old, new, diff):
+    """
+    Compact columnar record of a diff: one row per changed voter with
+    voter_id, REGION_FIELDS, change type and change_mask (0 for adds/deletes).
+    """
+    added, deleted, modified = diff['added'], diff['deleted'], diff['modified_new']
+
+    def pick(column):
+        return np.concatenate([np.asarray(new[column][added], dtype=object), np.asarray(old[column][deleted], dtype=object), np.asarray(new[column][modified], dtype=object)])
+
+    return pd.DataFrame({
+        'voter_id': np.concatenate([np.asarray(new['voter_id'][added]), np.asarray(old['voter_id'][deleted]), np.asarray(new['voter_id'][modified])]),
+        **{field: pick(field) for field in REGION_FIELDS},
+        'change': pd.Categorical.from_codes(
+            np.repeat(np.arange(3, dtype=np.int8), [len(added), len(deleted), len(modified)]), categories=CHANGE_TYPES
+        ),
+        'change_mask': np.concatenate([np.zeros(len(added) + len(deleted), dtype=np.uint8), diff['change_mask']])
+    })
+
+
+def peek_diff(old_upload_id, new_upload_id):
+    """Cached diff entry for an upload pair, or None if it has not been computed"""
+    key = (old_upload_id, new_upload_id)
+    with _diff_cache_lock:
+        entry = _diff_cache.get(key)
+        if entry is not None:
+            _diff_cache.move_to_end(key)
+        return entry
+
+
+def _store_diff(old_upload_id, new_upload_id, entry):
+    with _diff_cache_lock:
+        _diff_cache[(old_upload_id, new_upload_id)] = entry
+        while len(_diff_cache) > DIFF_CACHE_SIZE:
+            _diff_cache.popitem(last=False)
+
+
+def diff_rolls(old_upload_id, new_upload_id):
+    """(old columns, new columns, diff_columns result) for an upload pair"""
+    localized = None if snapshots_enabled() else localized_rows(old_upload_id, new_upload_id)
+    if localized is None:
+        old = load_roll_columns(old_upload_id)
+        new = load_roll_columns(new_upload_id)
+        return old, new, diff_columns(old, new)
+    
+    # Only rows of differing buckets were loaded; every other row is unchanged
+    old_frame, new_frame, old_count, new_count = localized
+    old = roll_columns(old_frame, fixed_width=False)
+    new = roll_columns(new_frame, fixed_width=False)
+    diff = diff_columns(old, new)
+    diff['old_count'], diff['new_count'] = old_count, new_count
+    diff['unchanged'] = old_count - len(diff['deleted']) - len(diff['modified_old'])
+    return old, new, diff
+
+
+def get_diff(old_upload_id, new_upload_id):
+    """Cached diff for an upload pair: {'result': compare response, 'changes': change_frame}"""
+    entry = peek_diff(old_upload_id, new_upload_id)
+    if entry is not None and entry.get('result') is not None:
+        return entry
+    
+    old, new, diff = diff_rolls(old_upload_id, new_upload_id)
+    entry = {'result': format_diff(old, new, diff), 'changes': change_frame(old, new, diff), 'regions': {}}
+    _store_diff(old_upload_id, new_upload_id, entry)
+    return entry
+
+
+def seed_diff(old_upload_id, new_upload_id, old_frame, new_frame, old_count=None, new_count=None):
+    """
+    Diff two roll views already in memory (e.g. the base and the new roll at ingest) and cache it.
+    With old_count/new_count the frames are only the touched rows; all other rows are unchanged.
+    """
+    old = roll_columns(old_frame, fixed_width=False)
+    new = roll_columns(new_frame, fixed_width=False)
+    diff = diff_columns(old, new)
+    if old_count is not None:
+        diff['old_count'], diff['new_count'] = old_count, new_count
+        diff['unchanged'] = old_count - len(diff['deleted']) - len(diff['modified_old'])
+    entry = {'result': format_diff(old, new, diff), 'changes': change_frame(old, new, diff), 'regions': {}}
+    _store_diff(old_upload_id, new_upload_id, entry)
+    return entry
+
+
+def get_changes(old_upload_id, new_upload_id):
+    """
+    Cached change frame for an upload pair. Aggregate views (heatmap, timeline,
+    field counts) only need this, so the full response is not materialized.
+    """
+    entry = peek_diff(old_upload_id, new_upload_id)
+    if entry is not None:
+        return entry['changes']
+    
+    old, new, diff = diff_rolls(old_upload_id, new_upload_id)
+    changes = change_frame(old, new, diff)
+    _store_diff(old_upload_id, new_upload_id, {'result': None, 'changes': changes, 'regions': {}})
+    return changes
+
+
+def summarize_changes(changes, group_by='constituency'):
+    """Per-region added/deleted/modified counts from a change frame in one grouped pass"""
+    counts = changes.groupby([group_by, 'change'], observed=False).size().unstack(fill_value=0)
+    counts = counts.reindex(columns=list(CHANGE_TYPES), fill_value=0)
+    return {
+        str(region): {change: int(row[change]) for change in CHANGE_TYPES}
+        for region, row in counts.iterrows()
+        if row.sum() > 0
+    }
+
+
+def get_region_summary(old_upload_id, new_upload_id, group_by='constituency'):
+    """summarize_changes for an upload pair, memoized on the cached diff entry"""
+    changes = get_changes(old_upload_id, new_upload_id)
+    entry = peek_diff(old_upload_id, new_upload_id)
+    regions = entry['regions'] if entry is not None else {}
+    if group_by not in regions:
+        regions[group_by] = summarize_changes(changes, group_by)
+    return regions[group_by]
+
+
+def count_changes(changes, constituency=None, fields=None, only=False):
+    """
+    Count modified voters from a change_frame by changed fields.
+    only=False counts voters where any of fields changed; only=True those where
+    exactly those fields changed (e.g. address-only corrections).
+    """
+    frame = changes[changes['change'] == 'modified']
+    if constituency:
+        frame = frame[frame['constituency'] == constituency]
+    mask = frame['change_mask'].to_numpy()
+    if not fields:
+        return int(len(mask))
+    bits = 0
+    for field in fields:
+        bits |= FIELD_BITS[field]
+    selected = (mask == bits) if only else (mask & bits) != 0
+    return int(np.count_nonzero(selected))
+
+
+def compare_rolls(old_upload_id, new_upload_id):
+    """Compare two electoral rolls and return differences"""
+    # Shallow copy: callers attach alerts/metadata without touching the cached entry
+    return dict(get_diff(old_upload_id, new_upload_id)['result'])
+
+
 def calculate_row_hash(row_data):
     """Calculate MD5 hash for a row of voter data"""
     row_string = f"{row_data['voter_id']}|{row_data['name']}|{row_data['age']}|{row_data['address']}|{row_data['registration_date']}|{row_data.get('constituency', 'Unknown')}"
     return hashlib.md5(row_string.encode('utf-8')).hexdigest()
 
 
+def calculate_row_hashes(df, fingerprint=None, chunk_size=None):
+    """
+    calculate_row_hash for every row of a DataFrame, built per chunk.
+    When a DatasetFingerprint is given, each chunk is added to it as it is hashed.
+    """
+    chunk_size = chunk_size or FINGERPRINT_CHUNK_SIZE
+    constituency = df['constituency'] if 'constituency' in df.columns else pd.Series('Unknown', index=df.index)
+    hashes = []
+    for start in range(0, len(df), chunk_size):
+        rows = slice(start, start + chunk_size)
+        row_strings = df['voter_id'].iloc[rows].astype(str)
+        for column in ('name', 'age', 'address', 'registration_date'):
+            row_strings = row_strings + '|' + df[column].iloc[rows].astype(str)
+        row_strings = row_strings + '|' + constituency.iloc[rows].astype(str)
+        chunk = [hashlib.md5(s.encode('utf-8')).hexdigest() for s in row_strings]
+        if fingerprint is not None:
+            fingerprint.update(chunk)
+        hashes.extend(chunk)
+    return pd.Series(hashes, index=df.index, dtype=object)
+
+
 def calculate_dataset_hash(df):
-    """Calculate hash for entire dataset"""
-    df_sorted = df.sort_values('voter_id').reset_index(drop=True)
-    dataset_string = df_sorted.to_csv(index=False)
-    return hashlib.md5(dataset_string.encode('utf-8')).hexdigest()
+    """Order-independent dataset hash, from the row_hash column when present (see fingerprint)"""
+    row_hashes = df['row_hash'] if 'row_hash' in df.columns else calculate_row_hashes(df)
+    return fingerprint_row_hashes(row_hashes.tolist()).hexdigest()
@@ -0,0 +1,114 @@
+"""
+Events - In-process pub/sub behind the Server-Sent Events stream
+Owner: Vansh (Backend Developer)
+
+Two channels are published:
+
+    notification  every Notification row, once its transaction commits
+    job           every state or progress change of a background job
+
+Each subscriber gets a bounded queue. A subscriber that falls SSE_QUEUE_SIZE
+events behind is dropped; its stream ends and the client reconnects with the
+id of the last notification it saw, which the stream replays from the
+database. Job events carry no id; only the latest job state matters.
+"""
+
+import os
+import queue
+import threading
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import Notification
+from serialization import dumps_bytes
+
+EVENT_CHANNELS = ('notification', 'job')
+SSE_QUEUE_SIZE = int(os.getenv('SSE_QUEUE_SIZE', 1000))
+SSE_HEARTBEAT_SECONDS = float(os.getenv('SSE_HEARTBEAT_SECONDS', 15))
+# Notifications fetched per replay query; a replay pages until it catches up
+SSE_REPLAY_LIMIT = int(os.getenv('SSE_REPLAY_LIMIT', 500))
+
+# Queued to a subscriber that overflowed, ending its stream
+_CLOSED = (None, None, None)
+
+_subscribers = set()
+_subscribers_lock = threading.Lock()
+
+
+class Subscription:
+    def __init__(self, channels):
+        self.channels = frozenset(channels)
+        self.queue = queue.Queue(maxsize=SSE_QUEUE_SIZE + 1)
+        self.closed = False
+
+    def get(self, timeout):
+        """Next (channel, data, event_id), or None after timeout seconds"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+def subscribe(channels=EVENT_CHANNELS):
+    subscription = Subscription(channels)
+    with _subscribers_lock:
+        _subscribers.add(subscription)
+    return subscription
+
+
+def unsubscribe(subscription):
+    with _subscribers_lock:
+        _subscribers.discard(subscription)
+
+
+def subscriber_count():
+    with _subscribers_lock:
+        return len(_subscribers)
+
+
+def publish(channel, data, event_id=None):
+    """Fan an event out to every subscriber of channel without blocking"""
+    with _subscribers_lock:
+        targets = [s for s in _subscribers if channel in s.channels]
+    for subscription in targets:
+        try:
+            if subscription.queue.qsize() < SSE_QUEUE_SIZE:
+                subscription.queue.put_nowait((channel, data, event_id))
+                continue
+            subscription.queue.put_nowait(_CLOSED)
+        except queue.Full:
+            pass
+        subscription.closed = True
+        unsubscribe(subscription)
+
+
+def format_sse(channel, data, event_id=None):
+    """One text/event-stream message"""
+    lines = [f'event: {channel}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f"data: {dumps_bytes(data, sort_keys=False).decode('utf-8')}")
+    return '\n'.join(lines) + '\n\n'
+
+
+# Notifications are collected at flush, when ids and defaults are filled in,
+# and published only once the transaction commits
+
+@event.listens_for(Session, 'after_flush')
+def _collect_notifications(session, flush_context):
+    # Set by writers of rows that are not news, e.g. retention summaries
+    if session.info.get('quiet_notifications'):
+        return
+    created = [obj.to_dict() for obj in session.new if isinstance(obj, Notification)]
+    if created:
+        session.info.setdefault('new_notifications', []).extend(created)
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_notifications(session):
+    for notification in sorted(session.info.pop('new_notifications', []), key=lambda n: n['id']):
+        publish('notification', notification, notification['id'])
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_notifications(session, previous_transaction):
+    session.info.pop('new_notifications', None)
@@ -0,0 +1,362 @@
+"""
+Fingerprint - Order-independent dataset fingerprints over row hashes
+Owner: Vansh (Backend Developer)
+
+A roll's fingerprint is the sum, modulo 2^128, of its 128-bit MD5 row hashes
+together with the row count. Addition is commutative, so the fingerprint does
+not depend on row order, can be accumulated chunk by chunk while rows stream
+in, and can be recomputed from the stored row_hash column alone - no sort, no
+CSV serialization, no full row reload.
+
+The fingerprint detects accidental change (corruption, partial writes, a
+different file); it is not a cryptographic commitment against a forger.
+Stored data_hash values carry a DATA_HASH_PREFIX so they can be told apart
+from the MD5-of-CSV hashes of rolls uploaded before fingerprints existed.
+
+Because fingerprints add up, each roll also stores a fingerprint tree
+(RollBucket): one node per constituency, split by voter_id prefix until a
+node holds at most ROLL_TREE_LEAF_SIZE voters. A parent's fingerprint is the
+sum of its children's, and nodes are named by (constituency, prefix) so the
+trees of any two rolls line up. Comparing two rolls walks both trees from
+the top and only descends into nodes whose fingerprints differ; the rows of
+the differing leaves are all a diff needs to look at.
+"""
+
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+from sqlalchemy import or_
+from database import db
+from models import VoterRecord, VoterTombstone, RollBucket
+from roll_store import STORED_COLUMNS, get_roll_chain, lookup_voters, with_address_columns
+
+# Rows hashed / fetched per chunk
+FINGERPRINT_CHUNK_SIZE = int(os.getenv('FINGERPRINT_CHUNK_SIZE', 50000))
+
+# Tree nodes above this many voters are split by the next voter_id character
+ROLL_TREE_LEAF_SIZE = int(os.getenv('ROLL_TREE_LEAF_SIZE', 512))
+
+# Localized compares fall back to a full load when more of the rolls than this differ
+ROLL_TREE_MAX_SHARE = float(os.getenv('ROLL_TREE_MAX_SHARE', 0.25))
+
+# Prefix ranges fetched per query
+_PREFIXES_PER_QUERY = 200
+
+# Appended to a prefix for the node holding the voter_id equal to the prefix itself
+_EXACT = '\x1f'
+
+_MODULUS = 1 << 128
+
+# Marks a data_hash as a fingerprint; hashes without it are legacy MD5s of the sorted CSV
+DATA_HASH_PREFIX = 'fp1:'
+
+
+def hash_lanes(row_hashes):
+    """(n, 4) uint32 lanes of hex MD5 row hashes, little-endian lane order"""
+    return np.frombuffer(bytes.fromhex(''.join(row_hashes)), dtype='<u4').reshape(-1, 4)
+
+
+def lanes_sum(lanes):
+    """Sum of 128-bit values given as uint32 lanes, modulo 2^128"""
+    # Each lane sum fits uint64 for up to 2^32 rows; carries are folded in as Python ints
+    sums = lanes.sum(axis=0, dtype=np.uint64)
+    return sum(int(s) << (32 * i) for i, s in enumerate(sums)) % _MODULUS
+
+
+class DatasetFingerprint:
+    """Incremental multiset fingerprint of row hashes"""
+
+    def __init__(self, total=0, count=0):
+        self.total = total
+        self.count = count
+
+    def update(self, row_hashes):
+        """Add a chunk of hex row hashes"""
+        if len(row_hashes):
+            self.total = (self.total + lanes_sum(hash_lanes(row_hashes))) % _MODULUS
+            self.count += len(row_hashes)
+        return self
+
+    def remove(self, row_hashes):
+        """Take a chunk of hex row hashes back out (rows replaced or deleted)"""
+        if len(row_hashes):
+            self.total = (self.total - lanes_sum(hash_lanes(row_hashes))) % _MODULUS
+            self.count -= len(row_hashes)
+        return self
+
+    def merge(self, other):
+        """Combine with the fingerprint of a disjoint set of rows"""
+        return DatasetFingerprint((self.total + other.total) % _MODULUS, self.count + other.count)
+
+    def hexdigest(self):
+        return hashlib.md5(f'{self.count}:{self.total:032x}'.encode('utf-8')).hexdigest()
+
+    def data_hash(self):
+        """hexdigest with its version marker, as stored in ElectoralRoll.data_hash"""
+        return DATA_HASH_PREFIX + self.hexdigest()
+
+
+def fingerprint_row_hashes(row_hashes, chunk_size=None):
+    """Fingerprint of a sequence of hex row hashes, accumulated per chunk"""
+    chunk_size = chunk_size or FINGERPRINT_CHUNK_SIZE
+    fingerprint = DatasetFingerprint()
+    for start in range(0, len(row_hashes), chunk_size):
+        fingerprint.update(row_hashes[start:start + chunk_size])
+    return fingerprint
+
+
+def roll_fingerprint(upload_id):
+    """
+    Recompute a stored roll's fingerprint from its stored rows.
+    Full rolls stream only the row_hash column; a delta roll is its base's
+    fingerprint minus the base rows it replaces or tombstones plus its own rows,
+    so no level of the chain is reconstructed as a frame.
+    """
+    chain = get_roll_chain(upload_id)
+    if len(chain) > 1:
+        delta = VoterRecord.query.with_entities(VoterRecord.voter_id, VoterRecord.row_hash) \
+            .filter_by(upload_id=upload_id).all()
+        tombstones = VoterTombstone.query.with_entities(VoterTombstone.voter_id).filter_by(upload_id=upload_id).all()
+        replaced_ids = sorted({voter_id for voter_id, _ in delta} | {voter_id for (voter_id,) in tombstones})
+        replaced = lookup_voters(chain[1].upload_id, replaced_ids)
+        return roll_fingerprint(chain[1].upload_id) \
+            .remove(replaced['row_hash'].tolist()) \
+            .update([row_hash for _, row_hash in delta])
+
+    fingerprint = DatasetFingerprint()
+    query = VoterRecord.query.with_entities(VoterRecord.row_hash).filter_by(upload_id=upload_id)
+    chunk = []
+    for (row_hash,) in query.yield_per(FINGERPRINT_CHUNK_SIZE):
+        chunk.append(row_hash)
+        if len(chunk) >= FINGERPRINT_CHUNK_SIZE:
+            fingerprint.update(chunk)
+            chunk = []
+    return fingerprint.update(chunk)
+
+
+def verify_roll(roll):
+    """
+    Compare a roll's stored data_hash with one recomputed from its stored rows.
+    verified is None for legacy hashes, which cannot be recomputed from row hashes.
+    """
+    fingerprint = roll_fingerprint(roll.upload_id)
+    computed = fingerprint.data_hash()
+    legacy = not (roll.data_hash or '').startswith(DATA_HASH_PREFIX)
+    return {
+        'upload_id': roll.upload_id,
+        'data_hash': roll.data_hash,
+        'computed_hash': computed,
+        'hash_version': 'legacy' if legacy else DATA_HASH_PREFIX.rstrip(':'),
+        'row_count': roll.row_count,
+        'stored_row_count': fingerprint.count,
+        'verified': None if legacy else computed == roll.data_hash and fingerprint.count == roll.row_count
+    }
+
+
+def build_roll_tree(frame, leaf_size=None):
+    """
+    Fingerprint tree nodes of a roll view: dicts with constituency, prefix,
+    row_count, fingerprint (32 hex chars) and is_leaf.
+    """
+    leaf_size = leaf_size or ROLL_TREE_LEAF_SIZE
+    nodes = []
+    constituencies = frame['constituency'].fillna('Unknown').astype(str)
+    for constituency, group in frame.groupby(constituencies, sort=True):
+        group = group.sort_values('voter_id', kind='stable')
+        ids = group['voter_id'].astype(str).to_numpy()
+        width = max(1, max(len(v) for v in ids))
+        # Code points per character position; shorter ids are zero-padded and sort first, as in Python
+        chars = ids.astype(f'U{width}').view(np.uint32).reshape(len(ids), width)
+        lanes = hash_lanes(group['row_hash'].tolist())
+        cumulative = np.vstack([np.zeros((1, 4), dtype=np.uint64), np.cumsum(lanes, axis=0, dtype=np.uint64)])
+        
+        stack = [('', 0, len(ids))]
+        while stack:
+            prefix, lo, hi = stack.pop()
+            total = lanes_sum(cumulative[hi:hi + 1] - cumulative[lo:lo + 1])
+            depth = len(prefix)
+            is_leaf = hi - lo <= leaf_size or depth >= width
+            nodes.append({
+                'constituency': constituency,
+                'prefix': prefix,
+                'row_count': int(hi - lo),
+                'fingerprint': f'{total:032x}',
+                'is_leaf': bool(is_leaf)
+            })
+            if is_leaf:
+                continue
+            column = chars[lo:hi, depth]
+            starts = np.concatenate(([0], np.flatnonzero(column[1:] != column[:-1]) + 1))
+            ends = np.append(starts[1:], hi - lo)
+            for start, end in zip(starts, ends):
+                code = int(column[start])
+                if code == 0:
+                    # The id equal to the prefix itself; a leaf of one
+                    nodes.append({
+                        'constituency': constituency, 'prefix': prefix + _EXACT, 'row_count': int(end - start),
+                        'fingerprint': f'{lanes_sum(lanes[lo + start:lo + end]):032x}', 'is_leaf': True
+                    })
+                else:
+                    stack.append((prefix + chr(code), lo + start, lo + end))
+    return nodes
+
+
+def save_roll_tree(upload_id, frame):
+    """Queue the fingerprint tree of a roll view on the current session"""
+    db.session.bulk_insert_mappings(RollBucket, [
+        {'upload_id': upload_id, **node} for node in build_roll_tree(frame)
+    ])
+
+
+def save_tree_nodes(upload_id, tree):
+    """Queue fingerprint tree nodes given as load_roll_tree's dict on the current session"""
+    db.session.bulk_insert_mappings(RollBucket, [
+        {'upload_id': upload_id, 'constituency': c, 'prefix': p, 'row_count': n, 'fingerprint': f, 'is_leaf': leaf}
+        for (c, p), (n, f, leaf) in tree.items()
+    ])
+
+
+def load_roll_tree(upload_id):
+    """{(constituency, prefix): (row_count, fingerprint, is_leaf)} for a roll, empty if it has no tree"""
+    rows = RollBucket.query.with_entities(
+        RollBucket.constituency, RollBucket.prefix, RollBucket.row_count, RollBucket.fingerprint, RollBucket.is_leaf
+    ).filter_by(upload_id=upload_id).all()
+    return {(c, p): (n, f, leaf) for c, p, n, f, leaf in rows}
+
+
+def _children(tree):
+    children = {}
+    for constituency, prefix in tree:
+        if prefix:
+            children.setdefault((constituency, prefix[:-1]), []).append((constituency, prefix))
+    return children
+
+
+def differing_buckets(old_tree, new_tree):
+    """
+    Walk two fingerprint trees and return the (constituency, prefix) ranges whose
+    rows differ. Nodes with equal fingerprints are skipped with their whole subtree.
+    """
+    old_children, new_children = _children(old_tree), _children(new_tree)
+    pending = sorted({(c, '') for c, p in old_tree if not p} | {(c, '') for c, p in new_tree if not p})
+    ranges = []
+    while pending:
+        key = pending.pop()
+        old_node, new_node = old_tree.get(key), new_tree.get(key)
+        if old_node and new_node and old_node[:2] == new_node[:2]:
+            continue
+        if old_node and new_node and not old_node[2] and not new_node[2]:
+            # Both sides split this node; children of either cover all of its rows
+            pending.extend(set(old_children.get(key, [])) | set(new_children.get(key, [])))
+        else:
+            ranges.append(key)
+    return sorted(ranges)
+
+
+def _in_range(voter_ids, prefix):
+    if prefix.endswith(_EXACT):
+        return voter_ids == prefix[:-1]
+    return voter_ids.str.startswith(prefix)
+
+
+def _escape_like(text):
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _stored_bucket_rows(upload_id, ranges, columns):
+    """Rows physically stored under upload_id (not its base chain) in the given ranges, LIKE-matched"""
+    frames = []
+    for start in range(0, len(ranges), _PREFIXES_PER_QUERY):
+        batch = ranges[start:start + _PREFIXES_PER_QUERY]
+        conditions = [
+            (VoterRecord.constituency == constituency) &
+            VoterRecord.voter_id.like(_escape_like(prefix.rstrip(_EXACT)) + '%', escape='\\')
+            for constituency, prefix in batch
+        ]
+        query = VoterRecord.query.with_entities(*[getattr(VoterRecord, c) for c in columns]) \
+            .filter_by(upload_id=upload_id).filter(or_(*conditions))
+        frames.append(pd.DataFrame.from_records(query.all(), columns=columns))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+
+def load_bucket_rows(upload_id, ranges):
+    """
+    Roll view rows (STORED_COLUMNS) falling in the given (constituency, prefix) ranges.
+    For a delta roll every level of its chain is searched for voters in the ranges,
+    and only those voters are resolved through the chain; the view is not rebuilt.
+    """
+    chain = get_roll_chain(upload_id)
+    if len(chain) > 1:
+        # A voter's current row may sit at any level, so collect candidates from all of them.
+        # Resolving by id drops rows replaced or tombstoned by a newer level, including
+        # voters that moved out of the ranges
+        voter_ids = set()
+        for roll in chain:
+            voter_ids.update(_stored_bucket_rows(roll.upload_id, ranges, ['voter_id'])['voter_id'])
+        frame = lookup_voters(upload_id, sorted(voter_ids))
+    else:
+        frame = _stored_bucket_rows(upload_id, ranges, STORED_COLUMNS)
+    
+    # LIKE may be case-insensitive and exact-id nodes overlap their siblings; select exactly
+    constituencies = frame['constituency'].fillna('Unknown').astype(str)
+    voter_ids = frame['voter_id'].astype(str)
+    selected = np.zeros(len(frame), dtype=bool)
+    for constituency, prefix in ranges:
+        selected |= ((constituencies == constituency) & _in_range(voter_ids, prefix)).to_numpy()
+    return with_address_columns(frame[selected].reset_index(drop=True))
+
+
+def localized_rows(old_upload_id, new_upload_id):
+    """
+    Rows of both rolls inside the tree buckets that differ, as (old_frame, new_frame,
+    old_count, new_count). None when either roll has no tree, or when so much
+    differs that loading the full rolls is cheaper.
+    """
+    old_tree, new_tree = load_roll_tree(old_upload_id), load_roll_tree(new_upload_id)
+    if not old_tree or not new_tree:
+        return None
+    old_count = sum(n for (_, p), (n, _, _) in old_tree.items() if not p)
+    new_count = sum(n for (_, p), (n, _, _) in new_tree.items() if not p)
+    
+    ranges = differing_buckets(old_tree, new_tree)
+    differing = sum(tree[key][0] for tree in (old_tree, new_tree) for key in ranges if key in tree)
+    if differing > ROLL_TREE_MAX_SHARE * (old_count + new_count):
+        return None
+    return load_bucket_rows(old_upload_id, ranges), load_bucket_rows(new_upload_id, ranges), old_count, new_count
+
+
+def tree_fingerprint(tree):
+    """Whole-roll DatasetFingerprint from the constituency nodes of a tree"""
+    roots = [node for (_, prefix), node in tree.items() if not prefix]
+    return DatasetFingerprint(sum(int(f, 16) for _, f, _ in roots) % _MODULUS, sum(n for n, _, _ in roots))
+
+
+def _leaf_path(tree, constituency, voter_id):
+    """Keys from the constituency node down to the leaf that holds voter_id, creating missing leaves"""
+    key = (constituency, '')
+    while True:
+        if key not in tree:
+            tree[key] = (0, f'{0:032x}', True)
+        yield key
+        if tree[key][2]:
+            return
+        prefix = key[1]
+        key = (constituency, prefix + (voter_id[len(prefix)] if len(voter_id) > len(prefix) else _EXACT))
+
+
+def apply_tree_delta(tree, removed, added):
+    """
+    Fingerprint tree of a revision from its base tree, touching only the paths of
+    changed voters. removed / added are frames with constituency, voter_id and
+    row_hash. Leaves may grow past ROLL_TREE_LEAF_SIZE; they are not re-split.
+    """
+    tree = dict(tree)
+    for frame, sign in ((removed, -1), (added, 1)):
+        constituencies = frame['constituency'].fillna('Unknown').astype(str)
+        for constituency, voter_id, row_hash in zip(constituencies, frame['voter_id'].astype(str), frame['row_hash']):
+            value = int.from_bytes(bytes.fromhex(row_hash), 'little')
+            for key in list(_leaf_path(tree, constituency, voter_id)):
+                count, total, is_leaf = tree[key]
+                tree[key] = (count + sign, f'{(int(total, 16) + sign * value) % _MODULUS:032x}', is_leaf)
+    return tree
@@ -7,10 +7,14 @@ from .behavioral import BehavioralFingerprintEngine
 from .network import NetworkAnalysisEngine
 from .entropy import EntropyAnalysisEngine
 from .fusion import MultiSignalFusionEngine
+from .burst import BurstDetectionEngine
+from .duplicates import DuplicateDetectionEngine
 
 __all__ = [
     'BehavioralFingerprintEngine',
     'NetworkAnalysisEngine',
     'EntropyAnalysisEngine',
-    'MultiSignalFusionEngine'
+    'MultiSignalFusionEngine',
+    'BurstDetectionEngine',
+    'DuplicateDetectionEngine'
 ]
@@ -0,0 +1,129 @@
+"""
+Module E: Registration Burst Detection Engine
+Finds same-day, same-week and same-month bulk registrations per constituency
+"""
+
+from typing import List, Dict, Any, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+
+def to_day_numbers(dates: Sequence) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert YYYY-MM-DD strings to int64 days since 1970-01-01.
+    Returns (days, valid); days is 0 where valid is False (unparseable), and
+    dates before 1970 are valid negative day numbers.
+    """
+    parsed = pd.to_datetime(pd.Series(dates, dtype=object), format='%Y-%m-%d', errors='coerce')
+    valid = parsed.notna().to_numpy()
+    days = np.zeros(len(valid), dtype=np.int64)
+    days[valid] = parsed[valid].to_numpy(dtype='datetime64[D]').astype(np.int64)
+    return days, valid
+
+
+class BurstDetectionEngine:
+    """
+    Sliding-window burst detector over registration dates.
+
+    Registrations are reduced once to a sparse histogram of (constituency, day)
+    counts. Window sums for every window size are prefix-sum differences over
+    that histogram, so the cost is O(k log k) in the number of distinct
+    (constituency, day) pairs, not in the number of voters or calendar days.
+    Each window is scored with a z-score against the constituency's own daily
+    registration rate over the roll's date range.
+    """
+
+    def __init__(self, windows: Sequence[int] = (1, 7, 30), min_z: float = 3.0, min_count: int = 10):
+        self.name = "Burst Detection"
+        self.windows = tuple(int(w) for w in windows)
+        self.min_z = min_z
+        self.min_count = min_count
+
+    def find_bursts(self, days: np.ndarray, groups: Sequence = None, top: int = 20,
+                    valid: np.ndarray = None, group_field: str = 'constituency') -> List[Dict[str, Any]]:
+        """
+        Rank burst windows.
+
+        Args:
+            days: registration dates as int day numbers (see to_day_numbers)
+            groups: optional group label per registration, e.g. its constituency or ward
+            top: maximum number of windows returned
+            valid: optional mask of registrations with a parseable date; others are ignored
+            group_field: key the group label is returned under
+
+        Returns:
+            Bursts sorted by z-score: <group_field>, window_days, start, end, count, expected, z_score
+        """
+        days = np.asarray(days, dtype=np.int64)
+        if groups is None:
+            codes, labels = np.zeros(len(days), dtype=np.int64), np.array(['All'], dtype=object)
+        else:
+            codes, labels = pd.factorize(pd.Series(groups, dtype=object).fillna('Unknown'))
+        if valid is not None:
+            valid = np.asarray(valid, dtype=bool)
+            days, codes = days[valid], codes[valid]
+        if len(days) == 0:
+            return []
+
+        first_day = int(days.min())
+        # Baseline covers the roll's whole date range, but never less than the widest window
+        span = max(int(days.max()) - first_day + 1, max(self.windows))
+
+        keys, counts = np.unique(codes * span + (days - first_day), return_counts=True)
+        group = keys // span
+        cumulative = np.cumsum(counts)
+
+        n_groups = len(labels)
+        totals = np.bincount(group, weights=counts, minlength=n_groups)
+        squares = np.bincount(group, weights=counts.astype(np.float64) ** 2, minlength=n_groups)
+        daily_mean = totals / span
+        daily_var = np.maximum(squares / span - daily_mean ** 2, 0)
+
+        candidates = []
+        for window in self.windows:
+            # Window ends at each day with registrations; clamp its start to the constituency's own keys
+            lower = np.maximum(keys - (window - 1), group * span)
+            start_idx = np.searchsorted(keys, lower, side='left')
+            before = np.where(start_idx > 0, cumulative[np.maximum(start_idx - 1, 0)], 0)
+            window_sum = cumulative - before
+
+            expected = window * daily_mean[group]
+            std = np.sqrt(window * daily_var[group])
+            with np.errstate(divide='ignore', invalid='ignore'):
+                z = np.where(std > 0, (window_sum - expected) / std, 0.0)
+
+            hits = np.flatnonzero((z >= self.min_z) & (window_sum >= self.min_count))
+            for i in hits[np.argsort(-z[hits], kind='stable')][:top * 10]:
+                end_day = first_day + int(keys[i] % span)
+                candidates.append({
+                    'group': int(group[i]),
+                    'window_days': window,
+                    'start_day': end_day - window + 1,
+                    'end_day': end_day,
+                    'count': int(window_sum[i]),
+                    'expected': float(expected[i]),
+                    'z_score': float(z[i])
+                })
+
+        # Greedy non-overlap per (constituency, window size), strongest first
+        candidates.sort(key=lambda c: c['z_score'], reverse=True)
+        kept, taken = [], {}
+        for c in candidates:
+            spans = taken.setdefault((c['group'], c['window_days']), [])
+            if any(c['start_day'] <= end and start <= c['end_day'] for start, end in spans):
+                continue
+            spans.append((c['start_day'], c['end_day']))
+            kept.append(c)
+            if len(kept) >= top:
+                break
+
+        epoch = np.datetime64('1970-01-01', 'D')
+        return [{
+            group_field: str(labels[c['group']]),
+            'window_days': c['window_days'],
+            'start': str(epoch + np.timedelta64(c['start_day'], 'D')),
+            'end': str(epoch + np.timedelta64(c['end_day'], 'D')),
+            'count': c['count'],
+            'expected': round(c['expected'], 2),
+            'z_score': round(c['z_score'], 2)
+        } for c in kept]
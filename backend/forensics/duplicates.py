@@ -0,0 +1,194 @@
+"""
+Module F: Near-Duplicate Voter Detection Engine
+Finds the same person registered more than once under slightly different spellings
+"""
+
+from typing import List, Dict, Any, Tuple
+from collections import defaultdict
+import re
+import numpy as np
+from .network import NetworkAnalysisEngine
+
+# Mersenne prime for the universal hash family used by MinHash
+_PRIME = (1 << 31) - 1
+_NUMBER = re.compile(r'\d+')
+
+
+class DuplicateDetectionEngine:
+    """
+    Near-duplicate detection without comparing every pair of voters.
+
+    Candidate pairs come from two cheap sources:
+      - blocking: voters sharing surname + normalized address (the same keys
+        NetworkAnalysisEngine clusters on)
+      - MinHash/LSH over character shingles of name and address, which also
+        catches misspelled surnames and reformatted addresses
+
+    Only candidates are verified, so the cost is near-linear in the roll size.
+    """
+
+    def __init__(self, num_perm: int = 32, bands: int = 8, shingle_size: int = 3,
+                 threshold: float = 0.7, max_age_gap: int = 2, max_bucket: int = 50, seed: int = 7):
+        self.name = "Duplicate Detection"
+        self.weight = 0.15
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+        self.max_age_gap = max_age_gap
+        # Buckets larger than this are common names / addresses, not duplicates
+        self.max_bucket = max_bucket
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=num_perm, dtype=np.int64)
+        self._b = rng.integers(0, _PRIME, size=num_perm, dtype=np.int64)
+        self._network = NetworkAnalysisEngine()
+
+    def _identity_text(self, voter: Dict) -> Tuple[str, str, str]:
+        """(normalized name, surname, normalized address) of a voter"""
+        name = ' '.join(str(voter.get('name') or '').lower().split())
+        surname = self._network._extract_surname(name)
+        address = self._network._voter_address(voter)
+        return name, surname, address
+
+    def signatures(self, texts: List[str]) -> np.ndarray:
+        """
+        MinHash signatures of the character shingles of each text, shape (len(texts), num_perm).
+        All texts are shingled in one pass over their concatenated code points.
+        """
+        k = self.shingle_size
+        # Pad each text so short strings still have a shingle and texts never share one
+        padded = [f"{' ' * (k - 1)}{text} " for text in texts]
+        lengths = np.array([len(t) for t in padded], dtype=np.int64)
+        codes = np.frombuffer(''.join(padded).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+
+        # Shingle i covers codes[i:i+k]; keep only those that start and end inside one text
+        gram = np.zeros(len(codes) - k + 1, dtype=np.uint64)
+        for j in range(k):
+            gram = gram * np.uint64(0x110000) + codes[j:len(codes) - k + 1 + j]
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        counts = lengths - k + 1
+        owner = np.repeat(np.arange(len(texts)), counts)
+        local = np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)
+        gram = gram[np.repeat(starts, counts) + local]
+        # Fibonacci hashing spreads the packed code points over 31 bits
+        hashed = ((gram * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(33)).astype(np.int64)
+
+        signatures = np.empty((len(texts), self.num_perm), dtype=np.int64)
+        gram_starts = np.concatenate(([0], np.cumsum(counts)))
+        # Chunked so the (shingles x permutations) matrix stays small
+        for lo in range(0, len(texts), 4096):
+            hi = min(lo + 4096, len(texts))
+            chunk = hashed[gram_starts[lo]:gram_starts[hi]]
+            permuted = (chunk[:, None] * self._a + self._b) % _PRIME
+            signatures[lo:hi] = np.minimum.reduceat(permuted, gram_starts[lo:hi] - gram_starts[lo], axis=0)
+        return signatures
+
+    def _bucket_pairs(self, keys: np.ndarray) -> np.ndarray:
+        """(left, right) row pairs sharing a key, left < right; buckets above max_bucket are skipped"""
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        boundaries = np.concatenate(([0], np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1, [len(keys)]))
+        sizes = np.diff(boundaries)
+        pairs = [np.empty((0, 2), dtype=np.int64)]
+        for size in np.unique(sizes[(sizes >= 2) & (sizes <= self.max_bucket)]):
+            # All buckets of one size at once: rows are buckets, columns their members
+            members = order[boundaries[:-1][sizes == size][:, None] + np.arange(size)]
+            left, right = np.triu_indices(size, 1)
+            pairs.append(np.stack([members[:, left].ravel(), members[:, right].ravel()], axis=1))
+        pairs = np.sort(np.concatenate(pairs), axis=1)
+        return pairs
+
+    def find_duplicates(self, voters: List[Dict]) -> List[Dict[str, Any]]:
+        """
+        Return likely duplicate pairs sorted by similarity.
+
+        Each pair has voter_id_1, voter_id_2, similarity (estimated Jaccard of
+        name+address shingles) and same_block (True when surname and address match exactly).
+        """
+        n = len(voters)
+        if n < 2:
+            return []
+
+        identities = [self._identity_text(v) for v in voters]
+        signatures = self.signatures([f"{name} | {address}" for name, _, address in identities])
+
+        block_ids = defaultdict(lambda: len(block_ids))
+        blocks = np.array([block_ids[(surname, address)] if address and surname else -1 - i
+                           for i, (_, surname, address) in enumerate(identities)], dtype=np.int64)
+        blocked = self._bucket_pairs(blocks)
+
+        rows = self.num_perm // self.bands
+        candidates = [blocked]
+        for band in range(self.bands):
+            band_keys = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows]).view(
+                np.dtype((np.void, rows * 8))).ravel()
+            candidates.append(self._bucket_pairs(band_keys))
+        pair_codes = np.unique(np.concatenate(candidates) @ np.array([n, 1], dtype=np.int64))
+        if len(pair_codes) == 0:
+            return []
+        left, right = pair_codes // n, pair_codes % n
+        similarity = (signatures[left] == signatures[right]).mean(axis=1)
+
+        # House and ward numbers rarely get misspelled; differing numbers mean neighbours, not duplicates
+        numbers = np.array([hash(tuple(_NUMBER.findall(address))) for _, _, address in identities], dtype=np.int64)
+        ages = np.array([v.get('age') if isinstance(v.get('age'), (int, np.integer)) else -1 for v in voters])
+        age_ok = (ages[left] < 0) | (ages[right] < 0) | (np.abs(ages[left] - ages[right]) <= self.max_age_gap)
+
+        matches = np.flatnonzero((similarity >= self.threshold) & age_ok & (numbers[left] == numbers[right]))
+        matches = matches[np.argsort(-similarity[matches], kind='stable')]
+        same_block = blocks[left] == blocks[right]
+        return [{
+            'voter_id_1': voters[left[i]].get('voter_id'),
+            'voter_id_2': voters[right[i]].get('voter_id'),
+            'similarity': round(float(similarity[i]), 3),
+            'same_block': bool(same_block[i])
+        } for i in matches]
+
+    def analyze(self, current_voters: List[Dict], previous_voters: List[Dict]) -> Dict[str, Any]:
+        """
+        Analyze a roll for near-duplicate registrations
+
+        Args:
+            current_voters: List of current voter records
+            previous_voters: List of previous voter records (unused; duplicates are within a roll)
+
+        Returns:
+            Dict with duplicate_score (0-100) and evidence
+        """
+        if not current_voters:
+            return {
+                'duplicate_score': 0,
+                'evidence': [],
+                'details': 'No voter data to analyze'
+            }
+
+        duplicates = self.find_duplicates(current_voters)
+        total_voters = len(current_voters)
+        duplicate_voters = len({p['voter_id_1'] for p in duplicates} | {p['voter_id_2'] for p in duplicates})
+        duplicate_ratio = duplicate_voters / total_voters
+
+        # A few percent of a roll being doubled is already severe
+        duplicate_score = min(100, duplicate_ratio * 500)
+
+        evidence = []
+        if duplicates:
+            fuzzy = sum(1 for p in duplicates if not p['same_block'])
+            evidence.append(
+                f"👥 **Possible Duplicate Voters**: {len(duplicates)} record pairs ({duplicate_voters} voters, "
+                f"{(duplicate_ratio*100):.1f}%) share a near-identical name and address"
+                + (f", {fuzzy} of them with altered spelling" if fuzzy else "")
+            )
+
+        return {
+            'duplicate_score': round(duplicate_score, 2),
+            'evidence': evidence,
+            'details': {
+                'total_voters': total_voters,
+                'duplicate_pairs': len(duplicates),
+                'duplicate_voters': duplicate_voters,
+                'top_pairs': duplicates[:10]
+            }
+        }
@@ -7,6 +7,7 @@ from typing import List, Dict, Any
 from .behavioral import BehavioralFingerprintEngine
 from .network import NetworkAnalysisEngine
 from .entropy import EntropyAnalysisEngine
+from .duplicates import DuplicateDetectionEngine
 
 
 class MultiSignalFusionEngine:
@@ -22,13 +23,14 @@ class MultiSignalFusionEngine:
         self.behavioral_engine = BehavioralFingerprintEngine()
         self.network_engine = NetworkAnalysisEngine()
         self.entropy_engine = EntropyAnalysisEngine()
+        self.duplicate_engine = DuplicateDetectionEngine()
         
         # Weights for fusion (must sum to 1.0)
         self.weights = {
             'behavioral': 0.25,
             'network': 0.35,
             'entropy': 0.25,
-            'other': 0.15  # Reserved for future modules
+            'duplicates': 0.15
         }
     
     def analyze(self, current_voters: List[Dict], previous_voters: List[Dict] = None) -> Dict[str, Any]:
@@ -56,18 +58,20 @@ class MultiSignalFusionEngine:
         behavioral_result = self.behavioral_engine.analyze(current_voters, previous_voters or [])
         network_result = self.network_engine.analyze(current_voters, previous_voters or [])
         entropy_result = self.entropy_engine.analyze(current_voters, previous_voters or [])
+        duplicate_result = self.duplicate_engine.analyze(current_voters, previous_voters or [])
         
         # Extract individual scores
         behavior_score = behavioral_result.get('behavior_score', 0)
         network_score = network_result.get('network_score', 0)
         entropy_score = entropy_result.get('entropy_score', 0)
+        duplicate_score = duplicate_result.get('duplicate_score', 0)
         
         # Calculate weighted fusion score
         final_anomaly_score = (
             (behavior_score * self.weights['behavioral']) +
             (network_score * self.weights['network']) +
             (entropy_score * self.weights['entropy']) +
-            (0 * self.weights['other'])  # Placeholder for future modules
+            (duplicate_score * self.weights['duplicates'])
         )
         
         # Determine verdict based on score
@@ -75,7 +79,7 @@ class MultiSignalFusionEngine:
         
         # Determine confidence level
         confidence_level = self._calculate_confidence(
-            behavior_score, network_score, entropy_score
+            behavior_score, network_score, entropy_score, duplicate_score
         )
         
         # Collect all evidence
@@ -83,6 +87,7 @@ class MultiSignalFusionEngine:
         all_evidence.extend(behavioral_result.get('evidence', []))
         all_evidence.extend(network_result.get('evidence', []))
         all_evidence.extend(entropy_result.get('evidence', []))
+        all_evidence.extend(duplicate_result.get('evidence', []))
         
         # Build module breakdowns
         module_breakdowns = [
@@ -109,6 +114,14 @@ class MultiSignalFusionEngine:
                 'contribution': round(entropy_score * self.weights['entropy'], 2),
                 'evidence': entropy_result.get('evidence', []),
                 'details': entropy_result.get('details', {})
+            },
+            {
+                'module': 'Duplicate Detection',
+                'score': round(duplicate_score, 2),
+                'weight': self.weights['duplicates'],
+                'contribution': round(duplicate_score * self.weights['duplicates'], 2),
+                'evidence': duplicate_result.get('evidence', []),
+                'details': duplicate_result.get('details', {})
             }
         ]
         
@@ -137,12 +150,13 @@ class MultiSignalFusionEngine:
         else:
             return ('Normal Pattern', 'green')
     
-    def _calculate_confidence(self, behavior_score: float, network_score: float, entropy_score: float) -> str:
+    def _calculate_confidence(self, behavior_score: float, network_score: float, entropy_score: float,
+                              duplicate_score: float) -> str:
         """
         Calculate confidence level based on score agreement
         High confidence = all modules agree (all high or all low)
         """
-        scores = [behavior_score, network_score, entropy_score]
+        scores = [behavior_score, network_score, entropy_score, duplicate_score]
         avg_score = sum(scores) / len(scores)
         
         # Calculate variance
@@ -5,7 +5,7 @@ Builds voter connection graphs and identifies suspicious patterns
 
 from typing import List, Dict, Any
 from collections import defaultdict
-import re
+from utils.address import normalize_address
 
 
 class NetworkAnalysisEngine:
@@ -26,12 +26,15 @@ class NetworkAnalysisEngine:
         return parts[-1] if parts else ""
     
     def _normalize_address(self, address: str) -> str:
-        """Normalize address for comparison"""
-        if not address:
-            return ""
-        # Remove extra spaces, convert to lowercase
-        normalized = re.sub(r'\s+', ' ', address.lower().strip())
-        return normalized
+        """Normalize address for comparison (cached canonical form from utils.address)"""
+        return normalize_address(address or '')
+    
+    def _voter_address(self, voter: Dict) -> str:
+        """Normalized address of a voter, read from the column parsed at ingest when present"""
+        normalized = voter.get('address_normalized')
+        if normalized is not None:
+            return normalized
+        return self._normalize_address(voter.get('address', ''))
     
     def analyze(self, current_voters: List[Dict], previous_voters: List[Dict]) -> Dict[str, Any]:
         """
@@ -56,7 +59,7 @@ class NetworkAnalysisEngine:
         surname_address_clusters = defaultdict(list)
         
         for voter in current_voters:
-            address = self._normalize_address(voter.get('address', ''))
+            address = self._voter_address(voter)
             surname = self._extract_surname(voter.get('name', ''))
             voter_id = voter.get('voter_id')
             
@@ -77,7 +80,7 @@ class NetworkAnalysisEngine:
         
         for voter in current_voters:
             voter_id = voter.get('voter_id')
-            address = self._normalize_address(voter.get('address', ''))
+            address = self._voter_address(voter)
             surname = self._extract_surname(voter.get('name', ''))
             
             # New voter (not in previous roll)
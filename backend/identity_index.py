@@ -0,0 +1,223 @@
+"""
+Identity Index - Cross-roll voter movement index
+Owner: Vansh (Backend Developer)
+
+Holds one row per voter of each state's latest ("active") roll, keyed by an
+identity key built from the normalized name and an age band. voter_ids are
+issued per roll, so the identity key is what lets the same person be found in
+the rolls of two states or constituencies. The key uses only fields every
+stored roll has, so a roll indexed at upload and one re-indexed from its
+stored rows give the same keys.
+
+The index is maintained at upload: the new roll is compared with the state's
+previous active roll row by row, unchanged
+rows are re-pointed to the new upload in one UPDATE and only the difference
+is deleted / inserted. "Voters present in more than one active roll" is then
+a GROUP BY on identity_key joined back to the index.
+
+ensure_identity_index runs once at startup: it re-keys rows written under an
+older IDENTITY_KEY_VERSION and indexes states whose rolls predate the index.
+"""
+
+import hashlib
+import pandas as pd
+from sqlalchemy import func
+from database import db
+from models import ElectoralRoll, VoterIdentity, Counter
+
+AGE_BAND_YEARS = 5
+MATCH_SCOPES = ('state', 'constituency')
+
+_INDEX_COLUMNS = ['voter_id', 'identity_key', 'constituency', 'name', 'age']
+
+# SQLite caps bound parameters per statement
+_IN_CHUNK = 500
+
+# Bumped whenever identity_keys changes; version 1 also hashed the father/husband name
+IDENTITY_KEY_VERSION = 2
+KEY_VERSION_COUNTER = 'identity_key_version'
+# Index rows re-keyed per batch
+_REKEY_CHUNK = 5000
+
+
+def _normalize_names(values):
+    """Lowercase, letters only, tokens sorted - so 'Sharma, Raj' and 'raj  sharma' agree"""
+    cleaned = pd.Series(values, dtype=object).fillna('').astype(str).str.lower()
+    cleaned = cleaned.str.replace(r'[^\w\s]|\d|_', ' ', regex=True)
+    return cleaned.str.split().map(lambda tokens: ' '.join(sorted(tokens)))
+
+
+def identity_keys(roll_df):
+    """Identity key per row of a roll: md5 of normalized name | age band"""
+    names = _normalize_names(roll_df['name'].to_numpy())
+    bands = (pd.to_numeric(roll_df['age'], errors='coerce').fillna(-AGE_BAND_YEARS) // AGE_BAND_YEARS).astype(int).astype(str)
+    parts = names + '|' + bands.to_numpy()
+    return [hashlib.md5(p.encode('utf-8')).hexdigest() for p in parts]
+
+
+def _index_frame(roll_df):
+    return pd.DataFrame({
+        'voter_id': roll_df['voter_id'].astype(str).to_numpy(),
+        'identity_key': identity_keys(roll_df),
+        'constituency': roll_df['constituency'].fillna('Unknown').astype(str).to_numpy(),
+        'name': roll_df['name'].astype(str).to_numpy(),
+        'age': roll_df['age'].astype(int).to_numpy()
+    })
+
+
+def _active_upload_id(state, exclude=None):
+    """upload_id of the state's roll that currently owns index rows"""
+    query = db.session.query(VoterIdentity.upload_id).filter(VoterIdentity.state == state)
+    if exclude:
+        query = query.filter(VoterIdentity.upload_id != exclude)
+    row = query.first()
+    return row[0] if row else None
+
+
+def update_identity_index(state, upload_id, roll_df):
+    """
+    Make upload_id the active roll of its state in the index.
+    Queues the changes on the current session; the caller commits.
+    Returns the number of index rows written.
+    """
+    new = _index_frame(roll_df)
+    previous_id = _active_upload_id(state, exclude=upload_id)
+
+    fresh = new
+    if previous_id:
+        old = pd.DataFrame.from_records(
+            VoterIdentity.query.with_entities(*[getattr(VoterIdentity, c) for c in _INDEX_COLUMNS])
+            .filter_by(upload_id=previous_id).all(),
+            columns=_INDEX_COLUMNS
+        )
+        pairs = new.merge(old, how='outer', on=_INDEX_COLUMNS, indicator=True)
+        stale = pairs.loc[pairs['_merge'] == 'right_only', 'voter_id'].unique().tolist()
+        fresh = pairs.loc[pairs['_merge'] == 'left_only', _INDEX_COLUMNS]
+
+        for start in range(0, len(stale), _IN_CHUNK):
+            VoterIdentity.query.filter(
+                VoterIdentity.upload_id == previous_id,
+                VoterIdentity.voter_id.in_(stale[start:start + _IN_CHUNK])
+            ).delete(synchronize_session=False)
+        # Everything left is unchanged and only moves to the new roll
+        VoterIdentity.query.filter_by(upload_id=previous_id).update(
+            {'upload_id': upload_id}, synchronize_session=False
+        )
+
+    db.session.bulk_insert_mappings(VoterIdentity, [
+        {**row, 'upload_id': upload_id, 'state': state, 'age': int(row['age'])}
+        for row in fresh.to_dict('records')
+    ])
+    return len(fresh)
+
+
+def apply_identity_delta(state, base_upload_id, upload_id, changed_df, removed_ids):
+    """
+    Make a revision the state's active roll by touching only its changed voters.
+    Only possible while its base is the active roll; returns False otherwise
+    (the caller then indexes the full view with update_identity_index).
+    """
+    if _active_upload_id(state, exclude=upload_id) != base_upload_id:
+        return False
+    replaced = sorted(set(removed_ids) | set(changed_df['voter_id'].astype(str)))
+    for start in range(0, len(replaced), _IN_CHUNK):
+        VoterIdentity.query.filter(
+            VoterIdentity.upload_id == base_upload_id,
+            VoterIdentity.voter_id.in_(replaced[start:start + _IN_CHUNK])
+        ).delete(synchronize_session=False)
+    VoterIdentity.query.filter_by(upload_id=base_upload_id).update(
+        {'upload_id': upload_id}, synchronize_session=False
+    )
+    db.session.bulk_insert_mappings(VoterIdentity, [
+        {**row, 'upload_id': upload_id, 'state': state, 'age': int(row['age'])}
+        for row in _index_frame(changed_df).to_dict('records')
+    ])
+    return True
+
+
+def rekey_identity_index():
+    """Recompute identity keys of index rows from their stored name and age; returns rows changed"""
+    changed = 0
+    last_id = 0
+    while True:
+        rows = (VoterIdentity.query.with_entities(VoterIdentity.id, VoterIdentity.identity_key, VoterIdentity.name, VoterIdentity.age)
+                .filter(VoterIdentity.id > last_id).order_by(VoterIdentity.id).limit(_REKEY_CHUNK).all())
+        if not rows:
+            return changed
+        frame = pd.DataFrame.from_records(rows, columns=['id', 'identity_key', 'name', 'age'])
+        frame['new_key'] = identity_keys(frame)
+        stale = frame[frame['new_key'] != frame['identity_key']]
+        db.session.bulk_update_mappings(VoterIdentity, [
+            {'id': int(row_id), 'identity_key': key} for row_id, key in zip(stale['id'], stale['new_key'])
+        ])
+        changed += len(stale)
+        last_id = int(frame['id'].iloc[-1])
+
+
+def ensure_identity_index():
+    """
+    Bring the index up to date with the stored rolls: re-key rows from an older
+    IDENTITY_KEY_VERSION and index the latest roll of every state that has none
+    yet (rolls stored before the index existed). Meant for startup, not reads.
+    """
+    from roll_store import load_roll_frame
+
+    version = db.session.get(Counter, KEY_VERSION_COUNTER)
+    if version is None or version.value < IDENTITY_KEY_VERSION:
+        rekey_identity_index()
+        if version is None:
+            db.session.add(Counter(name=KEY_VERSION_COUNTER, value=IDENTITY_KEY_VERSION))
+        else:
+            version.value = IDENTITY_KEY_VERSION
+
+    indexed = {row[0] for row in db.session.query(VoterIdentity.state).distinct()}
+    states = [row[0] for row in db.session.query(ElectoralRoll.state).distinct()]
+    for state in states:
+        if state in indexed:
+            continue
+        latest = ElectoralRoll.query.filter_by(state=state).order_by(
+            ElectoralRoll.uploaded_at.desc(), ElectoralRoll.id.desc()).first()
+        frame = load_roll_frame(latest.upload_id)
+        if not frame.empty:
+            update_identity_index(state, latest.upload_id, frame)
+    db.session.commit()
+
+
+def find_cross_roll_voters(scope='state', state=None, limit=100):
+    """
+    Identities present in more than one active roll.
+
+    scope='state' counts distinct rolls (one active roll per state);
+    scope='constituency' counts distinct (roll, constituency) pairs, which also
+    catches the same person enrolled in two constituencies of one state.
+    state restricts the result to identities that appear in that state.
+    """
+    if scope not in MATCH_SCOPES:
+        raise ValueError(f"scope must be one of {', '.join(MATCH_SCOPES)}")
+
+    roll_key = VoterIdentity.upload_id
+    if scope == 'constituency':
+        roll_key = VoterIdentity.upload_id + ':' + VoterIdentity.constituency
+    roll_count = func.count(func.distinct(roll_key)).label('roll_count')
+
+    keys = db.session.query(VoterIdentity.identity_key, roll_count).group_by(VoterIdentity.identity_key)
+    if state:
+        in_state = db.session.query(VoterIdentity.identity_key).filter(VoterIdentity.state == state)
+        keys = keys.filter(VoterIdentity.identity_key.in_(in_state))
+    keys = keys.having(roll_count > 1).order_by(roll_count.desc(), VoterIdentity.identity_key).limit(limit).subquery()
+
+    rows = (db.session.query(VoterIdentity, keys.c.roll_count)
+            .join(keys, VoterIdentity.identity_key == keys.c.identity_key)
+            .order_by(keys.c.roll_count.desc(), VoterIdentity.identity_key, VoterIdentity.state,
+                      VoterIdentity.constituency, VoterIdentity.voter_id)
+            .all())
+
+    matches = {}
+    for identity, count in rows:
+        match = matches.setdefault(identity.identity_key, {
+            'identity_key': identity.identity_key,
+            'roll_count': count,
+            'voters': []
+        })
+        match['voters'].append(identity.to_dict())
+    return list(matches.values())
@@ -0,0 +1,90 @@
+"""
+Jobs - In-process background jobs with progress
+Owner: Vansh (Backend Developer)
+
+Long-running work (PDF ingest) runs on a daemon thread inside the app
+context. The job record lives in a bounded in-process registry and is polled
+through /api/jobs/<job_id>; the oldest finished jobs are evicted first. Every
+change is also published on the 'job' event channel for the SSE stream.
+"""
+
+import os
+import uuid
+import threading
+import traceback
+from collections import OrderedDict
+from datetime import datetime
+from database import db
+from events import publish
+
+JOB_HISTORY_SIZE = int(os.getenv('JOB_HISTORY_SIZE', 200))
+JOB_STATUSES = ('queued', 'running', 'done', 'failed')
+
+_jobs = OrderedDict()
+_jobs_lock = threading.Lock()
+
+
+def create_job(kind, **info):
+    """Register a queued job and return its id"""
+    job_id = str(uuid.uuid4())
+    with _jobs_lock:
+        _jobs[job_id] = {
+            'job_id': job_id,
+            'kind': kind,
+            'status': 'queued',
+            'progress': {},
+            'result': None,
+            'error': None,
+            'created_at': datetime.utcnow().isoformat(),
+            'finished_at': None,
+            **info
+        }
+        finished = [jid for jid, job in _jobs.items() if job['status'] in ('done', 'failed')]
+        for jid in finished[:max(0, len(_jobs) - JOB_HISTORY_SIZE)]:
+            del _jobs[jid]
+        snapshot = dict(_jobs[job_id])
+    publish('job', snapshot)
+    return job_id
+
+
+def update_job(job_id, **fields):
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return
+        job.update(fields)
+        snapshot = dict(job)
+    publish('job', snapshot)
+
+
+def get_job(job_id):
+    """Snapshot of a job record, or None"""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+
+def run_in_background(app, job_id, target, *args):
+    """
+    Run target(job_id, *args) on a daemon thread inside an app context.
+    target returns the job result; a result with an 'error' key marks the job failed.
+    """
+    def runner():
+        with app.app_context():
+            update_job(job_id, status='running')
+            try:
+                result = target(job_id, *args)
+                failed = isinstance(result, dict) and 'error' in result
+                update_job(job_id, status='failed' if failed else 'done', result=result,
+                           error=result.get('error') if failed else None)
+            except Exception as e:
+                db.session.rollback()
+                traceback.print_exc()
+                update_job(job_id, status='failed', error=str(e))
+            finally:
+                update_job(job_id, finished_at=datetime.utcnow().isoformat())
+                db.session.remove()
+
+    thread = threading.Thread(target=runner, name=f'job-{job_id[:8]}', daemon=True)
+    thread.start()
+    return thread
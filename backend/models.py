@@ -3,9 +3,12 @@ Database models for Electoral Roll Tracker
 Owner: Vansh (Backend Developer)
 """
 
+import json
 from database import db
 from datetime import datetime
 from sqlalchemy import Index
+from utils.validation import rule_names
+from utils.address import ADDRESS_WIDTHS
 
 class ElectoralRoll(db.Model):
     """Model for storing electoral roll metadata"""
@@ -18,8 +21,14 @@ class ElectoralRoll(db.Model):
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     data_hash = db.Column(db.String(64))
     state = db.Column(db.String(50), nullable=False, default='Unknown')
+    storage_mode = db.Column(db.String(10), nullable=False, default='full') # full, delta
+    base_upload_id = db.Column(db.String(36), db.ForeignKey('electoral_rolls.upload_id'), index=True)
     
     voter_records = db.relationship('VoterRecord', backref='electoral_roll', lazy='dynamic', cascade='all, delete-orphan')
+    tombstones = db.relationship('VoterTombstone', backref='electoral_roll', lazy='dynamic', cascade='all, delete-orphan')
+    identities = db.relationship('VoterIdentity', backref='electoral_roll', lazy='dynamic', cascade='all, delete-orphan')
+    buckets = db.relationship('RollBucket', backref='electoral_roll', lazy='dynamic', cascade='all, delete-orphan')
+    quarantined_rows = db.relationship('QuarantinedRow', backref='electoral_roll', lazy='dynamic', cascade='all, delete-orphan')
     
     def to_dict(self):
         return {
@@ -28,7 +37,9 @@ class ElectoralRoll(db.Model):
             'state': self.state,
             'row_count': self.row_count,
             'uploaded_at': self.uploaded_at.isoformat(),
-            'data_hash': self.data_hash
+            'data_hash': self.data_hash,
+            'storage_mode': self.storage_mode or 'full',
+            'base_upload_id': self.base_upload_id
         }
     
     def __repr__(self):
@@ -48,11 +59,18 @@ class VoterRecord(db.Model):
     constituency = db.Column(db.String(100), default='Unknown')
     registration_date = db.Column(db.String(20), nullable=False)
     row_hash = db.Column(db.String(64), nullable=False, index=True)
+    # Canonical address parts, parsed once at ingest (utils.address); NULL on rows
+    # stored before they existed, which roll_store.with_address_columns parses on read
+    address_normalized = db.Column(db.Text)
+    ward = db.Column(db.String(ADDRESS_WIDTHS['ward']))
+    house_number = db.Column(db.String(ADDRESS_WIDTHS['house_number']))
+    street = db.Column(db.String(ADDRESS_WIDTHS['street']))
     
     __table_args__ = (
         Index('idx_upload_voter', 'upload_id', 'voter_id'),
         Index('idx_upload_hash', 'upload_id', 'row_hash'),
         Index('idx_upload_constituency', 'upload_id', 'constituency'),
+        Index('idx_upload_ward', 'upload_id', 'ward'),
     )
     
     def to_dict(self):
@@ -68,6 +86,96 @@ class VoterRecord(db.Model):
     def __repr__(self):
         return f'<VoterRecord {self.voter_id}: {self.name}>'
 
+
+class VoterTombstone(db.Model):
+    """Model for voters removed by a delta-encoded roll relative to its base"""
+    __tablename__ = 'voter_tombstones'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    upload_id = db.Column(db.String(36), db.ForeignKey('electoral_rolls.upload_id'), nullable=False, index=True)
+    voter_id = db.Column(db.String(50), nullable=False)
+    
+    __table_args__ = (
+        Index('idx_tombstone_upload_voter', 'upload_id', 'voter_id'),
+    )
+    
+    def __repr__(self):
+        return f'<VoterTombstone {self.upload_id[:8]}: {self.voter_id}>'
+
+
+class VoterIdentity(db.Model):
+    """Model for the cross-roll identity index - one row per voter of each state's latest roll"""
+    __tablename__ = 'voter_identities'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    identity_key = db.Column(db.String(32), nullable=False) # md5 of normalized name | age band
+    upload_id = db.Column(db.String(36), db.ForeignKey('electoral_rolls.upload_id'), nullable=False, index=True)
+    state = db.Column(db.String(50), nullable=False)
+    constituency = db.Column(db.String(100), default='Unknown')
+    voter_id = db.Column(db.String(50), nullable=False)
+    name = db.Column(db.String(255), nullable=False)
+    age = db.Column(db.Integer, nullable=False)
+    
+    __table_args__ = (
+        Index('idx_identity_key_upload', 'identity_key', 'upload_id'),
+        Index('idx_identity_upload_voter', 'upload_id', 'voter_id'),
+    )
+    
+    def __repr__(self):
+        return f'<VoterIdentity {self.identity_key[:8]}: {self.voter_id}>'
+    
+    def to_dict(self):
+        return {
+            'voter_id': self.voter_id,
+            'name': self.name,
+            'age': self.age,
+            'state': self.state,
+            'constituency': self.constituency,
+            'upload_id': self.upload_id
+        }
+
+
+class QuarantinedRow(db.Model):
+    """Model for upload rows that failed validation and were set aside instead of loaded"""
+    __tablename__ = 'quarantined_rows'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    upload_id = db.Column(db.String(36), db.ForeignKey('electoral_rolls.upload_id'), nullable=False, index=True)
+    row_number = db.Column(db.Integer, nullable=False) # spreadsheet row, header = 1
+    error_mask = db.Column(db.Integer, nullable=False) # utils.validation.RULE_BITS
+    data = db.Column(db.Text, nullable=False) # JSON of the row as read
+    
+    def to_dict(self):
+        return {
+            'row_number': self.row_number,
+            'errors': rule_names(self.error_mask),
+            'data': json.loads(self.data)
+        }
+    
+    def __repr__(self):
+        return f'<QuarantinedRow {self.upload_id[:8]} row {self.row_number}>'
+
+
+class RollBucket(db.Model):
+    """Model for one node of a roll's fingerprint tree - the voters of a constituency under a voter_id prefix"""
+    __tablename__ = 'roll_buckets'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    upload_id = db.Column(db.String(36), db.ForeignKey('electoral_rolls.upload_id'), nullable=False)
+    constituency = db.Column(db.String(100), nullable=False)
+    prefix = db.Column(db.String(64), nullable=False) # '' is the constituency node
+    row_count = db.Column(db.Integer, nullable=False)
+    fingerprint = db.Column(db.String(32), nullable=False) # hex sum of row hashes mod 2^128
+    is_leaf = db.Column(db.Boolean, nullable=False)
+    
+    __table_args__ = (
+        Index('idx_bucket_upload_node', 'upload_id', 'constituency', 'prefix'),
+    )
+    
+    def __repr__(self):
+        return f'<RollBucket {self.upload_id[:8]} {self.constituency}/{self.prefix}*: {self.row_count}>'
+
+
 class Notification(db.Model):
     """Model for storing system notifications"""
     __tablename__ = 'notifications'
@@ -82,6 +190,14 @@ class Notification(db.Model):
     action_url = db.Column(db.String(255))
     action_type = db.Column(db.String(50)) # navigate, download, none
     
+    __table_args__ = (
+        # Newest-first pages, and the unread filter / bulk mark-read
+        Index('idx_notification_time', 'timestamp', 'id'),
+        Index('idx_notification_read_time', 'is_read', 'timestamp', 'id'),
+        # Ids are stream cursors and archive references, so SQLite must not reuse deleted ones
+        {'sqlite_autoincrement': True},
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -95,3 +211,35 @@ class Notification(db.Model):
             'actionUrl': self.action_url,
             'actionType': self.action_type
         }
+
+
+class NotificationArchive(db.Model):
+    """Model for notifications moved out of the live table by the retention job"""
+    __tablename__ = 'notification_archive'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    original_id = db.Column(db.Integer, nullable=False, index=True) # id the notification had in the live table
+    title = db.Column(db.String(255), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    severity = db.Column(db.String(50))
+    related_entity = db.Column(db.String(100))
+    timestamp = db.Column(db.DateTime, index=True)
+    is_read = db.Column(db.Boolean)
+    action_url = db.Column(db.String(255))
+    action_type = db.Column(db.String(50))
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    summary_id = db.Column(db.Integer, index=True) # summary notification that replaced it, if compacted
+    
+    def __repr__(self):
+        return f'<NotificationArchive {self.original_id}: {self.title}>'
+
+
+class Counter(db.Model):
+    """Model for a named running total kept in step with the rows it counts"""
+    __tablename__ = 'counters'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<Counter {self.name}: {self.value}>'
@@ -0,0 +1,288 @@
+"""
+Notification Retention - Compact and archive old notifications
+Owner: Vansh (Backend Developer)
+
+Every upload adds a notification and nothing removes them, so a scheduled
+pass keeps the live table small:
+
+    on UTC days that ended NOTIFICATION_COMPACT_AFTER_HOURS ago
+        repeated events (same title, severity and action on the same UTC day,
+        e.g. one 'Electoral Roll Uploaded' per file of a batch) are replaced by
+        one summary notification, read only if all of them were
+    older than NOTIFICATION_RETENTION_DAYS
+        every notification, summaries included, leaves the live table
+
+Only whole days are compacted and a pass never splits a day, so each group
+gets exactly one summary however often the pass runs. Compaction keeps its
+position in the counters table, so each day is compacted once; notifications
+written later with a timestamp on an already compacted day only expire.
+
+Removed rows are copied to notification_archive first unless
+NOTIFICATION_ARCHIVE is off, under their live id as original_id; archived
+members of a summary keep its id.
+
+Each worker runs the scheduler, but a pass only starts after taking a lease
+stored in the counters table, so at most one worker runs it per lease period.
+"""
+
+import os
+import time
+import threading
+import traceback
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import select, insert, update, or_, literal
+from sqlalchemy.exc import IntegrityError
+from database import db
+from models import Notification, NotificationArchive, Counter
+from notification_store import adjust_unread
+
+NOTIFICATION_COMPACT_AFTER_HOURS = float(os.getenv('NOTIFICATION_COMPACT_AFTER_HOURS', 24))
+NOTIFICATION_RETENTION_DAYS = float(os.getenv('NOTIFICATION_RETENTION_DAYS', 90))
+NOTIFICATION_ARCHIVE = os.getenv('NOTIFICATION_ARCHIVE', 'true').lower() == 'true'
+# Seconds between scheduled passes; 0 disables the scheduler
+NOTIFICATION_RETENTION_INTERVAL = int(os.getenv('NOTIFICATION_RETENTION_INTERVAL', 3600))
+# Old notifications grouped per pass; the rest wait for the next one
+NOTIFICATION_COMPACT_BATCH = int(os.getenv('NOTIFICATION_COMPACT_BATCH', 5000))
+
+SUMMARY_ENTITY = 'Summary'
+LEASE_COUNTER = 'notification_retention_lease'
+# Start of the first UTC day (epoch seconds) that compaction has not covered yet
+COMPACTED_COUNTER = 'notification_compacted_through'
+_EPOCH = datetime(1970, 1, 1)
+# Minimum seconds between two passes of any worker
+RETENTION_LEASE_SECONDS = int(os.getenv('NOTIFICATION_RETENTION_LEASE', 300))
+
+# ids per IN (...) list
+_IN_CHUNK = 500
+_ARCHIVED_COLUMNS = ['title', 'message', 'severity', 'related_entity', 'timestamp',
+                     'is_read', 'action_url', 'action_type']
+
+_metrics = {
+    'runs': 0,
+    'skipped_runs': 0,
+    'failed_runs': 0,
+    'summaries_created': 0,
+    'notifications_compacted': 0,
+    'notifications_expired': 0,
+    'last_run': None,
+    'last_error': None,
+}
+_metrics_lock = threading.Lock()
+_scheduler = None
+
+
+def retention_metrics():
+    """Totals since start, the last pass and the active configuration"""
+    with _metrics_lock:
+        metrics = dict(_metrics)
+    metrics['config'] = {
+        'compact_after_hours': NOTIFICATION_COMPACT_AFTER_HOURS,
+        'retention_days': NOTIFICATION_RETENTION_DAYS,
+        'archive': NOTIFICATION_ARCHIVE,
+        'interval_seconds': NOTIFICATION_RETENTION_INTERVAL,
+    }
+    metrics['scheduler_running'] = _scheduler is not None and _scheduler.is_alive()
+    return metrics
+
+
+def _acquire_lease(now_ts):
+    """True when this worker may run a pass now; records the start in the lease row"""
+    lease = Counter.__table__
+    taken = db.session.execute(
+        update(lease).where(lease.c.name == LEASE_COUNTER, lease.c.value <= now_ts - RETENTION_LEASE_SECONDS)
+        .values(value=now_ts)).rowcount
+    if not taken:
+        if db.session.get(Counter, LEASE_COUNTER) is not None:
+            db.session.rollback()
+            return False
+        db.session.add(Counter(name=LEASE_COUNTER, value=now_ts))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another worker created the lease row first
+        db.session.rollback()
+        return False
+    return True
+
+
+def _remove(condition, summary_id=None):
+    """Archive (unless disabled) and delete the notifications matching condition; returns the count"""
+    unread = Notification.query.filter(condition, Notification.is_read.is_(False)).count()
+    if NOTIFICATION_ARCHIVE:
+        columns = [getattr(Notification, c) for c in _ARCHIVED_COLUMNS]
+        source = select(Notification.id, *columns, literal(datetime.utcnow()), literal(summary_id)).where(condition)
+        db.session.execute(insert(NotificationArchive).from_select(
+            ['original_id'] + _ARCHIVED_COLUMNS + ['archived_at', 'summary_id'], source))
+    removed = Notification.query.filter(condition).delete(synchronize_session=False)
+    adjust_unread(db.session.connection(), -unread)
+    return removed
+
+
+def _day_start(timestamp):
+    return datetime.combine(timestamp.date(), datetime.min.time())
+
+
+def _summary(members):
+    first, last = members[0], members[-1]
+    return Notification(
+        title=last.title,
+        message=f'{len(members)} "{last.title}" notifications between {first.timestamp:%Y-%m-%d %H:%M} '
+                f'and {last.timestamp:%H:%M} UTC were compacted. Latest: {last.message}',
+        severity=last.severity,
+        related_entity=SUMMARY_ENTITY,
+        timestamp=last.timestamp,
+        is_read=all(m.is_read for m in members),
+        action_url=last.action_url,
+        action_type=last.action_type
+    )
+
+
+def _compacted_through():
+    """Start of the first day not yet compacted, as recorded by the last pass (or None)"""
+    counter = db.session.get(Counter, COMPACTED_COUNTER)
+    return _EPOCH + timedelta(seconds=counter.value) if counter is not None else None
+
+
+def _record_compacted_through(day):
+    value = int((day - _EPOCH).total_seconds())
+    counter = db.session.get(Counter, COMPACTED_COUNTER)
+    if counter is None:
+        db.session.add(Counter(name=COMPACTED_COUNTER, value=value))
+    else:
+        counter.value = value
+
+
+def _compact_batch(candidates):
+    """Summarize the repeated groups among candidates (whole days); returns (summaries, compacted)"""
+    groups = defaultdict(list)
+    for n in candidates:
+        groups[(n.title, n.severity, n.action_url, n.action_type, n.timestamp.date())].append(n)
+
+    summaries = compacted = 0
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        summary = _summary(members)
+        db.session.add(summary)
+        db.session.flush()
+        ids = [m.id for m in members]
+        for i in range(0, len(ids), _IN_CHUNK):
+            compacted += _remove(Notification.id.in_(ids[i:i + _IN_CHUNK]), summary_id=summary.id)
+        summaries += 1
+    return summaries, compacted
+
+
+def compact_notifications(cutoff, floor):
+    """
+    Replace each group of repeated notifications timestamped in [floor, cutoff)
+    with one summary. cutoff should be a day boundary.
+
+    Days are read in batches of about NOTIFICATION_COMPACT_BATCH rows that end
+    at the last whole day they hold, so a day's groups are never split. Each
+    batch commits with the day it reached, and the next pass starts from there,
+    so days full of one-off notifications are not scanned again and never hold
+    back newer days. Returns (summaries created, notifications compacted).
+    """
+    start = max(floor, _compacted_through() or floor)
+    pending = Notification.query.filter(
+        Notification.timestamp < cutoff,
+        or_(Notification.related_entity.is_(None), Notification.related_entity != SUMMARY_ENTITY))
+
+    summaries = compacted = 0
+    db.session.info['quiet_notifications'] = True
+    try:
+        while start < cutoff:
+            ordered = pending.filter(Notification.timestamp >= start).order_by(Notification.timestamp, Notification.id)
+            candidates = ordered.limit(NOTIFICATION_COMPACT_BATCH).all()
+            if len(candidates) < NOTIFICATION_COMPACT_BATCH:
+                reached = cutoff
+            else:
+                last_day = _day_start(candidates[-1].timestamp)
+                whole_days = [n for n in candidates if n.timestamp < last_day]
+                if whole_days:
+                    candidates, reached = whole_days, last_day
+                else:
+                    # A single day larger than the batch is loaded in full rather than split
+                    reached = last_day + timedelta(days=1)
+                    candidates = ordered.filter(Notification.timestamp < reached).all()
+
+            created, removed = _compact_batch(candidates)
+            summaries += created
+            compacted += removed
+            _record_compacted_through(reached)
+            db.session.commit()
+            start = reached
+    finally:
+        db.session.info.pop('quiet_notifications', None)
+    return summaries, compacted
+
+
+def expire_notifications(cutoff):
+    """Move every notification older than cutoff out of the live table"""
+    removed = _remove(Notification.timestamp < cutoff)
+    db.session.commit()
+    return removed
+
+
+def run_retention(now=None):
+    """
+    One retention pass. Returns its stats, or {'skipped': True} when another
+    pass ran within the lease period.
+    """
+    now = now or datetime.utcnow()
+    if not _acquire_lease(int(time.time())):
+        with _metrics_lock:
+            _metrics['skipped_runs'] += 1
+        return {'skipped': True}
+
+    started = time.perf_counter()
+    retention_cutoff = now - timedelta(days=NOTIFICATION_RETENTION_DAYS)
+    expired = expire_notifications(retention_cutoff)
+    # Only days that have fully aged past the threshold; an hourly pass would otherwise summarize a day piecemeal
+    compact_cutoff = _day_start(now - timedelta(hours=NOTIFICATION_COMPACT_AFTER_HOURS))
+    summaries, compacted = compact_notifications(compact_cutoff, retention_cutoff)
+
+    stats = {
+        'skipped': False,
+        'started_at': now.isoformat(),
+        'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+        'summaries_created': summaries,
+        'notifications_compacted': compacted,
+        'notifications_expired': expired,
+        'archived': NOTIFICATION_ARCHIVE,
+    }
+    with _metrics_lock:
+        _metrics['runs'] += 1
+        _metrics['summaries_created'] += summaries
+        _metrics['notifications_compacted'] += compacted
+        _metrics['notifications_expired'] += expired
+        _metrics['last_run'] = stats
+    return stats
+
+
+def start_retention_scheduler(app, interval=None):
+    """Run a retention pass every interval seconds on a daemon thread; returns the thread"""
+    global _scheduler
+    interval = NOTIFICATION_RETENTION_INTERVAL if interval is None else interval
+    if interval <= 0 or (_scheduler is not None and _scheduler.is_alive()):
+        return _scheduler
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                try:
+                    run_retention()
+                except Exception as e:
+                    db.session.rollback()
+                    traceback.print_exc()
+                    with _metrics_lock:
+                        _metrics['failed_runs'] += 1
+                        _metrics['last_error'] = str(e)
+                finally:
+                    db.session.remove()
+
+    _scheduler = threading.Thread(target=loop, name='notification-retention', daemon=True)
+    _scheduler.start()
+    return _scheduler
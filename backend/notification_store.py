@@ -0,0 +1,115 @@
+"""
+Notification Store - Paging, unread counter and bulk read-state updates
+Owner: Vansh (Backend Developer)
+
+Notifications are listed newest first with a keyset cursor on
+(timestamp, id), so every page is one range scan of idx_notification_time
+however deep the client pages.
+
+The unread total lives in the 'notifications_unread' Counter row and is
+changed in the same transaction as the notifications it counts: ORM inserts,
+updates and deletes adjust it through mapper events, and bulk statements
+adjust it by their rowcount. A missing row is rebuilt from a count.
+"""
+
+from datetime import datetime
+from sqlalchemy import event, or_, and_, update
+from sqlalchemy.orm.attributes import get_history
+from database import db
+from models import Notification, Counter
+
+UNREAD_COUNTER = 'notifications_unread'
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# ids per bulk mark-read statement
+MAX_MARK_READ_IDS = 1000
+
+
+def encode_cursor(notification):
+    return f'{notification.timestamp.isoformat()}_{notification.id}'
+
+
+def decode_cursor(cursor):
+    """(timestamp, id) of a cursor; ValueError when malformed"""
+    timestamp, _, notification_id = cursor.rpartition('_')
+    return datetime.fromisoformat(timestamp), int(notification_id)
+
+
+def page_notifications(limit=PAGE_SIZE, cursor=None, unread_only=False):
+    """
+    One page of notifications, newest first, starting after cursor.
+    Returns (notifications, next_cursor); next_cursor is None on the last page.
+    """
+    query = Notification.query
+    if unread_only:
+        query = query.filter(Notification.is_read.is_(False))
+    if cursor:
+        timestamp, notification_id = decode_cursor(cursor)
+        query = query.filter(or_(Notification.timestamp < timestamp,
+                                 and_(Notification.timestamp == timestamp, Notification.id < notification_id)))
+    rows = query.order_by(Notification.timestamp.desc(), Notification.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def adjust_unread(connection, delta):
+    """Add delta to the unread counter inside the caller's transaction"""
+    if delta:
+        connection.execute(update(Counter.__table__)
+                           .where(Counter.__table__.c.name == UNREAD_COUNTER)
+                           .values(value=Counter.__table__.c.value + delta))
+
+
+def recount_unread():
+    """Rebuild the unread counter from the notifications themselves"""
+    count = Notification.query.filter(Notification.is_read.is_(False)).count()
+    counter = db.session.get(Counter, UNREAD_COUNTER)
+    if counter is None:
+        db.session.add(Counter(name=UNREAD_COUNTER, value=count))
+    else:
+        counter.value = count
+    db.session.commit()
+    return count
+
+
+def unread_count():
+    counter = db.session.get(Counter, UNREAD_COUNTER)
+    return counter.value if counter is not None else recount_unread()
+
+
+def mark_notifications_read(ids=None, until=None):
+    """
+    Mark unread notifications read in one UPDATE: those in ids, or those
+    timestamped at or before until. Returns the number of rows changed.
+    """
+    query = Notification.query.filter(Notification.is_read.is_(False))
+    if ids is not None:
+        query = query.filter(Notification.id.in_(ids))
+    if until is not None:
+        query = query.filter(Notification.timestamp <= until)
+    updated = query.update({Notification.is_read: True}, synchronize_session=False)
+    adjust_unread(db.session.connection(), -updated)
+    db.session.commit()
+    return updated
+
+
+# ORM writes keep the counter in step; bulk statements call adjust_unread themselves
+
+@event.listens_for(Notification, 'after_insert')
+def _count_inserted(mapper, connection, target):
+    if not target.is_read:
+        adjust_unread(connection, 1)
+
+
+@event.listens_for(Notification, 'after_update')
+def _count_updated(mapper, connection, target):
+    history = get_history(target, 'is_read')
+    if history.has_changes() and history.deleted:
+        was_read, is_read = bool(history.deleted[0]), bool(target.is_read)
+        adjust_unread(connection, int(was_read) - int(is_read))
+
+
+@event.listens_for(Notification, 'after_delete')
+def _count_deleted(mapper, connection, target):
+    if not target.is_read:
+        adjust_unread(connection, -1)
@@ -0,0 +1,122 @@
+"""
+Response Cache - Conditional GETs and cached bodies for polled read endpoints
+Owner: Vansh (Backend Developer)
+
+Each cached endpoint names the data it is derived from ('uploads',
+'notifications'). The version of that data is read from the database on every
+request with one aggregate query, so it is shared by all workers and changes
+on any insert, delete or read-state change. The ETag is a hash of the route,
+its query args and those versions:
+
+    If-None-Match matches  -> 304, the view does not run
+    body cached in-process -> cached bytes, the view does not run
+    otherwise              -> the view runs and its 200 body is cached
+
+Rolls are immutable once uploaded, so comparisons keyed by upload ids only go
+stale when the set of rolls changes. If the version query fails the view runs
+uncached, so views with their own fallbacks (e.g. /api/dashboard reading the
+national CSV) still answer.
+"""
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, request, make_response
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+from database import db
+from models import ElectoralRoll, Notification
+from notification_store import unread_count
+
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 256))
+
+_responses = OrderedDict()
+_responses_lock = threading.Lock()
+
+
+def uploads_version():
+    """Changes whenever a roll is added or removed"""
+    count, last_id, last_at = db.session.query(
+        func.count(ElectoralRoll.id), func.max(ElectoralRoll.id), func.max(ElectoralRoll.uploaded_at)).one()
+    return f'{count}.{last_id}.{last_at}'
+
+
+def notifications_version():
+    """Changes whenever a notification is added, removed or marked read"""
+    count, last_id, last_at = db.session.query(
+        func.count(Notification.id), func.max(Notification.id), func.max(Notification.timestamp)).one()
+    return f'{count}.{last_id}.{last_at}.{unread_count()}'
+
+
+VERSION_SOURCES = {
+    'uploads': uploads_version,
+    'notifications': notifications_version,
+}
+
+
+def cache_key():
+    """Route and query args of the current request; arg order does not matter"""
+    return request.path, tuple(sorted(request.args.items(multi=True)))
+
+
+def clear_response_cache():
+    with _responses_lock:
+        _responses.clear()
+
+
+def cached_response(*sources):
+    """
+    Serve a GET view with an ETag derived from the versions of sources,
+    answering 304 to a matching If-None-Match and reusing cached 200 bodies.
+    Error responses are passed through uncached.
+    """
+    unknown = [s for s in sources if s not in VERSION_SOURCES]
+    if unknown:
+        raise ValueError(f'Unknown version sources: {", ".join(unknown)}')
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = cache_key()
+            try:
+                version = '|'.join(VERSION_SOURCES[s]() for s in sources)
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                print(f"Response cache bypassed for {request.path}: {e}")
+                response = make_response(view(*args, **kwargs))
+                response.headers['X-Cache'] = 'BYPASS'
+                return response
+            etag = hashlib.md5(f'{key}|{version}'.encode('utf-8')).hexdigest()
+
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+            else:
+                with _responses_lock:
+                    entry = _responses.get(key)
+                    if entry is not None and entry[0] == etag:
+                        _responses.move_to_end(key)
+                if entry is not None and entry[0] == etag:
+                    response = current_app.response_class(entry[1], status=200, headers=entry[2])
+                    response.headers['X-Cache'] = 'HIT'
+                else:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    if RESPONSE_CACHE_SIZE > 0:
+                        with _responses_lock:
+                            headers = [(k, v) for k, v in response.headers if k != 'Content-Length']
+                            _responses[key] = (etag, response.get_data(), headers)
+                            _responses.move_to_end(key)
+                            while len(_responses) > RESPONSE_CACHE_SIZE:
+                                _responses.popitem(last=False)
+                    response.headers['X-Cache'] = 'MISS'
+
+            # Weak, so the same tag covers the gzip/deflate encodings of the body
+            response.set_etag(etag, weak=True)
+            # Clients may keep the body but must revalidate before each use
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,211 @@
+"""
+Roll Store - Storage modes and view reconstruction for electoral rolls
+Owner: Vansh (Backend Developer)
+
+A roll is stored either in 'full' mode (every voter row under its own
+upload_id) or in 'delta' mode, where only rows that are new or changed
+relative to a base roll are stored, plus tombstones for removed voters.
+Readers never query VoterRecord directly; they go through load_roll_frame
+so both modes resolve to the same view. Views carry ROLL_COLUMNS plus the
+canonical address columns parsed at ingest (utils.address).
+"""
+
+import os
+import json
+import pandas as pd
+from database import db
+from models import ElectoralRoll, VoterRecord, VoterTombstone, QuarantinedRow
+from utils.address import ADDRESS_COLUMNS, canonicalize_addresses
+
+ROLL_COLUMNS = ['voter_id', 'name', 'age', 'address', 'constituency', 'registration_date', 'row_hash']
+STORED_COLUMNS = ROLL_COLUMNS + ADDRESS_COLUMNS
+STORAGE_MODES = ('full', 'delta')
+
+# Longest base chain a delta roll may sit on before we store a full copy again
+MAX_DELTA_CHAIN = int(os.getenv('MAX_DELTA_CHAIN', 8))
+
+# voter_ids per IN (...) list
+_IN_CHUNK = 500
+
+
+def default_storage_mode():
+    """Storage mode used when an upload does not ask for one"""
+    mode = os.getenv('ROLL_STORAGE_MODE', 'full').lower()
+    return mode if mode in STORAGE_MODES else 'full'
+
+
+def get_roll_chain(upload_id):
+    """Return [roll, base, base-of-base, ...] ending at a full roll"""
+    chain = []
+    roll = ElectoralRoll.query.filter_by(upload_id=upload_id).first()
+    while roll is not None:
+        chain.append(roll)
+        if roll.storage_mode != 'delta' or not roll.base_upload_id:
+            break
+        roll = ElectoralRoll.query.filter_by(upload_id=roll.base_upload_id).first()
+    return chain
+
+
+def can_be_delta_base(roll):
+    """Whether a delta roll may be stored on top of roll without exceeding MAX_DELTA_CHAIN"""
+    return len(get_roll_chain(roll.upload_id)) <= MAX_DELTA_CHAIN
+
+
+def pick_delta_base(state):
+    """Latest roll for a state that can serve as a delta base, or None"""
+    latest = ElectoralRoll.query.filter_by(state=state).order_by(ElectoralRoll.uploaded_at.desc()).first()
+    if latest is None or not can_be_delta_base(latest):
+        return None
+    return latest
+
+
+def with_address_columns(frame):
+    """Add canonical address columns to a roll frame, parsing only rows that lack them"""
+    if all(c in frame.columns for c in ADDRESS_COLUMNS):
+        missing = frame['address_normalized'].isna().to_numpy()
+        if not missing.any():
+            return frame
+    else:
+        frame = frame.assign(**{c: None for c in ADDRESS_COLUMNS})
+        missing = slice(None)
+    frame = frame.copy()
+    parsed = canonicalize_addresses(frame.loc[missing, 'address'].to_numpy())
+    frame.loc[missing, ADDRESS_COLUMNS] = parsed.to_numpy()
+    return frame
+
+
+def _stored_rows(upload_id, constituency=None):
+    """Fetch the rows physically stored under an upload_id as a DataFrame"""
+    query = VoterRecord.query.with_entities(*[getattr(VoterRecord, c) for c in STORED_COLUMNS]).filter_by(upload_id=upload_id)
+    if constituency:
+        query = query.filter_by(constituency=constituency)
+    # idx_upload_voter serves this order, so full rolls arrive pre-sorted for the diff core
+    query = query.order_by(VoterRecord.voter_id)
+    # Rows stored before address canonicalization existed are parsed on read
+    return with_address_columns(pd.DataFrame.from_records(query.all(), columns=STORED_COLUMNS))
+
+
+def _rows_for_ids(model, upload_id, voter_ids, columns):
+    """Rows of model stored under upload_id for the given voter_ids, in IN-list chunks"""
+    rows = []
+    for start in range(0, len(voter_ids), _IN_CHUNK):
+        rows.extend(
+            model.query.with_entities(*[getattr(model, c) for c in columns])
+            .filter(model.upload_id == upload_id, model.voter_id.in_(voter_ids[start:start + _IN_CHUNK])).all()
+        )
+    return pd.DataFrame.from_records(rows, columns=columns)
+
+
+def lookup_voters(upload_id, voter_ids):
+    """
+    Current rows (STORED_COLUMNS) of the given voters in a roll's view, without
+    reconstructing the view: each level of the delta chain is queried only for
+    the ids not yet resolved by a newer level.
+    """
+    remaining = set(voter_ids)
+    found = []
+    for roll in get_roll_chain(upload_id):
+        if not remaining:
+            break
+        rows = _rows_for_ids(VoterRecord, roll.upload_id, sorted(remaining), STORED_COLUMNS)
+        found.append(rows)
+        remaining -= set(rows['voter_id'])
+        if roll.storage_mode == 'delta' and remaining:
+            removed = _rows_for_ids(VoterTombstone, roll.upload_id, sorted(remaining), ['voter_id'])
+            remaining -= set(removed['voter_id'])
+    if not found:
+        return pd.DataFrame(columns=STORED_COLUMNS)
+    return with_address_columns(pd.concat(found, ignore_index=True))
+
+
+def _tombstone_ids(upload_id):
+    rows = VoterTombstone.query.with_entities(VoterTombstone.voter_id).filter_by(upload_id=upload_id).all()
+    return [r[0] for r in rows]
+
+
+def apply_delta(base_df, delta_df, deleted_ids):
+    """Overlay a delta (changed rows + tombstones) on a base view"""
+    replaced = base_df['voter_id'].isin(delta_df['voter_id']) | base_df['voter_id'].isin(deleted_ids)
+    kept = base_df[~replaced]
+    if delta_df.empty:
+        return kept.reset_index(drop=True)
+    if kept.empty:
+        return delta_df.reset_index(drop=True)
+    return pd.concat([kept, delta_df], ignore_index=True)
+
+
+def load_roll_frame(upload_id, constituency=None):
+    """
+    Reconstruct the full voter view of a roll as a DataFrame with STORED_COLUMNS.
+    Delta rolls are resolved against their base chain; unknown ids give an empty frame.
+    """
+    chain = get_roll_chain(upload_id)
+    if not chain:
+        return pd.DataFrame(columns=STORED_COLUMNS)
+
+    if len(chain) == 1:
+        return _stored_rows(upload_id, constituency)
+
+    # Voters can move between constituencies across revisions, so filter after resolving
+    frame = _stored_rows(chain[-1].upload_id)
+    for roll in reversed(chain[:-1]):
+        frame = apply_delta(frame, _stored_rows(roll.upload_id), _tombstone_ids(roll.upload_id))
+    if constituency:
+        frame = frame[frame['constituency'] == constituency].reset_index(drop=True)
+    return frame
+
+
+def load_roll_records(upload_id, constituency=None):
+    """Voter view of a roll as a list of dicts (same keys as VoterRecord.to_dict)"""
+    frame = load_roll_frame(upload_id, constituency)
+    return frame.drop(columns=['row_hash']).to_dict('records')
+
+
+def build_delta(base_df, new_df):
+    """
+    Split a full roll into what must be stored on top of base_df.
+    Returns (rows that are new or changed, voter_ids removed since base).
+    """
+    pairs = new_df[['voter_id', 'row_hash']].merge(base_df[['voter_id', 'row_hash']], how='left', indicator=True)
+    known = (pairs['_merge'] == 'both').to_numpy()
+    changed_rows = new_df[~known]
+    deleted_ids = base_df.loc[~base_df['voter_id'].isin(new_df['voter_id']), 'voter_id'].tolist()
+    return changed_rows, deleted_ids
+
+
+def save_roll_rows(upload_id, rows_df, deleted_ids=None):
+    """Queue voter rows (and tombstones) for an upload on the current session"""
+    rows_df = with_address_columns(rows_df)
+    db.session.bulk_insert_mappings(VoterRecord, [
+        {
+            'upload_id': upload_id,
+            'voter_id': str(row['voter_id']),
+            'name': str(row['name']),
+            'age': int(row['age']),
+            'address': str(row['address']),
+            'constituency': str(row['constituency']),
+            'registration_date': str(row['registration_date']),
+            'row_hash': row['row_hash'],
+            **{c: row[c] for c in ADDRESS_COLUMNS}
+        }
+        for row in rows_df[STORED_COLUMNS].to_dict('records')
+    ])
+    if deleted_ids:
+        db.session.bulk_insert_mappings(VoterTombstone, [
+            {'upload_id': upload_id, 'voter_id': str(voter_id)} for voter_id in deleted_ids
+        ])
+
+
+def save_quarantined_rows(upload_id, rows_df):
+    """Queue rows that failed validation (with an error_mask column) on the current session"""
+    data = rows_df.drop(columns=['error_mask']).astype(object)
+    data = data.where(data.notna(), None)
+    db.session.bulk_insert_mappings(QuarantinedRow, [
+        {
+            'upload_id': upload_id,
+            'row_number': int(index) + 2,
+            'error_mask': int(mask),
+            'data': json.dumps(row, default=str)
+        }
+        for index, mask, row in zip(rows_df.index, rows_df['error_mask'], data.to_dict('records'))
+    ])
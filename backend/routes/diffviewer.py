@@ -4,12 +4,17 @@ import sys
 import os
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from models import ElectoralRoll, VoterRecord
-from diff_engine import compare_rolls
+from models import ElectoralRoll
+from diff_engine import compare_rolls, get_changes, get_region_summary, count_changes, FIELD_BITS, REGION_FIELDS
+from timeline_engine import get_state_chain, build_timeline
+from response_cache import cached_response
 
 diffviewer_bp = Blueprint('diffviewer', __name__)
 
+HEATMAP_GROUPS = REGION_FIELDS
+
 @diffviewer_bp.route('/stats', methods=['GET'])
+@cached_response('uploads')
 def get_comparison_stats():
     """
     Get summary statistics from comparison
@@ -42,84 +47,74 @@ def get_comparison_stats():
 
 
 @diffviewer_bp.route('/timeline', methods=['GET'])
+@cached_response('uploads')
 def get_timeline_data():
     """
-    Get time-series data for changes
-    Query params: old_upload_id, new_upload_id
+    Get time-series data for changes across the chain of uploads of a state
+    Query params: state, or old_upload_id / new_upload_id (chain is clipped to that range
+    and the state taken from the rolls); constituency (optional)
     
-    Note: This is currently mock data for visualization purposes.
-    Real time-series would require historical comparison data.
+    Each point is the diff between two consecutive uploads ordered by uploaded_at.
     """
     try:
         old_upload_id = request.args.get('old_upload_id')
         new_upload_id = request.args.get('new_upload_id')
+        state = request.args.get('state')
+        constituency = request.args.get('constituency')
         
-        if not old_upload_id or not new_upload_id:
-            return jsonify({'error': 'Both old_upload_id and new_upload_id are required'}), 400
+        if not state and not (old_upload_id or new_upload_id):
+            return jsonify({'error': 'Provide state, or old_upload_id and new_upload_id'}), 400
         
-        # Get comparison to derive timeline
-        result = compare_rolls(old_upload_id, new_upload_id)
-        stats = result.get('stats', {})
+        if not state:
+            anchor = ElectoralRoll.query.filter_by(upload_id=new_upload_id or old_upload_id).first()
+            if not anchor:
+                return jsonify({'error': 'Upload not found'}), 404
+            state = anchor.state
         
-        # Generate mock timeline data based on comparison stats
-        # In a real system, this would come from historical comparison records
-        total_changes = stats.get('total_added', 0) + stats.get('total_deleted', 0) + stats.get('total_modified', 0)
-        
-        timeline = []
-        months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-        
-        for i, month in enumerate(months):
-            # Distribute changes across timeline
-            progress = (i + 1) / len(months)
-            timeline.append({
-                'month': month,
-                'added': int(stats.get('total_added', 0) * progress * 0.1),
-                'deleted': int(stats.get('total_deleted', 0) * progress * 0.1),
-                'modified': int(stats.get('total_modified', 0) * progress * 0.1)
-            })
+        rolls = get_state_chain(state, old_upload_id, new_upload_id)
         
-        return jsonify(timeline), 200
+        return jsonify(build_timeline(rolls, constituency)), 200
         
     except Exception as e:
         return jsonify({'error': f'Failed to fetch timeline: {str(e)}'}), 500
 
 
 @diffviewer_bp.route('/heatmap', methods=['GET'])
+@cached_response('uploads')
 def get_heatmap_data():
     """
     Get geographic distribution of changes
-    Query params: old_upload_id, new_upload_id
+    Query params: old_upload_id, new_upload_id, group_by (default 'constituency')
     
-    Returns constituency-level change data for heatmap visualization
+    Returns one region per constituency with its change counts, largest first
     """
     try:
         old_upload_id = request.args.get('old_upload_id')
         new_upload_id = request.args.get('new_upload_id')
+        group_by = request.args.get('group_by', 'constituency')
         
         if not old_upload_id or not new_upload_id:
             return jsonify({'error': 'Both old_upload_id and new_upload_id are required'}), 400
         
-        # Get comparison result
-        result = compare_rolls(old_upload_id, new_upload_id)
+        if group_by not in HEATMAP_GROUPS:
+            return jsonify({'error': f'group_by must be one of: {", ".join(HEATMAP_GROUPS)}'}), 400
         
-        # Get state information from uploads
         old_roll = ElectoralRoll.query.filter_by(upload_id=old_upload_id).first()
         new_roll = ElectoralRoll.query.filter_by(upload_id=new_upload_id).first()
         
         if not old_roll or not new_roll:
             return jsonify({'error': 'Upload not found'}), 404
         
-        stats = result.get('stats', {})
+        regions = get_region_summary(old_upload_id, new_upload_id, group_by)
         
-        # Create heatmap data structure
-        # In a real system, this would aggregate by constituency/region
         heatmap_data = [{
-            'region': old_roll.state or 'Unknown',
-            'added': stats.get('total_added', 0),
-            'deleted': stats.get('total_deleted', 0),
-            'modified': stats.get('total_modified', 0),
-            'intensity': min(100, (stats.get('total_added', 0) + stats.get('total_deleted', 0)) / 10)
-        }]
+            'region': region,
+            'added': counts['added'],
+            'deleted': counts['deleted'],
+            'modified': counts['modified'],
+            'intensity': min(100, (counts['added'] + counts['deleted']) / 10)
+        } for region, counts in regions.items()]
+        heatmap_data.sort(key=lambda r: r['added'] + r['deleted'] + r['modified'], reverse=True)
         
         return jsonify(heatmap_data), 200
         
@@ -128,6 +123,7 @@ def get_heatmap_data():
 
 
 @diffviewer_bp.route('/differences', methods=['GET'])
+@cached_response('uploads')
 def get_differences():
     """
     Get detailed list of voter-level differences with pagination
@@ -200,3 +196,48 @@ def get_differences():
         
     except Exception as e:
         return jsonify({'error': f'Failed to fetch differences: {str(e)}'}), 500
+
+
+@diffviewer_bp.route('/field-changes', methods=['GET'])
+@cached_response('uploads')
+def get_field_changes():
+    """
+    Count modified voters by changed fields, aggregated from the stored change masks
+    Query params: old_upload_id, new_upload_id, constituency (optional),
+                  fields (comma-separated, e.g. address,age), match ('any' default, or 'only')
+    """
+    try:
+        old_upload_id = request.args.get('old_upload_id')
+        new_upload_id = request.args.get('new_upload_id')
+        constituency = request.args.get('constituency')
+        fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+        match = request.args.get('match', 'any')
+        
+        if not old_upload_id or not new_upload_id:
+            return jsonify({'error': 'Both old_upload_id and new_upload_id are required'}), 400
+        
+        unknown_fields = [f for f in fields if f not in FIELD_BITS]
+        if unknown_fields:
+            return jsonify({'error': f'Unknown fields: {", ".join(unknown_fields)}', 'valid_fields': list(FIELD_BITS)}), 400
+        
+        if match not in ('any', 'only'):
+            return jsonify({'error': "match must be 'any' or 'only'"}), 400
+        
+        old_roll = ElectoralRoll.query.filter_by(upload_id=old_upload_id).first()
+        new_roll = ElectoralRoll.query.filter_by(upload_id=new_upload_id).first()
+        
+        if not old_roll or not new_roll:
+            return jsonify({'error': 'Upload not found'}), 404
+        
+        changes = get_changes(old_upload_id, new_upload_id)
+        
+        return jsonify({
+            'count': count_changes(changes, constituency, fields, only=(match == 'only')),
+            'fields': fields,
+            'match': match,
+            'constituency': constituency,
+            'field_bits': FIELD_BITS
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Failed to fetch field changes: {str(e)}'}), 500
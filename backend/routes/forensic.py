@@ -5,7 +5,9 @@ Advanced multi-layer anomaly detection endpoints
 
 from flask import Blueprint, request, jsonify
 from database import db
-from models import ElectoralRoll, VoterRecord
+from models import ElectoralRoll
+from snapshot_store import load_voter_records
+from identity_index import MATCH_SCOPES, find_cross_roll_voters
 from forensics.fusion import MultiSignalFusionEngine
 from datetime import datetime
 import json
@@ -70,19 +72,12 @@ def analyze_constituency():
         if not current_roll:
             return jsonify({'error': 'Current upload not found'}), 404
         
-        current_query = VoterRecord.query.filter_by(upload_id=current_upload_id)
-        if constituency_filter:
-            current_query = current_query.filter_by(constituency=constituency_filter)
-        
-        current_voters = [v.to_dict() for v in current_query.all()]
+        current_voters = load_voter_records(current_upload_id, constituency_filter)
         
         # Fetch previous voters (if provided)
         previous_voters = []
         if previous_upload_id:
-            previous_query = VoterRecord.query.filter_by(upload_id=previous_upload_id)
-            if constituency_filter:
-                previous_query = previous_query.filter_by(constituency=constituency_filter)
-            previous_voters = [v.to_dict() for v in previous_query.all()]
+            previous_voters = load_voter_records(previous_upload_id, constituency_filter)
         
         # Run forensic analysis
         analysis_result = fusion_engine.analyze(current_voters, previous_voters)
@@ -229,6 +224,36 @@ def list_analyses():
         return jsonify({'error': f'Failed to list analyses: {str(e)}'}), 500
 
 
+@forensic_bp.route('/cross-roll-voters', methods=['GET'])
+def list_cross_roll_voters():
+    """
+    Voters present in more than one active (latest per state) roll
+    
+    Query params:
+    - scope: 'state' (default) - same person in rolls of different states
+             'constituency' - also same person in two constituencies of one state
+    - state: only identities that appear in this state
+    - limit: maximum number of identities (default 100)
+    """
+    try:
+        scope = request.args.get('scope', 'state')
+        if scope not in MATCH_SCOPES:
+            return jsonify({'error': f"Invalid scope. Expected one of: {', '.join(MATCH_SCOPES)}"}), 400
+        limit = max(1, min(request.args.get('limit', type=int, default=100), 1000))
+        
+        matches = find_cross_roll_voters(scope, request.args.get('state'), limit)
+        
+        return jsonify({
+            'scope': scope,
+            'total': len(matches),
+            'matches': matches
+        }), 200
+        
+    except Exception as e:
+        print(f"Cross-roll lookup error: {str(e)}")
+        return jsonify({'error': f'Failed to find cross-roll voters: {str(e)}'}), 500
+
+
 def _generate_demo_top_anomaly():
     """Generate a demo top anomaly for initial showcase"""
     demo_data = {
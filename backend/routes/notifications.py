@@ -1,23 +1,153 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 import sys
 import os
+from datetime import datetime
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database import db
 from models import Notification
+from response_cache import cached_response
+from notification_store import PAGE_SIZE, MAX_PAGE_SIZE, MAX_MARK_READ_IDS, page_notifications, unread_count, mark_notifications_read
+from notification_retention import retention_metrics, run_retention
+from events import EVENT_CHANNELS, SSE_HEARTBEAT_SECONDS, SSE_REPLAY_LIMIT, subscribe, unsubscribe, format_sse
 
 notifications_bp = Blueprint('notifications', __name__)
 
 @notifications_bp.route('/api/notifications', methods=['GET'])
+@cached_response('notifications')
 def get_notifications():
-    """Fetch all notifications ordered by timestamp desc"""
+    """
+    Fetch notifications ordered by timestamp desc
+    Query params: limit (default 50, max 200), cursor (from the X-Next-Cursor header
+                  of the previous page), unread (true to list only unread ones)
+    """
     try:
-        notifications = Notification.query.order_by(Notification.timestamp.desc()).limit(50).all()
-        return jsonify([n.to_dict() for n in notifications]), 200
+        limit = min(max(request.args.get('limit', PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+        unread_only = request.args.get('unread', '').lower() == 'true'
+        try:
+            notifications, next_cursor = page_notifications(limit, request.args.get('cursor'), unread_only)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        response = jsonify([n.to_dict() for n in notifications])
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response, 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@notifications_bp.route('/api/notifications/unread-count', methods=['GET'])
+def get_unread_count():
+    """Number of unread notifications, read from the unread counter"""
+    try:
+        return jsonify({'unread': unread_count()}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@notifications_bp.route('/api/notifications/read', methods=['PATCH'])
+def mark_many_read():
+    """
+    Mark notifications read in one statement
+    Request body: {"ids": [1, 2, ...]} and/or {"until": "2026-02-15T11:00:00"} (timestamp, inclusive)
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        ids, until = data.get('ids'), data.get('until')
+        if ids is None and until is None:
+            return jsonify({'error': 'Provide ids or until'}), 400
+        if ids is not None:
+            if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+                return jsonify({'error': 'ids must be a list of notification ids'}), 400
+            if len(ids) > MAX_MARK_READ_IDS:
+                return jsonify({'error': f'At most {MAX_MARK_READ_IDS} ids per request; use until for more'}), 400
+        if until is not None:
+            try:
+                until = datetime.fromisoformat(until)
+            except (TypeError, ValueError):
+                return jsonify({'error': 'until must be an ISO timestamp'}), 400
+        updated = mark_notifications_read(ids, until)
+        return jsonify({'updated': updated, 'unread': unread_count()}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@notifications_bp.route('/api/notifications/retention', methods=['GET'])
+def get_retention_metrics():
+    """Counters of the notification retention job, its last pass and its configuration"""
+    return jsonify(retention_metrics()), 200
+
+@notifications_bp.route('/api/notifications/retention/run', methods=['POST'])
+def run_retention_now():
+    """Run a retention pass now instead of waiting for the scheduler"""
+    try:
+        return jsonify(run_retention()), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Retention failed: {str(e)}'}), 500
+
+@notifications_bp.route('/api/notifications/stream', methods=['GET'])
+def stream_notifications():
+    """
+    Server-Sent Events stream of new notifications and job progress
+    Query params: since (last notification id seen; Last-Event-ID header also accepted),
+                  channels (comma-separated subset of notification,job)
+    
+    Every notification after the cursor is replayed first, SSE_REPLAY_LIMIT per
+    query until the replay catches up, then events are pushed as they happen.
+    """
+    since = request.args.get('since', request.headers.get('Last-Event-ID'))
+    channels = [c.strip() for c in request.args.get('channels', ','.join(EVENT_CHANNELS)).split(',') if c.strip()]
+    
+    unknown_channels = [c for c in channels if c not in EVENT_CHANNELS]
+    if unknown_channels or not channels:
+        return jsonify({'error': f'channels must be a subset of: {", ".join(EVENT_CHANNELS)}'}), 400
+    try:
+        since = int(since) if since not in (None, '') else None
+    except ValueError:
+        return jsonify({'error': 'since must be a notification id'}), 400
+    
+    def replay_page(after):
+        rows = Notification.query.filter(Notification.id > after).order_by(Notification.id).limit(SSE_REPLAY_LIMIT).all()
+        return [n.to_dict() for n in rows]
+    
+    # Subscribe before the replay query so nothing committed in between is missed
+    subscription = subscribe(channels)
+    try:
+        replay = replay_page(since) if since is not None and 'notification' in channels else []
+    except Exception as e:
+        unsubscribe(subscription)
+        return jsonify({'error': str(e)}), 500
+    
+    def events():
+        try:
+            yield 'retry: 3000\n\n'
+            last_id, page = since, replay
+            while page:
+                for notification in page:
+                    yield format_sse('notification', notification, notification['id'])
+                last_id = page[-1]['id']
+                page = replay_page(last_id) if len(page) >= SSE_REPLAY_LIMIT else []
+            # Live events can take a while; do not hold a pooled connection meanwhile
+            db.session.close()
+            while True:
+                item = subscription.get(SSE_HEARTBEAT_SECONDS)
+                if item is None:
+                    if subscription.closed:
+                        break
+                    yield ': keepalive\n\n'
+                    continue
+                channel, data, event_id = item
+                if channel is None:
+                    break
+                if channel == 'notification' and last_id is not None and event_id <= last_id:
+                    continue
+                yield format_sse(channel, data, event_id)
+        finally:
+            unsubscribe(subscription)
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @notifications_bp.route('/api/notifications/<int:id>/read', methods=['PATCH'])
 def mark_read(id):
     """Mark a notification as read"""
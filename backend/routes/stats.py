@@ -6,6 +6,7 @@ import pandas as pd
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from models import ElectoralRoll
+from response_cache import cached_response
 
 stats_bp = Blueprint('stats', __name__)
 
@@ -17,6 +18,7 @@ NATIONAL_CSV_PATH = os.path.join(
 )
 
 @stats_bp.route('/api/stats', methods=['GET'])
+@cached_response('uploads')
 def get_dashboard_stats():
     try:
         state_filter = request.args.get('state', 'All States')
@@ -60,6 +62,7 @@ def get_dashboard_stats():
 
 
 @stats_bp.route('/api/dashboard', methods=['GET'])
+@cached_response('uploads')
 def get_dashboard_aggregation():
     """
     Dashboard Aggregation API
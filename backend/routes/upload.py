@@ -1,22 +1,54 @@
-"""Upload Route - Handle CSV file uploads"""
-from flask import Blueprint, request, jsonify
+"""Upload Route - Handle CSV and PDF file uploads"""
+from flask import Blueprint, request, jsonify, current_app
 import pandas as pd
 import uuid
 import sys
 import os
+import time
+import tempfile
 import traceback
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database import db
-from models import ElectoralRoll, VoterRecord, Notification
-from diff_engine import calculate_row_hash, calculate_dataset_hash
+from models import ElectoralRoll, Notification
+from diff_engine import calculate_row_hashes, seed_diff
+from fingerprint import (DatasetFingerprint, save_roll_tree, save_tree_nodes, load_roll_tree, tree_fingerprint,
+                         roll_fingerprint, apply_tree_delta)
+from snapshot_store import snapshots_enabled, export_snapshot
+from roll_store import (STORED_COLUMNS, STORAGE_MODES, default_storage_mode, pick_delta_base, can_be_delta_base, load_roll_frame,
+                        lookup_voters, apply_delta, build_delta, save_roll_rows, save_quarantined_rows)
+from identity_index import update_identity_index, apply_identity_delta
+from utils.address import ADDRESS_COLUMNS, canonicalize_addresses
+from utils.validation import ON_INVALID_MODES, RULE_BITS, validate_roll_frame, rejection_details, row_numbers
+from utils.pdf_parser import PDFPLUMBER_AVAILABLE, ExtractionReport, read_pdf_frame
+from jobs import create_job, update_job, get_job, run_in_background
 
 upload_bp = Blueprint('upload', __name__)
 REQUIRED_COLUMNS = ['voter_id', 'name', 'age', 'address', 'registration_date']
 
+# Delta files: one row per change, keyed by the change column
+UPLOAD_FORMATS = ('full', 'delta')
+DELTA_REQUIRED_COLUMNS = ['voter_id', 'change']
+DELTA_CHANGES = {
+    'add': 'add', 'a': 'add', 'new': 'add', 'form6': 'add',
+    'modify': 'modify', 'm': 'modify', 'update': 'modify', 'correction': 'modify', 'form8': 'modify',
+    'delete': 'delete', 'd': 'delete', 'remove': 'delete', 'form7': 'delete',
+}
+DELTA_CONFLICTS = {
+    'add_existing': 'added but already in the base upload',
+    'modify_missing': 'modified but not in the base upload',
+    'delete_missing': 'deleted but not in the base upload',
+    'repeated': 'listed more than once',
+}
+
+# PDF job progress is published every this many pages or seconds, whichever comes first
+PDF_PROGRESS_PAGES = int(os.getenv('PDF_PROGRESS_PAGES', 25))
+PDF_PROGRESS_SECONDS = float(os.getenv('PDF_PROGRESS_SECONDS', 2))
+
 def process_single_file(file):
     """
     Process a single CSV file and save to database.
+    PDF files are saved and ingested by a background job instead.
     Returns dict with result or error.
     """
     # Get State from request
@@ -24,6 +56,22 @@ def process_single_file(file):
     if not state or state == 'undefined' or state == 'null':
         return {'error': 'State is required', 'filename': file.filename if file else 'unknown'}
 
+    # Storage mode: 'full' stores every row, 'delta' stores only changes against the latest roll of this state
+    # A revision of base_upload_id defaults to delta storage
+    base_upload_id = request.form.get('base_upload_id') or None
+    storage_mode = (request.form.get('storage_mode') or ('delta' if base_upload_id else default_storage_mode())).lower()
+    if storage_mode not in STORAGE_MODES:
+        return {'error': f'Invalid storage_mode. Expected one of: {", ".join(STORAGE_MODES)}', 'filename': file.filename}
+    
+    # 'delta' files list only changes against base_upload_id
+    upload_format = (request.form.get('format') or 'full').lower()
+    if upload_format not in UPLOAD_FORMATS:
+        return {'error': f'Invalid format. Expected one of: {", ".join(UPLOAD_FORMATS)}', 'filename': file.filename}
+    
+    # Invalid rows: 'reject' fails the file, 'quarantine' stores them aside and loads the rest
+    on_invalid = (request.form.get('on_invalid') or 'reject').lower()
+    if on_invalid not in ON_INVALID_MODES:
+        return {'error': f'Invalid on_invalid. Expected one of: {", ".join(ON_INVALID_MODES)}', 'filename': file.filename}
 
     try:
         # Edge Case 2: Empty filename
@@ -31,8 +79,9 @@ def process_single_file(file):
             return {'error': 'No file selected', 'filename': ''}
         
         # Edge Case 3: Invalid file extension
-        if not file.filename.lower().endswith('.csv'):
-            return {'error': 'Only CSV files are supported', 'filename': file.filename}
+        is_pdf = file.filename.lower().endswith('.pdf')
+        if not (is_pdf or file.filename.lower().endswith('.csv')):
+            return {'error': 'Only CSV and PDF files are supported', 'filename': file.filename}
         
         # Edge Case 4: Check file size (before processing)
         file.seek(0, os.SEEK_END)
@@ -46,6 +95,13 @@ def process_single_file(file):
         if file_size > MAX_FILE_SIZE:
             return {'error': f'File too large. Maximum size is 50MB. Your file is {file_size / (1024*1024):.2f}MB', 'filename': file.filename}
         
+        if is_pdf and upload_format == 'delta':
+            return {'error': 'Delta files must be CSV', 'filename': file.filename}
+        if is_pdf and not PDFPLUMBER_AVAILABLE:
+            return {'error': 'PDF uploads are not supported on this server (pdfplumber is not installed)', 'filename': file.filename}
+        if is_pdf:
+            return start_pdf_ingest(file, state, storage_mode, on_invalid, base_upload_id)
+        
         # Edge Case 5: Try multiple encodings for CSV parsing
         encodings = ['utf-8-sig', 'utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
         df = None
@@ -63,196 +119,9 @@ def process_single_file(file):
         if df is None:
             return {'error': 'Unable to parse CSV file. Please ensure it is a valid CSV file with proper encoding', 'filename': file.filename}
         
-        # Edge Case 6: Empty DataFrame (only headers or completely empty)
-        if df.empty:
-            return {'error': 'CSV file is empty or contains no data rows', 'filename': file.filename}
-        
-        # Edge Case 7: Missing required columns
-        missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
-        if missing_columns:
-            return {
-                'error': f'Missing required columns: {", ".join(missing_columns)}',
-                'filename': file.filename,
-                'required_columns': REQUIRED_COLUMNS,
-                'found_columns': list(df.columns)
-            }
-        
-        # Edge Case 8: Check for completely empty rows
-        df = df.dropna(how='all')  # Remove rows where all values are NaN
-        if df.empty:
-            return {'error': 'CSV file contains no valid data rows', 'filename': file.filename}
-
-        # Clean data: strip whitespace from string columns BEFORE validation
-        # Convert to string and handle NaN values properly
-        for col in ['voter_id', 'name', 'address', 'registration_date']:
-            # Replace NaN with empty string first, then convert to string
-            df[col] = df[col].fillna('').astype(str).str.strip()
-            # Remove 'nan' strings that might have been created
-            df[col] = df[col].replace('nan', '')
-        
-        # Edge Case 9: Validate data types and handle invalid values
-        validation_errors = []
-        
-        # Check voter_id: must be non-null string (now properly converted)
-        null_voter_ids = df[df['voter_id'] == '']
-        if not null_voter_ids.empty:
-            validation_errors.append(f'{len(null_voter_ids)} rows have empty or null voter_id')
-        
-        # Check age: must be valid integer
-        try:
-            df['age'] = pd.to_numeric(df['age'], errors='coerce')
-            invalid_ages = df[df['age'].isna() | (df['age'] < 0) | (df['age'] > 150)]
-            if not invalid_ages.empty:
-                validation_errors.append(f'{len(invalid_ages)} rows have invalid age values')
-        except Exception:
-            validation_errors.append('Age column contains non-numeric values')
-        
-        # Check name: must be non-null string (already converted)
-        null_names = df[df['name'] == '']
-        if not null_names.empty:
-            validation_errors.append(f'{len(null_names)} rows have empty or null name')
-        
-        # Check address: must be non-null string (already converted)
-        null_addresses = df[df['address'] == '']
-        if not null_addresses.empty:
-            validation_errors.append(f'{len(null_addresses)} rows have empty or null address')
-        
-        # Check registration_date: basic format validation
-        try:
-            pd.to_datetime(df['registration_date'], errors='raise', format='%Y-%m-%d')
-        except (ValueError, TypeError):
-            validation_errors.append('registration_date must be in YYYY-MM-DD format')
-        
-        if validation_errors:
-            return {
-                'error': 'Data validation failed',
-                'filename': file.filename,
-                'details': validation_errors,
-                'row_count': len(df)
-            }
-        
-        # Edge Case 10: Check for duplicate voter_ids within the file
-        duplicate_voter_ids = df[df.duplicated(subset=['voter_id'], keep=False)]
-        if not duplicate_voter_ids.empty:
-            duplicate_count = len(duplicate_voter_ids)
-            return {
-                'error': f'Duplicate voter_id found in file',
-                'filename': file.filename,
-                'details': f'{duplicate_count} rows have duplicate voter_id values',
-                'duplicate_ids': duplicate_voter_ids['voter_id'].unique().tolist()[:10]
-            }
-        
-        # Convert age to int (already validated)
-        df['age'] = df['age'].astype(int)
-        
-        # Helper to find constituency info
-        # Check for constituency in columns (case insensitive) -> if not found check address
-        constituency_col = None
-        possible_names = ['constituency', 'pc_name', 'ac_name', 'assembly', 'parliamentary', 'ward', 'division', 'region']
-        
-        for col in df.columns:
-            if any(name in col.lower() for name in possible_names):
-                constituency_col = col
-                break
-        
-        # Prepare constituency series
-        if constituency_col:
-            df['constituency_extracted'] = df[constituency_col].astype(str).str.strip()
-            # If empty, fill with 'Unknown'
-            df['constituency_extracted'] = df['constituency_extracted'].replace('', 'Unknown').fillna('Unknown')
-        else:
-            # Try to extract "Ward X" from address
-            def extract_ward(addr):
-                import re
-                if not isinstance(addr, str): return 'Unknown'
-                match = re.search(r'Ward\s*[-:.]?\s*(\d+)', addr, re.IGNORECASE)
-                if match:
-                    return f"Ward {match.group(1)}"
-                return "General Division" # Default fallback
-            
-            df['constituency_extracted'] = df['address'].apply(extract_ward)
-
-        # Explicitly reorder columns to ensure consistent hashing
-        # We process row hash WITHOUT constituency to maintain compatibility if constituency changes but voter details don't
-        # OR we can include it. Let's include it to be precise - if you move constituency, that's a change or re-registration.
-        # However, to check for duplicates purely by identity, maybe not?
-        # Let's include it in hash for data integrity.
-        
-        df = df[REQUIRED_COLUMNS + ['constituency_extracted']]
-        
-        upload_id = str(uuid.uuid4())
-        
-        # Calculate row hashes
-        df['row_hash'] = df.apply(lambda row: calculate_row_hash({
-            'voter_id': row['voter_id'],
-            'name': row['name'],
-            'age': row['age'],
-            'address': row['address'],
-            'registration_date': row['registration_date'],
-            'constituency': row['constituency_extracted']
-        }), axis=1)
-        
-        dataset_hash = calculate_dataset_hash(df[REQUIRED_COLUMNS]) # Keep dataset hash on core columns for now or include all? Let's keep core.
-        
-        electoral_roll = ElectoralRoll(
-            upload_id=upload_id,
-            filename=file.filename,
-            state=state,
-            row_count=len(df),
-            data_hash=dataset_hash
-        )
-        db.session.add(electoral_roll)
-        
-        # Edge Case 11: Handle large files with batch processing
-        batch_size = 1000
-        total_batches = (len(df) + batch_size - 1) // batch_size
-        
-        voter_records_all = []
-        for i in range(0, len(df), batch_size):
-            batch = df.iloc[i:i+batch_size]
-            for _, row in batch.iterrows():
-                try:
-                    voter_records_all.append(
-                        VoterRecord(
-                            upload_id=upload_id,
-                            voter_id=str(row['voter_id']),
-                            name=str(row['name']),
-                            age=int(row['age']),
-                            address=str(row['address']),
-                            registration_date=str(row['registration_date']),
-                            constituency=str(row['constituency_extracted']),
-                            row_hash=row['row_hash']
-                        )
-                    )
-                except Exception as row_error:
-                    return {
-                        'error': f'Error processing row: {str(row_error)}',
-                        'filename': file.filename,
-                        'row_index': i + len(voter_records_all)
-                    }
-        
-        db.session.bulk_save_objects(voter_records_all)
-        
-        # Create success notification
-        success_notification = Notification(
-            title='Electoral Roll Uploaded',
-            message=f'Successfully uploaded "{file.filename}" for state "{state}". {len(df)} records processed.',
-            severity='success',
-            related_entity=f'Upload-{upload_id[:8]}',
-            action_url='/dashboard',
-            action_type='navigate'
-        )
-        db.session.add(success_notification)
-        
-        db.session.commit()
-        
-        return {
-            'upload_id': upload_id,
-            'filename': file.filename,
-            'row_count': len(df),
-            'status': 'success',
-            'encoding': encoding_used
-        }
+        if upload_format == 'delta':
+            return ingest_delta_frame(df, file.filename, state, base_upload_id, encoding_used, on_invalid)
+        return ingest_roll_frame(df, file.filename, state, storage_mode, encoding_used, on_invalid, base_upload_id)
 
     except pd.errors.EmptyDataError:
         db.session.rollback()
@@ -268,11 +137,438 @@ def process_single_file(file):
         traceback.print_exc()
         return {'error': f'Upload failed: {str(e)}', 'filename': file.filename}
 
+
+def revision_base(base_upload_id, state, filename):
+    """(base roll or None, error dict or None) for an optional base_upload_id"""
+    if not base_upload_id:
+        return None, None
+    base_roll = ElectoralRoll.query.filter_by(upload_id=base_upload_id).first()
+    if base_roll is None:
+        return None, {'error': 'Base upload not found', 'filename': filename, 'base_upload_id': base_upload_id}
+    if base_roll.state != state:
+        return None, {'error': f'Base upload belongs to state "{base_roll.state}"', 'filename': filename}
+    return base_roll, None
+
+
+def prepare_roll_frame(df, filename, on_invalid='reject'):
+    """
+    Clean, validate and hash roll rows given as a DataFrame with REQUIRED_COLUMNS.
+    Returns (prepared, None) or (None, error dict); prepared holds roll_df (ROLL_COLUMNS
+    plus address columns), quarantined rows, row_errors and the fingerprint of roll_df.
+    """
+    # Edge Case 6: Empty DataFrame (only headers or completely empty)
+    if df.empty:
+        return None, {'error': 'CSV file is empty or contains no data rows', 'filename': filename}
+    
+    # Edge Case 7: Missing required columns
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing_columns:
+        return None, {
+            'error': f'Missing required columns: {", ".join(missing_columns)}',
+            'filename': filename,
+            'required_columns': REQUIRED_COLUMNS,
+            'found_columns': list(df.columns)
+        }
+    
+    # Edge Case 8: Check for completely empty rows
+    df = df.dropna(how='all')  # Remove rows where all values are NaN
+    if df.empty:
+        return None, {'error': 'CSV file contains no valid data rows', 'filename': filename}
+
+    # Clean data: strip whitespace from string columns BEFORE validation
+    # Convert to string and handle NaN values properly
+    for col in ['voter_id', 'name', 'address', 'registration_date']:
+        # Replace NaN with empty string first, then convert to string
+        df[col] = df[col].fillna('').astype(str).str.strip()
+        # Remove 'nan' strings that might have been created
+        df[col] = df[col].replace('nan', '')
+    
+    # Edge Case 9/10: Validate data types and duplicate voter_ids - every rule in one pass
+    df['age'] = pd.to_numeric(df['age'], errors='coerce')
+    error_mask, row_errors = validate_roll_frame(df)
+    duplicates = row_errors.get('duplicate_voter_id')
+    
+    if on_invalid == 'reject':
+        field_errors = {rule: hit for rule, hit in row_errors.items() if rule != 'duplicate_voter_id'}
+        if field_errors:
+            return None, {
+                'error': 'Data validation failed',
+                'filename': filename,
+                'details': rejection_details(field_errors),
+                'row_count': len(df),
+                'row_errors': row_errors
+            }
+        if duplicates:
+            duplicate_voter_ids = df[(error_mask & RULE_BITS['duplicate_voter_id']) != 0]
+            return None, {
+                'error': f'Duplicate voter_id found in file',
+                'filename': filename,
+                'details': f'{duplicates["count"]} rows have duplicate voter_id values',
+                'duplicate_ids': duplicate_voter_ids['voter_id'].unique().tolist()[:10],
+                'row_errors': row_errors
+            }
+    
+    # Quarantine mode: flagged rows are kept aside and the rest is loaded
+    invalid = error_mask != 0
+    quarantined = df[invalid].assign(error_mask=error_mask[invalid])
+    df = df[~invalid].copy()
+    if df.empty:
+        return None, {
+            'error': 'No valid rows to load',
+            'filename': filename,
+            'row_count': len(quarantined),
+            'row_errors': row_errors
+        }
+    
+    # Convert age to int (already validated)
+    df['age'] = df['age'].astype(int)
+    
+    # Canonical address parts are parsed once here and stored with the roll
+    address_parts = canonicalize_addresses(df['address'].to_numpy())
+    address_parts.index = df.index
+    
+    # Helper to find constituency info
+    # Check for constituency in columns (case insensitive) -> if not found check address
+    constituency_col = None
+    possible_names = ['constituency', 'pc_name', 'ac_name', 'assembly', 'parliamentary', 'ward', 'division', 'region']
+    
+    for col in df.columns:
+        if any(name in col.lower() for name in possible_names):
+            constituency_col = col
+            break
+    
+    # Prepare constituency series
+    if constituency_col:
+        df['constituency_extracted'] = df[constituency_col].astype(str).str.strip()
+        # If empty, fill with 'Unknown'
+        df['constituency_extracted'] = df['constituency_extracted'].replace('', 'Unknown').fillna('Unknown')
+    else:
+        # Fall back to the "Ward X" parsed from the address
+        df['constituency_extracted'] = address_parts['ward'].fillna('General Division')
+
+    # Explicitly reorder columns to ensure consistent hashing
+    # We process row hash WITHOUT constituency to maintain compatibility if constituency changes but voter details don't
+    # OR we can include it. Let's include it to be precise - if you move constituency, that's a change or re-registration.
+    # However, to check for duplicates purely by identity, maybe not?
+    # Let's include it in hash for data integrity.
+    
+    df = df[REQUIRED_COLUMNS + ['constituency_extracted']]
+    
+    # Row hashes and the dataset fingerprint are built in one chunked pass
+    fingerprint = DatasetFingerprint()
+    df['row_hash'] = calculate_row_hashes(df.rename(columns={'constituency_extracted': 'constituency'}), fingerprint)
+    
+    roll_df = df.rename(columns={'constituency_extracted': 'constituency'}).join(address_parts[ADDRESS_COLUMNS])
+    return {
+        'roll_df': roll_df,
+        'quarantined': quarantined,
+        'row_errors': row_errors,
+        'fingerprint': fingerprint
+    }, None
+
+
+def ingest_roll_frame(df, filename, state, storage_mode, encoding_used=None, on_invalid='reject', base_upload_id=None):
+    """
+    Validate, hash and store one roll given as a DataFrame with REQUIRED_COLUMNS.
+    Shared by CSV uploads and PDF ingest jobs. Returns dict with result or error.
+    on_invalid='quarantine' stores rows that fail validation aside instead of rejecting the file.
+    base_upload_id makes the roll a revision of that upload: diffed against it at ingest
+    and, in delta mode, stored as the rows that changed.
+    """
+    base_roll, error = revision_base(base_upload_id, state, filename)
+    if error:
+        return error
+    
+    prepared, error = prepare_roll_frame(df, filename, on_invalid)
+    if error:
+        return error
+    roll_df, quarantined = prepared['roll_df'], prepared['quarantined']
+    row_errors = prepared['row_errors']
+    dataset_hash = prepared['fingerprint'].data_hash()
+    upload_id = str(uuid.uuid4())
+    
+    rows_to_store, deleted_ids = roll_df, []
+    # A revision of an explicit base, or in delta mode the state's latest roll
+    base_roll = base_roll or (pick_delta_base(state) if storage_mode == 'delta' else None)
+    base_frame = load_roll_frame(base_roll.upload_id) if base_roll is not None else None
+    delta_base = base_roll if storage_mode == 'delta' and base_roll is not None and can_be_delta_base(base_roll) else None
+    if delta_base is not None:
+        rows_to_store, deleted_ids = build_delta(base_frame, roll_df)
+    else:
+        storage_mode = 'full'
+    
+    electoral_roll = ElectoralRoll(
+        upload_id=upload_id,
+        filename=filename,
+        state=state,
+        row_count=len(roll_df),
+        data_hash=dataset_hash,
+        storage_mode=storage_mode,
+        base_upload_id=delta_base.upload_id if delta_base is not None else None
+    )
+    db.session.add(electoral_roll)
+    
+    # Edge Case 11: Large files - insert as plain mappings instead of one ORM object per row
+    save_roll_rows(upload_id, rows_to_store, deleted_ids)
+    if not quarantined.empty:
+        save_quarantined_rows(upload_id, quarantined)
+    # Fingerprint tree of the full view, so compares can skip identical buckets
+    save_roll_tree(upload_id, roll_df)
+    
+    # This roll becomes the state's active roll in the cross-roll identity index
+    update_identity_index(state, upload_id, roll_df)
+    
+    # Create success notification
+    success_notification = Notification(
+        title='Electoral Roll Uploaded',
+        message=f'Successfully uploaded "{filename}" for state "{state}". {len(roll_df)} records processed.'
+                + (f' {len(quarantined)} invalid rows quarantined.' if len(quarantined) else ''),
+        severity='success',
+        related_entity=f'Upload-{upload_id[:8]}',
+        action_url='/dashboard',
+        action_type='navigate'
+    )
+    db.session.add(success_notification)
+    
+    db.session.commit()
+    
+    if snapshots_enabled():
+        try:
+            export_snapshot(upload_id, roll_df)
+        except Exception as e:
+            # The roll is stored; the snapshot is re-exported lazily on first compare
+            print(f"Snapshot export failed for {upload_id}: {e}")
+    
+    # Both views are in memory already, so the diff against the base is nearly free
+    diff = None
+    if base_frame is not None:
+        try:
+            seeded = seed_diff(base_roll.upload_id, upload_id, base_frame, roll_df)
+            diff = {'base_upload_id': base_roll.upload_id, 'stats': seeded['result']['stats']}
+        except Exception as e:
+            print(f"Diff seeding failed for {upload_id}: {e}")
+    
+    return {
+        'upload_id': upload_id,
+        'filename': filename,
+        'row_count': len(roll_df),
+        'status': 'success',
+        'encoding': encoding_used,
+        'storage_mode': storage_mode,
+        'base_upload_id': electoral_roll.base_upload_id,
+        'stored_rows': len(rows_to_store),
+        'quarantined_rows': len(quarantined),
+        'row_errors': row_errors,
+        'diff': diff
+    }
+
+
+def ingest_delta_frame(df, filename, state, base_upload_id, encoding_used=None, on_invalid='reject'):
+    """
+    Apply a delta file (rows with a change column: add / modify / delete) to an
+    existing upload and store the result as a new revision. Only the delta rows
+    and the base rows they touch are read; the base roll is never reconstructed.
+    """
+    base_roll, error = revision_base(base_upload_id, state, filename)
+    if error:
+        return error
+    if base_roll is None:
+        return {'error': 'Delta files need a base_upload_id', 'filename': filename}
+    
+    if df.empty:
+        return {'error': 'CSV file is empty or contains no data rows', 'filename': filename}
+    missing_columns = [col for col in DELTA_REQUIRED_COLUMNS if col not in df.columns]
+    if missing_columns:
+        return {
+            'error': f'Missing required columns: {", ".join(missing_columns)}',
+            'filename': filename,
+            'required_columns': DELTA_REQUIRED_COLUMNS,
+            'found_columns': list(df.columns)
+        }
+    df = df.dropna(how='all')
+    
+    changes = df['change'].fillna('').astype(str).str.lower().str.replace(r'[^a-z0-9]', '', regex=True).map(DELTA_CHANGES)
+    if changes.isna().any():
+        return {
+            'error': 'Invalid change values',
+            'filename': filename,
+            'details': f'change must be one of: {", ".join(sorted(set(DELTA_CHANGES.values())))} (Form 6 / 7 / 8 are accepted)',
+            'rows': row_numbers(df.index[changes.isna().to_numpy()][:10])
+        }
+    df = df.assign(voter_id=df['voter_id'].fillna('').astype(str).str.strip())
+    deleted_ids = df.loc[changes == 'delete', 'voter_id'].tolist()
+    
+    # Added and modified rows go through the same cleaning, validation and hashing as a full roll
+    changed = pd.DataFrame(columns=STORED_COLUMNS)
+    quarantined, row_errors = pd.DataFrame(), {}
+    upserts = df[changes != 'delete'].drop(columns=['change'])
+    if not upserts.empty:
+        prepared, error = prepare_roll_frame(upserts, filename, on_invalid)
+        if error:
+            return error
+        changed = prepared['roll_df']
+        quarantined, row_errors = prepared['quarantined'], prepared['row_errors']
+    added_ids = set(changed.loc[(changes.loc[changed.index] == 'add').to_numpy(), 'voter_id'])
+    modified_ids = set(changed['voter_id']) - added_ids
+    
+    # Check the delta against the base rows it touches
+    touched = lookup_voters(base_roll.upload_id, sorted(set(deleted_ids) | set(changed['voter_id'])))
+    present = set(touched['voter_id'])
+    conflicts = {
+        'add_existing': added_ids & present,
+        'modify_missing': modified_ids - present,
+        'delete_missing': set(deleted_ids) - present,
+        'repeated': set(pd.Series(deleted_ids)[pd.Series(deleted_ids).duplicated()]) | (set(deleted_ids) & set(changed['voter_id'])),
+    }
+    conflicts = {name: sorted(ids) for name, ids in conflicts.items() if ids}
+    if conflicts:
+        return {
+            'error': 'Delta does not apply to base upload',
+            'filename': filename,
+            'base_upload_id': base_roll.upload_id,
+            'details': [f'{len(ids)} voters: {DELTA_CONFLICTS[name]}' for name, ids in conflicts.items()],
+            'voter_ids': {name: ids[:10] for name, ids in conflicts.items()}
+        }
+    
+    upload_id = str(uuid.uuid4())
+    row_count = base_roll.row_count + len(added_ids) - len(deleted_ids)
+    
+    # Fingerprints add up: base minus the touched rows plus the new ones
+    base_tree = load_roll_tree(base_roll.upload_id)
+    fingerprint = tree_fingerprint(base_tree) if base_tree else roll_fingerprint(base_roll.upload_id)
+    fingerprint.remove(touched['row_hash'].tolist()).update(changed['row_hash'].tolist())
+    
+    view = None
+    storage_mode = 'delta' if can_be_delta_base(base_roll) else 'full'
+    electoral_roll = ElectoralRoll(
+        upload_id=upload_id,
+        filename=filename,
+        state=state,
+        row_count=row_count,
+        data_hash=fingerprint.data_hash(),
+        storage_mode=storage_mode,
+        base_upload_id=base_roll.upload_id if storage_mode == 'delta' else None
+    )
+    db.session.add(electoral_roll)
+    
+    if storage_mode == 'delta':
+        save_roll_rows(upload_id, changed, deleted_ids)
+    else:
+        # The base chain is at its limit, so this revision is materialized in full
+        view = apply_delta(load_roll_frame(base_roll.upload_id), changed, deleted_ids)
+        save_roll_rows(upload_id, view)
+    if not quarantined.empty:
+        save_quarantined_rows(upload_id, quarantined)
+    if base_tree:
+        save_tree_nodes(upload_id, apply_tree_delta(base_tree, touched, changed))
+    elif view is not None:
+        save_roll_tree(upload_id, view)
+    
+    if not apply_identity_delta(state, base_roll.upload_id, upload_id, changed, deleted_ids):
+        update_identity_index(state, upload_id, view if view is not None else load_roll_frame(upload_id))
+    
+    db.session.add(Notification(
+        title='Electoral Roll Delta Applied',
+        message=f'Applied "{filename}" to upload {base_roll.upload_id[:8]} for state "{state}": '
+                f'{len(added_ids)} added, {len(modified_ids)} modified, {len(deleted_ids)} deleted.'
+                + (f' {len(quarantined)} invalid rows quarantined.' if len(quarantined) else ''),
+        severity='success',
+        related_entity=f'Upload-{upload_id[:8]}',
+        action_url='/dashboard',
+        action_type='navigate'
+    ))
+    db.session.commit()
+    
+    diff = None
+    try:
+        seeded = seed_diff(base_roll.upload_id, upload_id, touched, changed, base_roll.row_count, row_count)
+        diff = {'base_upload_id': base_roll.upload_id, 'stats': seeded['result']['stats']}
+    except Exception as e:
+        print(f"Diff seeding failed for {upload_id}: {e}")
+    
+    return {
+        'upload_id': upload_id,
+        'filename': filename,
+        'row_count': row_count,
+        'status': 'success',
+        'encoding': encoding_used,
+        'storage_mode': storage_mode,
+        'base_upload_id': electoral_roll.base_upload_id,
+        'stored_rows': len(changed) if view is None else len(view),
+        'quarantined_rows': len(quarantined),
+        'row_errors': row_errors,
+        'delta': {'added': len(added_ids), 'modified': len(modified_ids), 'deleted': len(deleted_ids)},
+        'diff': diff
+    }
+
+
+def start_pdf_ingest(file, state, storage_mode, on_invalid='reject', base_upload_id=None):
+    """Save an uploaded PDF and queue the job that parses and ingests it"""
+    fd, pdf_path = tempfile.mkstemp(suffix='.pdf', prefix='roll-')
+    os.close(fd)
+    file.save(pdf_path)
+    
+    job_id = create_job('pdf_ingest', filename=file.filename, state=state)
+    run_in_background(current_app._get_current_object(), job_id, _ingest_pdf_job, pdf_path, file.filename, state, storage_mode, on_invalid, base_upload_id)
+    return {
+        'job_id': job_id,
+        'filename': file.filename,
+        'status': 'queued',
+        'status_url': f'/api/jobs/{job_id}'
+    }
+
+
+def _ingest_pdf_job(job_id, pdf_path, filename, state, storage_mode, on_invalid='reject', base_upload_id=None):
+    """
+    Background job: parse the PDF page-parallel into one frame, then ingest it like a CSV.
+    Progress reports stage 'parsing' every PDF_PROGRESS_PAGES pages or PDF_PROGRESS_SECONDS,
+    then 'ingesting' while the roll is validated and stored.
+    """
+    published = {'pages': 0, 'at': float('-inf')}
+    
+    def on_page(report):
+        now = time.monotonic()
+        if (report.pages_done < report.total_pages and report.pages_done - published['pages'] < PDF_PROGRESS_PAGES
+                and now - published['at'] < PDF_PROGRESS_SECONDS):
+            return
+        published.update(pages=report.pages_done, at=now)
+        update_job(job_id, progress={**report.to_dict(), 'stage': 'parsing'})
+    
+    report = ExtractionReport()
+    try:
+        df = read_pdf_frame(pdf_path, report=report, progress=on_page,
+                            cache_dir=os.getenv('PDF_PAGE_CACHE_DIR') or None)
+        if df.empty:
+            return {'error': 'No voter data could be extracted from PDF', 'filename': filename, 'extraction': report.to_dict()}
+        
+        update_job(job_id, progress={**report.to_dict(), 'stage': 'ingesting'})
+        try:
+            result = ingest_roll_frame(df, filename, state, storage_mode, on_invalid=on_invalid, base_upload_id=base_upload_id)
+        except Exception as e:
+            db.session.rollback()
+            traceback.print_exc()
+            result = {'error': f'Upload failed: {str(e)}', 'filename': filename}
+        result['extraction'] = report.to_dict()
+        return result
+    finally:
+        os.remove(pdf_path)
+
+
+@upload_bp.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """Status, page-level progress and result of a background upload job"""
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job), 200
+
+
 @upload_bp.route('/api/upload', methods=['POST'])
 def upload_electoral_roll():
     """
     Upload Electoral Roll CSV File(s)
     Handles single or multiple file uploads.
+    PDF files are accepted too; they are ingested by a background job (202 + job_id).
     """
     if 'file' not in request.files:
         return jsonify({'error': 'No file provided'}), 400
@@ -306,6 +602,8 @@ def upload_electoral_roll():
     if len(results) == 1:
         if 'error' in results[0]:
             return jsonify(results[0]), 400
+        if 'job_id' in results[0]:
+            return jsonify(results[0]), 202
         return jsonify(results[0]), 201
 
     return jsonify({
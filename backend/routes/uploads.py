@@ -1,14 +1,17 @@
 """Uploads Route - Retrieve list of uploaded electoral rolls"""
-from flask import Blueprint, jsonify
+from flask import Blueprint, request, jsonify
 import sys
 import os
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from models import ElectoralRoll
+from models import ElectoralRoll, QuarantinedRow
+from fingerprint import verify_roll
+from response_cache import cached_response
 
 uploads_bp = Blueprint('uploads', __name__)
 
 @uploads_bp.route('/api/uploads', methods=['GET'])
+@cached_response('uploads')
 def get_uploads():
     try:
         uploads = ElectoralRoll.query.order_by(ElectoralRoll.uploaded_at.desc()).all()
@@ -16,3 +19,34 @@ def get_uploads():
         return jsonify(result), 200
     except Exception as e:
         return jsonify({'error': f'Failed to fetch uploads: {str(e)}'}), 500
+
+
+@uploads_bp.route('/api/uploads/<upload_id>/verify', methods=['GET'])
+def verify_upload(upload_id):
+    """Recompute a roll's fingerprint from its stored row hashes and compare it with data_hash"""
+    try:
+        roll = ElectoralRoll.query.filter_by(upload_id=upload_id).first()
+        if roll is None:
+            return jsonify({'error': 'Upload not found'}), 404
+        return jsonify(verify_roll(roll)), 200
+    except Exception as e:
+        return jsonify({'error': f'Failed to verify upload: {str(e)}'}), 500
+
+
+@uploads_bp.route('/api/uploads/<upload_id>/quarantine', methods=['GET'])
+def get_quarantined_rows(upload_id):
+    """Rows set aside by a quarantine-mode upload, with the rules each one failed"""
+    try:
+        if ElectoralRoll.query.filter_by(upload_id=upload_id).first() is None:
+            return jsonify({'error': 'Upload not found'}), 404
+        limit = min(request.args.get('limit', 100, type=int), 1000)
+        offset = request.args.get('offset', 0, type=int)
+        query = QuarantinedRow.query.filter_by(upload_id=upload_id)
+        rows = query.order_by(QuarantinedRow.row_number).offset(offset).limit(limit).all()
+        return jsonify({
+            'upload_id': upload_id,
+            'total': query.count(),
+            'rows': [row.to_dict() for row in rows]
+        }), 200
+    except Exception as e:
+        return jsonify({'error': f'Failed to fetch quarantined rows: {str(e)}'}), 500
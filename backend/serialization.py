@@ -0,0 +1,125 @@
+"""
+Serialization - Fast JSON encoding, response compression and timings
+Owner: Vansh (Backend Developer)
+
+Every jsonify() goes through FastJSONProvider, which encodes with orjson when
+it is installed and with the stdlib encoder otherwise; both accept numpy
+scalars and arrays, so analysis results need no manual conversion. Responses
+of at least COMPRESS_MIN_SIZE bytes are gzip- or deflate-encoded when the
+client accepts it.
+
+Each response carries a Server-Timing header that splits the request into
+compute (the view itself), serialize and compress, e.g.
+
+    Server-Timing: compute;dur=812.4, serialize;dur=95.1, compress;dur=20.7
+"""
+
+import os
+import json
+import time
+import gzip
+import zlib
+import numpy as np
+from flask import g, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', 6))
+COMPRESS_ENCODINGS = ('gzip', 'deflate')
+COMPRESSIBLE_TYPES = ('application/json', 'text/')
+
+
+def _default(obj):
+    """Types neither encoder handles natively; dates and the rest as Flask does"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    return DefaultJSONProvider.default(obj)
+
+
+def dumps_bytes(obj, sort_keys=True, indent=None):
+    """UTF-8 JSON for obj, with orjson when available"""
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=_default, option=option)
+        except orjson.JSONEncodeError:
+            # e.g. integers wider than 64 bits; the stdlib encoder takes them
+            pass
+    separators = None if indent else (',', ':')
+    return json.dumps(obj, default=_default, sort_keys=sort_keys, indent=indent,
+                      separators=separators, ensure_ascii=False).encode('utf-8')
+
+
+def _record(stage, seconds):
+    g.setdefault('timings', {})
+    g.timings[stage] = g.timings.get(stage, 0.0) + seconds
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by dumps_bytes"""
+
+    def dumps(self, obj, **kwargs):
+        return dumps_bytes(obj, sort_keys=kwargs.get('sort_keys', self.sort_keys),
+                           indent=kwargs.get('indent')).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if self.compact is False or (self.compact is None and self._app.debug) else None
+        start = time.perf_counter()
+        body = dumps_bytes(obj, sort_keys=self.sort_keys, indent=indent)
+        _record('serialize', time.perf_counter() - start)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+def compress(data, encoding):
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=COMPRESS_LEVEL)
+    return zlib.compress(data, COMPRESS_LEVEL)
+
+
+def _start_timer():
+    g.request_started = time.perf_counter()
+
+
+def _finish_response(response):
+    """Compress the body when worthwhile and add the Server-Timing header"""
+    timings = g.get('timings', {})
+    if (not response.is_streamed and not response.direct_passthrough
+            and response.status_code == 200 and 'Content-Encoding' not in response.headers
+            and response.mimetype.startswith(COMPRESSIBLE_TYPES)):
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(COMPRESS_ENCODINGS)
+        if encoding and response.content_length >= COMPRESS_MIN_SIZE:
+            start = time.perf_counter()
+            response.set_data(compress(response.get_data(), encoding))
+            response.headers['Content-Encoding'] = encoding
+            timings['compress'] = time.perf_counter() - start
+
+    started = g.get('request_started')
+    if started is not None:
+        elapsed = time.perf_counter() - started - timings.get('compress', 0.0)
+        timings = {'compute': max(0.0, elapsed - timings.get('serialize', 0.0)), **timings}
+    if timings:
+        response.headers['Server-Timing'] = ', '.join(
+            f'{stage};dur={seconds * 1000:.1f}' for stage, seconds in timings.items())
+    return response
+
+
+def init_serialization(app):
+    """Install the JSON provider and the compression / timing hooks"""
+    app.json_provider_class = FastJSONProvider
+    app.json = FastJSONProvider(app)
+    app.before_request(_start_timer)
+    app.after_request(_finish_response)
@@ -0,0 +1,167 @@
+"""
+Snapshot Store - Memory-mapped binary columnar snapshots of electoral rolls
+Owner: Vansh (Backend Developer)
+
+Each roll is exported once to a directory of .npy files, sorted by voter_id:
+
+    voter_id.npy           fixed-width unicode, sorted
+    row_hash.npy           (n, 2) uint64 - the 16-byte MD5 row hash
+    age.npy                uint8
+    registration_days.npy  int32 days since 1970-01-01
+    name.npy, address.npy, constituency.npy   fixed-width unicode
+    address_normalized.npy, ward.npy, house_number.npy, street.npy
+                           canonical address parts (utils.address)
+
+Readers open the arrays with mmap_mode='r', so diffing two snapshots needs no
+database round-trip and no Python object per row. Enabled by pointing
+ROLL_SNAPSHOT_DIR at a writable directory.
+"""
+
+import os
+import json
+import shutil
+import uuid
+import numpy as np
+import pandas as pd
+from models import ElectoralRoll
+from roll_store import ROLL_COLUMNS, load_roll_frame, load_roll_records, with_address_columns
+from utils.address import ADDRESS_COLUMNS
+
+SNAPSHOT_VERSION = 2
+SNAPSHOT_COLUMNS = ['voter_id', 'row_hash', 'age', 'registration_days', 'name', 'address', 'constituency'] + ADDRESS_COLUMNS
+MISSING_DAY = np.iinfo(np.int32).min
+
+
+def snapshot_dir():
+    return os.getenv('ROLL_SNAPSHOT_DIR', '')
+
+
+def snapshots_enabled():
+    return bool(snapshot_dir())
+
+
+def snapshot_path(upload_id):
+    return os.path.join(snapshot_dir(), upload_id)
+
+
+def roll_columns(frame, fixed_width=True):
+    """
+    Columnar, voter_id-sorted form of a roll view - the layout of a snapshot and
+    the input of the diff core. With fixed_width=False the free-text columns stay
+    object arrays, which is cheaper for an in-memory diff than fixed-width unicode.
+    """
+    if not frame['voter_id'].is_monotonic_increasing:
+        frame = frame.sort_values('voter_id', kind='stable')
+    frame = with_address_columns(frame)
+
+    dates = pd.to_datetime(frame['registration_date'], format='%Y-%m-%d', errors='coerce')
+    days = dates.to_numpy(dtype='datetime64[D]').astype(np.int64)
+    days[dates.isna().to_numpy()] = MISSING_DAY
+
+    text_dtype = str if fixed_width else object
+    hashes = ''.join(frame['row_hash'].astype(str))
+    return {
+        'voter_id': frame['voter_id'].to_numpy(dtype=str),
+        'row_hash': np.frombuffer(bytes.fromhex(hashes), dtype='<u8').reshape(-1, 2),
+        'age': frame['age'].to_numpy(dtype=np.int64).clip(0, 255).astype(np.uint8),
+        'registration_days': days.astype(np.int32),
+        'name': frame['name'].to_numpy(dtype=text_dtype),
+        'address': frame['address'].to_numpy(dtype=text_dtype),
+        'constituency': frame['constituency'].fillna('Unknown').to_numpy(dtype=text_dtype),
+        'address_normalized': frame['address_normalized'].fillna('').to_numpy(dtype=text_dtype),
+        'ward': frame['ward'].fillna('Unknown').to_numpy(dtype=text_dtype),
+        'house_number': frame['house_number'].fillna('').to_numpy(dtype=text_dtype),
+        'street': frame['street'].fillna('').to_numpy(dtype=text_dtype),
+    }
+
+
+def export_snapshot(upload_id, frame=None):
+    """
+    Write the snapshot for a roll (from frame, or from the roll store).
+    Files are written to a temp directory and renamed into place, so readers
+    never see a half-written snapshot.
+    """
+    if frame is None:
+        frame = load_roll_frame(upload_id)
+    columns = roll_columns(frame)
+
+    final_path = snapshot_path(upload_id)
+    if os.path.isdir(final_path) and load_snapshot(upload_id) is None:
+        # Written by an older SNAPSHOT_VERSION
+        shutil.rmtree(final_path, ignore_errors=True)
+    tmp_path = f"{final_path}.tmp-{uuid.uuid4().hex[:8]}"
+    os.makedirs(tmp_path)
+    for name, values in columns.items():
+        np.save(os.path.join(tmp_path, f'{name}.npy'), values)
+    with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+        json.dump({'version': SNAPSHOT_VERSION, 'upload_id': upload_id, 'row_count': len(frame)}, f)
+
+    try:
+        os.rename(tmp_path, final_path)
+    except OSError:
+        # Another worker exported the same roll first
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    return final_path
+
+
+def load_snapshot(upload_id):
+    """Memory-map a roll snapshot; returns a dict of arrays or None"""
+    path = snapshot_path(upload_id)
+    try:
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('version') != SNAPSHOT_VERSION:
+        return None
+    return {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r') for name in SNAPSHOT_COLUMNS}
+
+
+def ensure_snapshot(upload_id):
+    """Load a snapshot, exporting it from the roll store the first time (None for unknown rolls)"""
+    snapshot = load_snapshot(upload_id)
+    if snapshot is None:
+        if ElectoralRoll.query.filter_by(upload_id=upload_id).first() is None:
+            return None
+        export_snapshot(upload_id)
+        snapshot = load_snapshot(upload_id)
+    return snapshot
+
+
+def columns_frame(columns, index=slice(None)):
+    """Decode selected rows of a snapshot (or roll_columns output) into a DataFrame with ROLL_COLUMNS"""
+    days = np.asarray(columns['registration_days'][index])
+    dates = np.datetime_as_string(days.astype('datetime64[D]'), unit='D')
+    dates[days == MISSING_DAY] = ''
+    hashes = np.ascontiguousarray(columns['row_hash'][index])
+    hex_hashes = hashes.view(np.uint8).reshape(-1, 16)
+    return pd.DataFrame({
+        'voter_id': np.asarray(columns['voter_id'][index]),
+        'name': np.asarray(columns['name'][index]),
+        'age': np.asarray(columns['age'][index]).astype(int),
+        'address': np.asarray(columns['address'][index]),
+        'constituency': np.asarray(columns['constituency'][index]),
+        'registration_date': dates,
+        'row_hash': [row.tobytes().hex() for row in hex_hashes]
+    }, columns=ROLL_COLUMNS)
+
+
+def load_roll_columns(upload_id):
+    """Sorted columnar view of a roll: the memory-mapped snapshot when enabled, else built from the roll store"""
+    if snapshots_enabled():
+        snapshot = ensure_snapshot(upload_id)
+        if snapshot is not None:
+            return snapshot
+    return roll_columns(load_roll_frame(upload_id), fixed_width=False)
+
+
+def load_voter_records(upload_id, constituency=None):
+    """Voter dicts for the forensic engines, read from the snapshot when one exists"""
+    snapshot = load_snapshot(upload_id) if snapshots_enabled() else None
+    if snapshot is None:
+        return load_roll_records(upload_id, constituency)
+    index = np.flatnonzero(snapshot['constituency'] == constituency) if constituency else slice(None)
+    frame = columns_frame(snapshot, index).drop(columns=['row_hash'])
+    for name in ADDRESS_COLUMNS:
+        frame[name] = np.asarray(snapshot[name][index])
+    return frame.to_dict('records')
@@ -269,3 +269,57 @@ if __name__ == '__main__':
     
     # Run tests
     pytest.main([__file__, '-v', '-s'])
+
+
+INVALID_ROWS_CSV = """voter_id,name,age,address,registration_date
+V000001,Raj Sharma,25,"12 MG Road",2020-01-15
+V000002,Priya Patel,abc,"45 Gandhi Nagar",2019-03-20
+V000003,,28,"78 Park Street",15/05/2021
+V000004,Anjali Singh,35,"32 Main Road",2018-07-25
+V000004,Anjali S,35,"32 Main Road",2018-07-25"""
+
+
+def test_validation_reports_rows_per_rule():
+    """All rules are evaluated in one pass; each reports its count and row numbers"""
+    from utils.validation import validate_roll_frame, rule_names, RULE_BITS
+
+    df = pd.read_csv(StringIO(INVALID_ROWS_CSV), dtype={'age': object})
+    df['name'] = df['name'].fillna('')
+    df['age'] = pd.to_numeric(df['age'], errors='coerce')
+    mask, report = validate_roll_frame(df)
+
+    assert report['invalid_age'] == {'count': 1, 'rows': [3]}
+    assert report['empty_name'] == {'count': 1, 'rows': [4]}
+    assert report['invalid_registration_date'] == {'count': 1, 'rows': [4]}
+    assert report['duplicate_voter_id'] == {'count': 2, 'rows': [5, 6]}
+    assert 'empty_address' not in report
+    assert mask[0] == 0
+    assert rule_names(mask[2]) == ['empty_name', 'invalid_registration_date']
+    assert mask[3] == RULE_BITS['duplicate_voter_id']
+
+
+def test_quarantine_loads_valid_rows(client):
+    """Reject mode fails the file with row numbers; quarantine mode loads the good rows"""
+    def post(**form):
+        data = {'file': (BytesIO(INVALID_ROWS_CSV.encode('utf-8')), 'roll.csv'), 'state': 'Delhi', **form}
+        return client.post('/api/upload', data=data, content_type='multipart/form-data')
+
+    rejected = post()
+    assert rejected.status_code == 400
+    body = rejected.get_json()
+    assert body['error'] == 'Data validation failed'
+    assert '1 rows have invalid age values' in body['details']
+    assert body['row_errors']['invalid_age']['rows'] == [3]
+
+    response = post(on_invalid='quarantine')
+    assert response.status_code == 201, response.get_json()
+    result = response.get_json()
+    assert (result['row_count'], result['quarantined_rows']) == (1, 4)
+
+    quarantine = client.get(f"/api/uploads/{result['upload_id']}/quarantine").get_json()
+    assert quarantine['total'] == 4
+    assert [r['row_number'] for r in quarantine['rows']] == [3, 4, 5, 6]
+    assert quarantine['rows'][0]['errors'] == ['invalid_age']
+    assert quarantine['rows'][1]['data']['voter_id'] == 'V000003'
+
+    assert post(on_invalid='skip').status_code == 400
@@ -0,0 +1,116 @@
+"""
+Test Database Initialization
+Owner: Vansh (Backend Developer)
+Tests that init_db upgrades a database created by an older schema in place
+"""
+
+import sqlite3
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from database import db, init_db
+
+# Tables as the first release created them
+BASELINE_SCHEMA = """
+CREATE TABLE electoral_rolls (
+    id INTEGER PRIMARY KEY,
+    upload_id VARCHAR(36) NOT NULL UNIQUE,
+    filename VARCHAR(255) NOT NULL,
+    row_count INTEGER NOT NULL,
+    uploaded_at DATETIME NOT NULL,
+    data_hash VARCHAR(64),
+    state VARCHAR(50) NOT NULL
+);
+CREATE TABLE voter_records (
+    id INTEGER PRIMARY KEY,
+    upload_id VARCHAR(36) NOT NULL REFERENCES electoral_rolls (upload_id),
+    voter_id VARCHAR(50) NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    age INTEGER NOT NULL,
+    address TEXT NOT NULL,
+    constituency VARCHAR(100),
+    registration_date VARCHAR(20) NOT NULL,
+    row_hash VARCHAR(64) NOT NULL
+);
+CREATE TABLE notifications (
+    id INTEGER PRIMARY KEY,
+    title VARCHAR(255) NOT NULL,
+    message TEXT NOT NULL,
+    severity VARCHAR(50),
+    related_entity VARCHAR(100),
+    timestamp DATETIME,
+    is_read BOOLEAN,
+    action_url VARCHAR(255),
+    action_type VARCHAR(50)
+);
+INSERT INTO electoral_rolls VALUES (1, 'old-roll', 'old.csv', 1, '2025-01-01 00:00:00', 'd41d8cd98f00b204e9800998ecf8427e', 'Delhi');
+INSERT INTO voter_records VALUES (1, 'old-roll', 'V000001', 'Rahul Sharma', 45, '12 MG Road, Ward 3', 'Unknown', '2020-01-15', 'aaaa');
+"""
+
+
+def test_init_db_adds_columns_to_existing_tables(tmp_path):
+    """Rolls stored before delta storage existed are read back as full rolls"""
+    path = tmp_path / 'electoral.db'
+    with sqlite3.connect(path) as connection:
+        connection.executescript(BASELINE_SCHEMA)
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    init_db(app)
+
+    with app.app_context():
+        from models import ElectoralRoll
+        roll = ElectoralRoll.query.filter_by(upload_id='old-roll').one()
+        assert (roll.storage_mode, roll.base_upload_id) == ('full', None)
+
+        # A second start finds nothing to add
+        from database import add_missing_columns
+        assert add_missing_columns() == []
+        db.session.remove()
+
+
+def test_voter_rows_from_before_address_parts_are_parsed_on_read(tmp_path):
+    """Old rows keep NULL address parts in the table; loaders parse them from address"""
+    path = tmp_path / 'electoral.db'
+    with sqlite3.connect(path) as connection:
+        connection.executescript(BASELINE_SCHEMA)
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    init_db(app)
+
+    with app.app_context():
+        from sqlalchemy import inspect
+        from models import VoterRecord
+        from roll_store import load_roll_frame
+        assert 'idx_upload_ward' in {i['name'] for i in inspect(db.engine).get_indexes('voter_records')}
+        assert VoterRecord.query.one().ward is None
+
+        frame = load_roll_frame('old-roll')
+        assert frame.loc[0, 'ward'] == 'Ward 3'
+        assert frame.loc[0, 'address_normalized']
+        db.session.remove()
+
+
+def test_one_failing_index_does_not_block_the_others(tmp_path, capsys):
+    """Each missing index is created on its own; failures are reported per index"""
+    path = tmp_path / 'electoral.db'
+    with sqlite3.connect(path) as connection:
+        connection.executescript(BASELINE_SCHEMA)
+        # SQLite index names are global, so this clash makes the first index of electoral_rolls fail
+        connection.execute('CREATE INDEX ix_electoral_rolls_base_upload_id ON voter_records (voter_id)')
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    init_db(app)
+
+    assert 'Database index warning: ix_electoral_rolls_base_upload_id' in capsys.readouterr().out
+    with app.app_context():
+        from sqlalchemy import inspect
+        names = {i['name'] for i in inspect(db.engine).get_indexes('notifications')}
+        assert {'idx_notification_time', 'idx_notification_read_time'} <= names
+        db.session.remove()
@@ -0,0 +1,100 @@
+"""
+Test Diff Engine Core
+Owner: Vansh (Backend Developer)
+Tests the sorted-merge diff over columnar rolls
+"""
+
+import os
+import sys
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from diff_engine import (
+    FIELD_BITS, calculate_row_hash, change_frame, count_changes, diff_columns, format_diff, merge_sorted_ids,
+    summarize_changes
+)
+from snapshot_store import roll_columns
+import numpy as np
+
+
+def _roll(rows):
+    frame = pd.DataFrame(rows, columns=['voter_id', 'name', 'age', 'address', 'constituency', 'registration_date'])
+    frame['row_hash'] = [calculate_row_hash(r) for r in frame.to_dict('records')]
+    return roll_columns(frame, fixed_width=False)
+
+
+OLD = [
+    ('V3', 'Amit Kumar', 28, '78 Park Street', 'Ward 4', '2021-05-10'),
+    ('V1', 'Raj Sharma', 25, '12 MG Road', 'Ward 3', '2020-01-15'),
+    ('V2', 'Priya Patel', 30, '45 Gandhi Nagar', 'Ward 3', '2019-03-20'),
+    ('V4', 'Anjali Singh', 35, '32 Main Road', 'Ward 4', '2018-07-25'),
+]
+NEW = [
+    ('V1', 'Raj Sharma', 25, '12 MG Road', 'Ward 3', '2020-01-15'),
+    ('V2', 'Priya Patel', 31, '9 Lake View', 'Ward 3', '2019-03-20'),
+    ('V3', 'Amit Kumar', 28, '78 Park Street', 'Ward 4', '2021-05-10'),
+    ('V5', 'Vikram Reddy', 22, '65 MG Road', 'Ward 5', '2022-09-30'),
+]
+
+
+def test_merge_sorted_ids():
+    """Merge returns matched index pairs and the unmatched sides"""
+    old_common, new_common, deleted, added = merge_sorted_ids(np.array(['A', 'B', 'D']), np.array(['B', 'C', 'D', 'E']))
+    assert old_common.tolist() == [1, 2]
+    assert new_common.tolist() == [0, 2]
+    assert deleted.tolist() == [0]
+    assert added.tolist() == [1, 3]
+
+
+def test_diff_classifies_by_voter_id():
+    """A changed voter is reported once as modified, not also as added and deleted"""
+    old, new = _roll(OLD), _roll(NEW)
+    result = format_diff(old, new, diff_columns(old, new))
+
+    assert [r['voter_id'] for r in result['added']] == ['V5']
+    assert [r['voter_id'] for r in result['deleted']] == ['V4']
+    assert [r['voter_id'] for r in result['modified']] == ['V2']
+    assert result['modified'][0]['changes'] == {
+        'age': {'old': 30, 'new': 31},
+        'address': {'old': '45 Gandhi Nagar', 'new': '9 Lake View'}
+    }
+    assert result['modified'][0]['change_mask'] == FIELD_BITS['age'] | FIELD_BITS['address']
+    assert result['stats']['field_changes']['address'] == 1
+    assert {k: v for k, v in result['stats'].items() if k != 'field_changes'} == {
+        'total_added': 1, 'total_deleted': 1, 'total_modified': 1,
+        'old_count': 4, 'new_count': 4, 'unchanged': 2
+    }
+
+
+def test_change_mask_aggregation():
+    """Field-level questions are answered from the change frame without touching records"""
+    old = _roll(OLD + [('V6', 'Meera Das', 40, '1 Hill Road', 'Ward 4', '2017-02-02')])
+    new = _roll(NEW + [('V6', 'Meera Das', 40, '2 Hill Road', 'Ward 4', '2017-02-02')])
+    changes = change_frame(old, new, diff_columns(old, new))
+
+    assert changes['change'].value_counts().to_dict() == {'added': 1, 'deleted': 1, 'modified': 2}
+    assert count_changes(changes, fields=['address']) == 2
+    assert count_changes(changes, fields=['address'], only=True) == 1
+    assert count_changes(changes, constituency='Ward 4', fields=['address'], only=True) == 1
+    assert count_changes(changes, constituency='Ward 3', fields=['address'], only=True) == 0
+
+
+def test_diff_handles_empty_rolls():
+    """Empty rolls on either side diff without special cases"""
+    empty, new = _roll([]), _roll(NEW)
+    result = format_diff(empty, new, diff_columns(empty, new))
+    assert result['stats']['total_added'] == 4
+    assert result['deleted'] == [] and result['modified'] == []
+
+
+def test_region_summary_groups_by_constituency():
+    """Changes are summarized per constituency in one grouped pass"""
+    old, new = _roll(OLD), _roll(NEW)
+    summary = summarize_changes(change_frame(old, new, diff_columns(old, new)))
+    assert summary == {
+        'Ward 3': {'added': 0, 'deleted': 0, 'modified': 1},
+        'Ward 4': {'added': 0, 'deleted': 1, 'modified': 0},
+        'Ward 5': {'added': 1, 'deleted': 0, 'modified': 0},
+    }
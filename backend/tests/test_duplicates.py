@@ -0,0 +1,58 @@
+"""
+Test Duplicate Detection
+Owner: Vansh (Backend Developer)
+Tests near-duplicate voter detection and its place in the fusion score
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forensics.duplicates import DuplicateDetectionEngine
+from forensics.fusion import MultiSignalFusionEngine
+
+
+VOTERS = [
+    {'voter_id': 'V000001', 'name': 'Raj Sharma', 'age': 25, 'address': '12 MG Road, Ward 3'},
+    {'voter_id': 'V000002', 'name': 'Priya Patel', 'age': 30, 'address': '45 Gandhi Nagar, Ward 3'},
+    {'voter_id': 'V000003', 'name': 'Amit Kumar', 'age': 28, 'address': '78 Park Street, Ward 4'},
+    {'voter_id': 'V000004', 'name': 'Anjali Singh', 'age': 35, 'address': '32 Main Road, Ward 4'},
+    {'voter_id': 'V000005', 'name': 'Vikram Reddy', 'age': 22, 'address': '65 MG Road, Ward 5'},
+]
+
+
+def test_finds_misspelled_duplicates():
+    """A re-registration with a changed spelling is paired with the original"""
+    voters = VOTERS + [
+        {'voter_id': 'V900001', 'name': 'Raj  Sharmaa', 'age': 26, 'address': '12 MG Road, Ward 3'},
+        {'voter_id': 'V900002', 'name': 'Amit Kumar', 'age': 28, 'address': '78  park street, ward 4'},
+    ]
+    pairs = DuplicateDetectionEngine().find_duplicates(voters)
+    found = {(p['voter_id_1'], p['voter_id_2']) for p in pairs}
+
+    assert found == {('V000001', 'V900001'), ('V000003', 'V900002')}
+    by_id = {p['voter_id_2']: p for p in pairs}
+    assert by_id['V900002']['same_block'] is True
+    assert by_id['V900001']['same_block'] is False
+
+
+def test_neighbours_and_different_ages_are_not_duplicates():
+    """Same name at another house number, or a different generation, is not a duplicate"""
+    voters = VOTERS + [
+        {'voter_id': 'V900001', 'name': 'Raj Sharma', 'age': 25, 'address': '14 MG Road, Ward 3'},
+        {'voter_id': 'V900002', 'name': 'Amit Kumar', 'age': 58, 'address': '78 Park Street, Ward 4'},
+    ]
+    assert DuplicateDetectionEngine().find_duplicates(voters) == []
+
+
+def test_fusion_includes_duplicate_module():
+    """Duplicate Detection takes the weight previously reserved for future modules"""
+    voters = VOTERS + [dict(VOTERS[0], voter_id='V900001')]
+    result = MultiSignalFusionEngine().analyze(voters)
+
+    assert abs(sum(result['weights'].values()) - 1.0) < 1e-9
+    modules = {m['module']: m for m in result['module_breakdowns']}
+    assert modules['Duplicate Detection']['score'] > 0
+    assert modules['Duplicate Detection']['details']['duplicate_pairs'] == 1
@@ -0,0 +1,265 @@
+"""
+Test Notifications
+Owner: Vansh (Backend Developer)
+Tests the notification endpoints and the Server-Sent Events stream
+"""
+
+import json
+import pytest
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from database import db
+from models import Notification, NotificationArchive, Counter
+from events import subscriber_count
+import notification_retention
+from notification_retention import run_retention, SUMMARY_ENTITY
+from jobs import create_job, update_job
+
+
+@pytest.fixture
+def client():
+    """Create test client"""
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+
+    with app.app_context():
+        db.create_all()
+        yield app.test_client()
+        db.drop_all()
+
+
+def _notify(client, title, **fields):
+    response = client.post('/api/notifications', json={'title': title, 'message': f'{title} details', **fields})
+    assert response.status_code == 201
+    return response.get_json()
+
+
+def _next_event(chunks):
+    """Parse the next event message of a text/event-stream, skipping comments and retry hints"""
+    while True:
+        chunk = next(chunks)
+        text = chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk
+        fields = dict(line.split(': ', 1) for line in text.strip().split('\n') if line and not line.startswith((':', 'retry')))
+        if 'event' in fields:
+            return fields['event'], fields.get('id'), json.loads(fields['data'])
+
+
+def test_stream_replays_then_pushes(client):
+    """Notifications after the cursor are replayed, later ones and job progress are pushed"""
+    first = _notify(client, 'Upload received')
+    second = _notify(client, 'Roll compared')
+
+    response = client.get(f"/api/notifications/stream?since={first['id']}", buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+
+    assert _next_event(chunks) == ('notification', str(second['id']), second)
+
+    third = _notify(client, 'Anomaly detected', severity='critical')
+    channel, event_id, data = _next_event(chunks)
+    assert (channel, event_id, data['title']) == ('notification', str(third['id']), 'Anomaly detected')
+
+    job_id = create_job('pdf_ingest', filename='roll.pdf')
+    update_job(job_id, progress={'pages_done': 5, 'total_pages': 10})
+    assert _next_event(chunks)[2]['status'] == 'queued'
+    channel, event_id, data = _next_event(chunks)
+    assert (channel, event_id, data['job_id'], data['progress']['pages_done']) == ('job', None, job_id, 5)
+
+    response.close()
+    assert subscriber_count() == 0
+
+
+def test_stream_replay_pages_until_caught_up(client, monkeypatch):
+    """A backlog longer than one replay query is replayed in full, in id order"""
+    import routes.notifications
+    monkeypatch.setattr(routes.notifications, 'SSE_REPLAY_LIMIT', 2)
+    first = _notify(client, 'Upload 0')
+    backlog = [_notify(client, f'Upload {i}') for i in range(1, 6)]
+
+    response = client.get(f"/api/notifications/stream?since={first['id']}", buffered=False)
+    chunks = iter(response.response)
+    assert [_next_event(chunks)[1] for _ in backlog] == [str(n['id']) for n in backlog]
+
+    live = _notify(client, 'Upload 6')
+    assert _next_event(chunks)[1] == str(live['id'])
+    response.close()
+
+
+def test_stream_channel_filter(client):
+    response = client.get('/api/notifications/stream?channels=job', buffered=False)
+    chunks = iter(response.response)
+
+    _notify(client, 'Not streamed')
+    job_id = create_job('pdf_ingest')
+    channel, _, data = _next_event(chunks)
+    assert (channel, data['job_id']) == ('job', job_id)
+    response.close()
+
+    assert client.get('/api/notifications/stream?channels=email').status_code == 400
+    assert client.get('/api/notifications/stream?since=abc').status_code == 400
+
+
+def test_keyset_pages_cover_every_notification_once(client):
+    """Pages follow X-Next-Cursor without gaps or repeats, including equal timestamps"""
+    created = [_notify(client, f'Alert {i}') for i in range(7)]
+    with app.app_context():
+        # Two notifications sharing a timestamp must still both be listed
+        db.session.execute(db.text('UPDATE notifications SET timestamp = (SELECT timestamp FROM notifications WHERE id = :a) WHERE id = :b'),
+                           {'a': created[2]['id'], 'b': created[3]['id']})
+        db.session.commit()
+
+    seen, cursor = [], None
+    while True:
+        response = client.get('/api/notifications?limit=3' + (f'&cursor={cursor}' if cursor else ''))
+        assert response.status_code == 200
+        seen.extend(n['id'] for n in response.get_json())
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+    assert sorted(seen) == sorted(n['id'] for n in created)
+    assert len(seen) == len(set(seen))
+
+    assert client.get('/api/notifications?cursor=garbage').status_code == 400
+
+    # Browser clients on another origin can only read the header if it is exposed
+    response = client.get('/api/notifications?limit=3', headers={'Origin': 'http://localhost:3000'})
+    assert 'X-Next-Cursor' in response.headers['Access-Control-Expose-Headers']
+
+
+def test_bulk_mark_read_and_unread_counter(client):
+    created = [_notify(client, f'Upload {i}') for i in range(5)]
+    assert client.get('/api/notifications/unread-count').get_json() == {'unread': 5}
+
+    response = client.patch('/api/notifications/read', json={'ids': [created[0]['id'], created[1]['id']]})
+    assert response.get_json() == {'updated': 2, 'unread': 3}
+
+    client.patch(f"/api/notifications/{created[2]['id']}/read")
+    assert client.get('/api/notifications/unread-count').get_json() == {'unread': 2}
+
+    unread = client.get('/api/notifications?unread=true').get_json()
+    assert sorted(n['id'] for n in unread) == [created[3]['id'], created[4]['id']]
+
+    # Already-read rows are not counted twice
+    response = client.patch('/api/notifications/read', json={'until': created[4]['timestamp']})
+    assert response.get_json() == {'updated': 2, 'unread': 0}
+
+    assert client.patch('/api/notifications/read', json={}).status_code == 400
+    assert client.patch('/api/notifications/read', json={'ids': 'all'}).status_code == 400
+    assert client.patch('/api/notifications/read', json={'until': 'yesterday'}).status_code == 400
+
+
+def test_retention_compacts_repeats_and_expires_old(client, monkeypatch):
+    """Repeated old events become one summary, expired ones move to the archive"""
+    monkeypatch.setattr(notification_retention, 'RETENTION_LEASE_SECONDS', 0)
+    now = datetime(2026, 3, 1, 12, 0)
+    batch_day = now - timedelta(days=3)
+    with app.app_context():
+        rows = [Notification(title='Electoral Roll Uploaded', message=f'Uploaded "ward{i}.csv"', severity='success',
+                             related_entity=f'Upload-{i}', action_url='/dashboard', action_type='navigate',
+                             timestamp=batch_day + timedelta(minutes=i), is_read=(i < 2))
+                for i in range(4)]
+        rows.append(Notification(title='Anomaly detected', message='Ward 3', severity='critical',
+                                 timestamp=batch_day))
+        rows.append(Notification(title='Electoral Roll Uploaded', message='Ancient', severity='success',
+                                 timestamp=now - timedelta(days=400)))
+        rows.append(Notification(title='Electoral Roll Uploaded', message='Fresh', severity='success',
+                                 timestamp=now - timedelta(minutes=5)))
+        db.session.add_all(rows)
+        db.session.commit()
+    assert client.get('/api/notifications/unread-count').get_json() == {'unread': 5}
+
+    with app.app_context():
+        stats = run_retention(now)
+        assert (stats['summaries_created'], stats['notifications_compacted'], stats['notifications_expired']) == (1, 4, 1)
+
+        live = Notification.query.order_by(Notification.timestamp).all()
+        assert [n.message for n in live if n.related_entity != SUMMARY_ENTITY] == ['Ward 3', 'Fresh']
+        summary = next(n for n in live if n.related_entity == SUMMARY_ENTITY)
+        assert summary.message.startswith('4 "Electoral Roll Uploaded" notifications')
+        assert summary.timestamp == batch_day + timedelta(minutes=3)
+        assert summary.is_read is False
+
+        archived = NotificationArchive.query.all()
+        assert len(archived) == 5
+        assert sorted(a.summary_id for a in archived if a.summary_id) == [summary.id] * 4
+        assert len({a.original_id for a in archived}) == 5
+
+        # Summaries are not compacted again
+        assert run_retention(now)['summaries_created'] == 0
+
+        # A live id seen before (e.g. reused after a delete) is archived again under a new row
+        db.session.add(Notification(id=archived[0].original_id, title='Reused', message='Old id', timestamp=now - timedelta(days=400)))
+        db.session.commit()
+        assert run_retention(now)['notifications_expired'] == 1
+        assert NotificationArchive.query.filter_by(original_id=archived[0].original_id).count() == 2
+
+    # 2 unread uploads became 1 unread summary
+    assert client.get('/api/notifications/unread-count').get_json() == {'unread': 3}
+    metrics = client.get('/api/notifications/retention').get_json()
+    assert metrics['runs'] >= 2 and metrics['last_run']['summaries_created'] == 0
+
+
+def test_retention_compacts_whole_days_once(client, monkeypatch):
+    """Hourly passes and small batches still give one summary per group and day"""
+    monkeypatch.setattr(notification_retention, 'RETENTION_LEASE_SECONDS', 0)
+    monkeypatch.setattr(notification_retention, 'NOTIFICATION_COMPACT_BATCH', 3)
+    day = datetime(2026, 2, 26)
+    hours = {0: (9, 10), 1: (9, 10), 2: (9, 10, 18, 19)}
+    with app.app_context():
+        db.session.add_all([Notification(title='Electoral Roll Uploaded', message=f'file {h}', severity='success',
+                                         timestamp=day + timedelta(days=d, hours=h))
+                            for d in hours for h in hours[d]])
+        db.session.commit()
+
+        # The first batch of 3 ends before Feb 27, which goes to the next batch of the same pass instead of being split.
+        # Feb 28 only ages past 24h at midnight on Mar 2, so none of its rows are compacted before that
+        compacted = [run_retention(datetime(2026, 3, 1, hour, 0))['notifications_compacted'] for hour in range(12, 24)]
+        assert compacted == [4] + [0] * 11
+        # A single day larger than the batch is compacted in full
+        assert run_retention(datetime(2026, 3, 2, 0, 0))['notifications_compacted'] == 4
+
+        summaries = Notification.query.filter_by(related_entity=SUMMARY_ENTITY).order_by(Notification.timestamp).all()
+        assert [s.message.split(' ', 1)[0] for s in summaries] == ['2', '2', '4']
+        assert NotificationArchive.query.count() == 8
+
+
+def test_retention_pages_past_days_of_one_off_notifications(client, monkeypatch):
+    """Old days holding only singletons do not starve newer days, and are not scanned again"""
+    monkeypatch.setattr(notification_retention, 'RETENTION_LEASE_SECONDS', 0)
+    monkeypatch.setattr(notification_retention, 'NOTIFICATION_COMPACT_BATCH', 3)
+    day = datetime(2026, 2, 20)
+    with app.app_context():
+        rows = [Notification(title=f'Anomaly {d}-{h}', message='Ward 3', severity='critical',
+                             timestamp=day + timedelta(days=d, hours=h))
+                for d in range(3) for h in range(2)]
+        rows += [Notification(title='Electoral Roll Uploaded', message=f'file {h}', severity='success',
+                              timestamp=day + timedelta(days=5, hours=h))
+                 for h in range(2)]
+        db.session.add_all(rows)
+        db.session.commit()
+
+        stats = run_retention(datetime(2026, 3, 1, 12, 0))
+        assert (stats['summaries_created'], stats['notifications_compacted']) == (1, 2)
+        assert db.session.get(Counter, notification_retention.COMPACTED_COUNTER).value == \
+            int((datetime(2026, 2, 28) - datetime(1970, 1, 1)).total_seconds())
+
+        # A later pass starts where the last one stopped
+        batches = []
+        monkeypatch.setattr(notification_retention, '_compact_batch',
+                            lambda candidates: batches.append(len(candidates)) or (0, 0))
+        run_retention(datetime(2026, 3, 1, 13, 0))
+        assert batches == []
+        assert Notification.query.count() == 7
+
+
+def test_retention_lease_skips_overlapping_runs(client, monkeypatch):
+    monkeypatch.setattr(notification_retention, 'RETENTION_LEASE_SECONDS', 3600)
+    assert client.post('/api/notifications/retention/run').get_json()['skipped'] is False
+    assert client.post('/api/notifications/retention/run').get_json() == {'skipped': True}
@@ -0,0 +1,144 @@
+"""
+Test Pattern Detector Rules
+Owner: Vansh (Backend Developer)
+Tests the declarative rule engine over diff results
+"""
+
+import os
+import sys
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.pattern_detector import detect_suspicious_patterns, validate_rules
+
+
+def _diff(added_dates, deleted=0, old_count=1000):
+    added = [
+        {'voter_id': f'A{i}', 'name': 'Test', 'age': 30, 'address': 'Addr', 'constituency': f'W{i % 2}', 'registration_date': date}
+        for i, date in enumerate(added_dates)
+    ]
+    return {
+        'added': added,
+        'deleted': [{'voter_id': f'D{i}'} for i in range(deleted)],
+        'modified': [],
+        'stats': {'total_added': len(added), 'total_deleted': deleted, 'total_modified': 0, 'old_count': old_count}
+    }
+
+
+def test_default_rules_match_legacy_alerts():
+    """Default rules reproduce the bulk and same-day alerts"""
+    alerts = detect_suspicious_patterns(_diff(['2024-01-15'] * 120, deleted=150))
+    alerts = [a for a in alerts if a['type'] != 'REGISTRATION_BURST']
+    assert [a['type'] for a in alerts] == ['BULK_DELETION', 'BULK_ADDITION', 'SAME_DAY_REGISTRATION']
+    same_day = alerts[2]
+    assert same_day['date'] == '2024-01-15'
+    assert same_day['count'] == 120
+    assert same_day['message'] == '120 voters registered on same day: 2024-01-15'
+
+
+def test_custom_group_window_and_rate_rules():
+    """Per-constituency windows and rate thresholds are expressible as rules"""
+    dates = ['2024-01-15', '2024-01-16', '2024-01-17'] * 20
+    rules = [
+        {
+            'type': 'WEEKLY_BURST', 'change': 'added', 'kind': 'group_count',
+            'group_by': ['constituency', 'registration_date'], 'window_days': 7, 'threshold': 25,
+            'message': '{count} in {constituency}'
+        },
+        {'type': 'DELETION_RATE', 'change': 'deleted', 'kind': 'rate', 'of': 'old_count', 'threshold': 0.05}
+    ]
+    alerts = detect_suspicious_patterns(_diff(dates, deleted=80), rules=rules)
+
+    bursts = [a for a in alerts if a['type'] == 'WEEKLY_BURST']
+    assert sorted(a['constituency'] for a in bursts) == ['W0', 'W1']
+    assert all(a['count'] == 30 for a in bursts)
+    rate = [a for a in alerts if a['type'] == 'DELETION_RATE']
+    assert rate and rate[0]['rate'] == 0.08
+
+
+def test_invalid_rule_rejected():
+    """Malformed rules fail fast instead of being skipped silently"""
+    with pytest.raises(ValueError):
+        validate_rules([{'type': 'X', 'change': 'added', 'kind': 'group_count', 'threshold': 1}])
+
+
+def test_burst_rule_finds_weekly_cluster():
+    """A week-long registration drive is ranked as a burst with its window"""
+    background = [f'20{10 + i % 12}-{1 + i % 12:02d}-{1 + i % 28:02d}' for i in range(400)]
+    drive = [f'2023-03-{13 + i % 7:02d}' for i in range(140)]
+    rules = [{
+        'type': 'REGISTRATION_BURST', 'change': 'added', 'kind': 'burst', 'group_by': ['constituency'],
+        'windows': [7], 'min_z': 3.0, 'threshold': 50, 'message': '{count} in {window_days} days'
+    }]
+    alerts = detect_suspicious_patterns(_diff(background + drive), rules=rules)
+
+    assert alerts, "Expected the registration drive to be flagged"
+    top = alerts[0]
+    assert top['window_days'] == 7
+    assert top['start'] <= '2023-03-13' and top['end'] >= '2023-03-19'
+    assert top['count'] >= 70
+    assert top['z_score'] >= 3.0
+
+
+def test_burst_engine_ignores_uniform_registrations():
+    """Evenly spread registrations produce no bursts"""
+    from forensics.burst import BurstDetectionEngine
+    import numpy as np
+
+    days = np.repeat(np.arange(18000, 18365), 3)
+    assert BurstDetectionEngine(min_count=5).find_bursts(days) == []
+
+
+def test_burst_rule_groups_by_custom_field():
+    """A burst rule grouped by ward reports the ward, including pre-1970 registrations"""
+    background = [f'19{50 + i % 19}-{1 + i % 12:02d}-{1 + i % 28:02d}' for i in range(400)]
+    drive = ['1965-06-01'] * 100
+    diff = _diff(background + drive)
+    for i, voter in enumerate(diff['added']):
+        voter['ward'] = 'Ward 9' if i >= len(background) else f'Ward {i % 3}'
+    rules = [{
+        'type': 'WARD_BURST', 'change': 'added', 'kind': 'burst', 'group_by': ['ward'],
+        'windows': [1], 'min_z': 3.0, 'threshold': 50, 'message': '{count} in {ward} from {start}'
+    }]
+    alerts = detect_suspicious_patterns(diff, rules=rules)
+
+    assert alerts[0]['ward'] == 'Ward 9'
+    assert alerts[0]['message'] == '100 in Ward 9 from 1965-06-01'
+
+
+def test_message_placeholders_validated():
+    """Placeholders a rule cannot fill are rejected when rules load, not at alert time"""
+    from utils.pattern_detector import DEFAULT_RULES
+    validate_rules(DEFAULT_RULES)
+
+    with pytest.raises(ValueError, match='ward'):
+        validate_rules([{'type': 'X', 'change': 'added', 'kind': 'count', 'threshold': 1, 'message': '{count} in {ward}'}])
+    with pytest.raises(ValueError, match='malformed'):
+        validate_rules([{'type': 'X', 'change': 'added', 'kind': 'count', 'threshold': 1, 'message': '{count'}])
+
+
+def test_group_by_must_be_a_list():
+    burst = {'type': 'X', 'change': 'added', 'kind': 'burst', 'threshold': 1}
+    validate_rules([{**burst, 'group_by': None}])
+    for group_by in ('ward', {'field': 'ward'}, [1]):
+        with pytest.raises(ValueError, match='group_by must be a list'):
+            validate_rules([{**burst, 'group_by': group_by}])
+    with pytest.raises(ValueError, match='needs group_by'):
+        validate_rules([{**burst, 'kind': 'group_count', 'group_by': None}])
+
+
+def test_rules_file_reloaded_only_when_changed(tmp_path, monkeypatch):
+    import json
+    from utils import pattern_detector
+
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps([{'type': 'A', 'change': 'added', 'kind': 'count', 'threshold': 1}]))
+    monkeypatch.setenv('PATTERN_RULES_PATH', str(path))
+    first = pattern_detector.load_rules()
+    assert pattern_detector.load_rules() is first
+
+    path.write_text(json.dumps([{'type': 'B', 'change': 'added', 'kind': 'count', 'threshold': 2}]))
+    os.utime(path, ns=(os.stat(path).st_mtime_ns + 10**9,) * 2)
+    assert [r['type'] for r in pattern_detector.load_rules()] == ['B']
@@ -0,0 +1,259 @@
+"""
+Test PDF Parser
+Owner: Vansh (Backend Developer)
+Tests page-level voter extraction helpers (tests that open a real PDF skip without pdfplumber)
+"""
+
+import pytest
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.pdf_parser import parse_page_text, parse_voter_line, ExtractionReport
+
+
+PAGE_TEXT = """ELECTORAL ROLL - PART 12
+ABC1234567 Raj Sharma 25 12 MG Road Ward 3 2020-01-15
+Page 3 of 2000
+XYZ7654321 Priya Patel 30 45 Gandhi Nagar Ward 3 2019-03-20
+"""
+
+
+def test_parse_page_text_keeps_only_voter_lines():
+    """Headers and footers are skipped; voter lines are parsed in order"""
+    voters = parse_page_text(PAGE_TEXT)
+    assert [v['voter_id'] for v in voters] == ['ABC1234567', 'XYZ7654321']
+    assert voters[0]['name'] == 'Raj Sharma'
+    assert voters[0]['age'] == '25'
+    assert voters[1]['registration_date'] == '2019-03-20'
+    assert parse_page_text(None) == []
+    assert parse_voter_line('Page 3 of 2000') is None
+
+
+def test_extraction_report_counts_failures():
+    """Pages are either timed or recorded as failed"""
+    report = ExtractionReport(total_pages=3)
+    report.record(1, 0.2, 10)
+    report.record(2, 0.4, 12)
+    report.record(3, 0.1, 0, error='PDFSyntaxError: bad xref')
+
+    summary = report.to_dict()
+    assert summary['pages_done'] == 3
+    assert summary['failed_count'] == 1
+    assert summary['failed_pages'] == {3: 'PDFSyntaxError: bad xref'}
+    assert summary['voter_count'] == 22
+    assert summary['slowest_pages'][0] == (2, 0.4)
+
+
+def test_background_job_reports_result():
+    """Jobs run on a thread with an app context and end done or failed"""
+    from app import app
+    from jobs import create_job, get_job, update_job, run_in_background
+
+    def work(job_id, pages):
+        for page in range(1, pages + 1):
+            update_job(job_id, progress={'pages_done': page, 'total_pages': pages})
+        return {'row_count': 42}
+
+    done_id = create_job('test')
+    failed_id = create_job('test')
+    run_in_background(app, done_id, work, 3).join(timeout=5)
+    run_in_background(app, failed_id, lambda job_id: {'error': 'No voter data'}).join(timeout=5)
+
+    done, failed = get_job(done_id), get_job(failed_id)
+    assert (done['status'], done['result'], done['progress']['pages_done']) == ('done', {'row_count': 42}, 3)
+    assert (failed['status'], failed['error']) == ('failed', 'No voter data')
+    assert done['finished_at'] is not None
+
+    client = app.test_client()
+    assert client.get(f'/api/jobs/{done_id}').get_json()['status'] == 'done'
+    assert client.get('/api/jobs/unknown').status_code == 404
+
+
+def test_clean_voter_frame_normalizes_batches():
+    """Each checkpointed batch is cleaned the same way as a whole-document parse"""
+    import pandas as pd
+    from utils.pdf_parser import clean_voter_frame, REQUIRED_COLUMNS
+
+    batch = clean_voter_frame(pd.DataFrame([
+        {'voter_id': 'ABC1234567', 'name': 'Raj Sharma', 'age': '25', 'address': '12 MG Road', 'registration_date': None},
+        {'voter_id': '', 'name': 'No Id', 'age': '40', 'address': 'x', 'registration_date': '2020-01-01'},
+        {'voter_id': 'XYZ7654321', 'name': 'Priya Patel', 'age': 'n/a', 'address': '45 Gandhi Nagar'},
+    ]))
+    assert list(batch.columns) == REQUIRED_COLUMNS
+    assert batch['voter_id'].tolist() == ['ABC1234567', 'XYZ7654321']
+    assert batch['age'].tolist() == [25, 0]
+    assert batch['registration_date'].tolist() == ['2020-01-01', '2020-01-01']
+    assert clean_voter_frame(pd.DataFrame(columns=REQUIRED_COLUMNS)).empty
+
+
+HEADER_TABLE = [
+    ['Sl', 'EPIC No', 'Name', "Father's Name", 'Age', 'House Address', 'Date'],
+    ['1', 'ABC1234567', 'Raj\nSharma', 'Mohan Sharma', '25', '12 MG Road', '2020-01-15'],
+    ['2', '', 'Blank Row', '', '', '', ''],
+]
+
+
+def test_learn_table_layout_from_header():
+    """Header keywords pick the columns; the relative's name column is not taken as name"""
+    from utils.pdf_parser import learn_table_layout, apply_table_layout
+
+    layout = learn_table_layout([HEADER_TABLE])
+    assert layout['width'] == 7
+    assert layout['columns'] == {'voter_id': 1, 'name': 2, 'age': 4, 'address': 5, 'registration_date': 6}
+
+    # A later page repeats the header; a table of another width is ignored
+    page = [HEADER_TABLE[0], ['3', 'XYZ7654321', 'Priya Patel', 'Anil Patel', '30', '45 Gandhi Nagar', '2019-03-20']]
+    voters = apply_table_layout([page, [['x', 'y', 'z']]], layout)
+    assert voters == [{'voter_id': 'XYZ7654321', 'name': 'Priya Patel', 'age': '30',
+                       'address': '45 Gandhi Nagar', 'registration_date': '2019-03-20'}]
+    assert apply_table_layout([HEADER_TABLE], layout)[0]['name'] == 'Raj Sharma'
+
+
+def test_learn_table_layout_from_content():
+    """Header-less tables are mapped by cell contents; missing fields get defaults"""
+    from utils.pdf_parser import learn_table_layout, apply_table_layout
+
+    table = [
+        ['Raj Sharma', 'ABC1234567', '25', '12 MG Road Ward 3'],
+        ['Priya Patel', 'XYZ7654321', '30', '45 Gandhi Nagar Ward 3'],
+    ]
+    layout = learn_table_layout([table])
+    assert layout['columns'] == {'voter_id': 1, 'age': 2, 'name': 0, 'address': 3}
+    voters = apply_table_layout([table], layout)
+    assert [v['voter_id'] for v in voters] == ['ABC1234567', 'XYZ7654321']
+    assert voters[0]['registration_date'] == '2020-01-01'
+
+    assert learn_table_layout([]) is None
+    assert learn_table_layout([[['a', 'b', 'c'], ['d', 'e', 'f']]]) is None
+
+
+def test_read_pdf_frame_batches_rows(monkeypatch):
+    """Voter dicts are converted to columns batch by batch and concatenated in page order"""
+    from utils import pdf_parser
+
+    voters = [{'voter_id': f'ABC{i:07d}', 'name': 'Test', 'age': '30', 'address': 'Addr', 'registration_date': '2020-01-01'}
+              for i in range(25)]
+    monkeypatch.setattr(pdf_parser, 'iter_pdf_voters', lambda *args, **kwargs: iter(voters))
+
+    frame = pdf_parser.read_pdf_frame('roll.pdf', batch_rows=10)
+    assert list(frame.columns) == pdf_parser.REQUIRED_COLUMNS
+    assert frame['voter_id'].tolist() == [v['voter_id'] for v in voters]
+
+    monkeypatch.setattr(pdf_parser, 'iter_pdf_voters', lambda *args, **kwargs: iter([]))
+    assert pdf_parser.read_pdf_frame('empty.pdf').empty
+
+
+def test_pdf_upload_rejected_without_pdfplumber(monkeypatch):
+    """Without pdfplumber a PDF is refused up front instead of queuing a job that cannot succeed"""
+    from io import BytesIO
+    from app import app
+    import routes.upload
+    monkeypatch.setattr(routes.upload, 'PDFPLUMBER_AVAILABLE', False)
+
+    response = app.test_client().post('/api/upload', data={'file': (BytesIO(b'%PDF-1.4'), 'roll.pdf'), 'state': 'Delhi'},
+                                      content_type='multipart/form-data')
+    assert response.status_code == 400
+    assert 'pdfplumber' in response.get_json()['error']
+
+
+def test_pdf_job_progress_is_throttled(monkeypatch, tmp_path):
+    """A long roll publishes progress every PDF_PROGRESS_PAGES pages, plus the last page"""
+    import pandas as pd
+    import routes.upload
+
+    def fake_read(pdf_path, report, progress, cache_dir=None):
+        report.total_pages = 1000
+        for page in range(1, 1001):
+            report.record(page, 0.01, 0)
+            progress(report)
+        return pd.DataFrame()
+
+    published = []
+    monkeypatch.setattr(routes.upload, 'read_pdf_frame', fake_read)
+    monkeypatch.setattr(routes.upload, 'update_job', lambda job_id, progress: published.append(progress['pages_done']))
+    monkeypatch.setattr(routes.upload, 'PDF_PROGRESS_PAGES', 100)
+    monkeypatch.setattr(routes.upload, 'PDF_PROGRESS_SECONDS', 3600)
+    pdf_path = tmp_path / 'roll.pdf'
+    pdf_path.write_bytes(b'%PDF-1.4')
+
+    result = routes.upload._ingest_pdf_job('job', str(pdf_path), 'roll.pdf', 'Delhi', 'full')
+    assert 'error' in result
+    assert published == [1] + list(range(101, 1000, 100)) + [1000]
+
+
+def _pdf_with_fonts(fonts):
+    """Bytes of a PDF with one page per font, every page drawing the same text with font /F1"""
+    content = 'BT /F1 12 Tf 72 720 Td (ABC1234567 Raj Sharma 25 12 MG Road Ward 3 2020-01-15) Tj ET'
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>', None]
+    kids = []
+    for font in fonts:
+        objects.append(f'<< /Type /Font /Subtype /Type1 /BaseFont /{font} >>')
+        font_id = len(objects)
+        objects.append(f'<< /Length {len(content)} >>\nstream\n{content}\nendstream')
+        stream_id = len(objects)
+        objects.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+                       f'/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {stream_id} 0 R >>')
+        kids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] /Count {len(kids)} >>"
+
+    out, offsets = b'%PDF-1.4\n', []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f'{number} 0 obj\n{body}\nendobj\n'.encode('latin-1')
+    xref = len(out)
+    out += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    out += b''.join(f'{offset:010d} 00000 n \n'.encode() for offset in offsets)
+    out += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    return out
+
+
+def test_page_content_hash_covers_fonts(tmp_path):
+    """Pages drawing the same operators hash apart when their fonts differ"""
+    pdfplumber = pytest.importorskip('pdfplumber')
+    from utils.pdf_parser import _page_content_hash
+
+    path = tmp_path / 'roll.pdf'
+    path.write_bytes(_pdf_with_fonts(['Helvetica', 'Helvetica', 'Courier']))
+    with pdfplumber.open(path) as pdf:
+        hashes = [_page_content_hash(page) for page in pdf.pages]
+    assert hashes[0] == hashes[1]
+    assert hashes[2] != hashes[0]
+
+
+def test_convert_retries_failed_pages_on_resume(monkeypatch, tmp_path):
+    """A page that failed is extracted again by the next run instead of being skipped for good"""
+    import pandas as pd
+    from utils import pdf_parser
+
+    attempts = []
+
+    def extract(shard):
+        _, start, end, _, _ = shard
+        results = []
+        for index in range(start, end):
+            attempts.append(index + 1)
+            if index + 1 == 3 and attempts.count(3) == 1:
+                results.append((3, [], 0.01, 'OSError: transient read error', False, None))
+                continue
+            voter = {'voter_id': f'ABC000000{index + 1}', 'name': 'Raj Sharma', 'age': '25',
+                     'address': '12 MG Road', 'registration_date': '2020-01-15'}
+            results.append((index + 1, [voter], 0.01, None, False, 'text'))
+        return results
+
+    monkeypatch.setattr(pdf_parser, 'PDFPLUMBER_AVAILABLE', True)
+    monkeypatch.setattr(pdf_parser, 'PDF_PARSE_WORKERS', 1)
+    monkeypatch.setattr(pdf_parser, 'inspect_pdf', lambda path: (4, None))
+    monkeypatch.setattr(pdf_parser, '_file_sha256', lambda path: 'same-pdf')
+    monkeypatch.setattr(pdf_parser, '_extract_page_range', extract)
+    output = str(tmp_path / 'roll.csv')
+
+    pdf_parser.convert_pdf_to_csv('roll.pdf', output)
+    assert len(pd.read_csv(output)) == 3
+
+    pdf_parser.convert_pdf_to_csv('roll.pdf', output)
+    assert sorted(pd.read_csv(output)['voter_id']) == [f'ABC000000{p}' for p in range(1, 5)]
+    assert attempts == [1, 2, 3, 4, 3]
+    assert pdf_parser._load_manifest(f'{output}.manifest.json')['failed_pages'] == {}
@@ -0,0 +1,107 @@
+"""
+Test Response Cache
+Owner: Vansh (Backend Developer)
+Tests ETags, 304 responses and invalidation of cached read endpoints
+"""
+
+import pytest
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from database import db
+from response_cache import clear_response_cache
+from tests.test_roll_storage import BASE_ROLL, REVISED_ROLL, _upload
+
+
+@pytest.fixture
+def client():
+    """Create test client"""
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+
+    with app.app_context():
+        db.create_all()
+        clear_response_cache()
+        yield app.test_client()
+        db.drop_all()
+
+
+def test_unchanged_uploads_answer_304(client):
+    """A matching If-None-Match skips the view; the next upload changes the ETag"""
+    _upload(client, BASE_ROLL, 'base.csv')
+
+    first = client.get('/api/uploads')
+    assert first.status_code == 200
+    assert first.headers['X-Cache'] == 'MISS'
+    etag = first.headers['ETag']
+
+    again = client.get('/api/uploads')
+    assert again.headers['X-Cache'] == 'HIT'
+    assert again.get_json() == first.get_json()
+
+    not_modified = client.get('/api/uploads', headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.data == b''
+
+    _upload(client, REVISED_ROLL, 'revised.csv')
+    changed = client.get('/api/uploads', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert len(changed.get_json()) == 2
+
+
+def test_query_args_are_part_of_the_key(client):
+    """Different args get different ETags; the same args in another order share one"""
+    base = _upload(client, BASE_ROLL, 'base.csv')
+    revised = _upload(client, REVISED_ROLL, 'revised.csv')
+
+    ids = f"old_upload_id={base['upload_id']}&new_upload_id={revised['upload_id']}"
+    swapped = f"new_upload_id={revised['upload_id']}&old_upload_id={base['upload_id']}"
+    stats = client.get(f'/stats?{ids}')
+    assert stats.get_json()['total_added'] == 1
+    assert client.get(f'/stats?{swapped}').headers['ETag'] == stats.headers['ETag']
+    assert client.get(f'/heatmap?{ids}').headers['ETag'] != stats.headers['ETag']
+
+
+def test_errors_are_not_cached(client):
+    response = client.get('/stats?old_upload_id=x')
+    assert response.status_code == 400
+    assert 'ETag' not in response.headers
+
+
+def test_mark_read_invalidates_notifications(client):
+    created = client.post('/api/notifications', json={'title': 'Audit', 'message': 'Ward 3 flagged'}).get_json()
+
+    etag = client.get('/api/notifications').headers['ETag']
+    assert client.get('/api/notifications', headers={'If-None-Match': etag}).status_code == 304
+
+    client.patch(f"/api/notifications/{created['id']}/read")
+    response = client.get('/api/notifications', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()[0]['read'] is True
+
+
+def test_unknown_uploads_are_not_cached(client):
+    """field-changes checks the uploads exist instead of caching an empty diff"""
+    response = client.get('/field-changes?old_upload_id=missing&new_upload_id=gone')
+    assert response.status_code == 404
+    assert 'ETag' not in response.headers
+
+
+def test_version_lookup_failure_runs_view_uncached(client, monkeypatch):
+    """A failing version query does not turn into a 500; the view answers without an ETag"""
+    from sqlalchemy.exc import OperationalError
+    import response_cache
+
+    def unavailable():
+        raise OperationalError('SELECT count(id) FROM electoral_rolls', {}, Exception('database is locked'))
+
+    monkeypatch.setitem(response_cache.VERSION_SOURCES, 'uploads', unavailable)
+    response = client.get('/api/dashboard')
+    assert response.status_code == 200
+    assert response.headers['X-Cache'] == 'BYPASS'
+    assert 'ETag' not in response.headers
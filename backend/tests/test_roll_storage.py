@@ -0,0 +1,386 @@
+"""
+Test Roll Storage Modes
+Owner: Vansh (Backend Developer)
+Tests delta-encoded uploads and view reconstruction
+"""
+
+import pytest
+import os
+import sys
+from io import BytesIO
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from database import db
+from models import ElectoralRoll, VoterRecord, VoterTombstone
+from diff_engine import calculate_row_hash, compare_rolls, diff_columns, format_diff
+from snapshot_store import load_roll_columns
+from roll_store import load_roll_frame
+
+
+@pytest.fixture
+def client():
+    """Create test client"""
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+
+    with app.app_context():
+        db.create_all()
+        yield app.test_client()
+        db.drop_all()
+
+
+BASE_ROLL = """voter_id,name,age,address,registration_date
+V000001,Raj Sharma,25,"12 MG Road, Ward 3",2020-01-15
+V000002,Priya Patel,30,"45 Gandhi Nagar, Ward 3",2019-03-20
+V000003,Amit Kumar,28,"78 Park Street, Ward 4",2021-05-10
+V000004,Anjali Singh,35,"32 Main Road, Ward 4",2018-07-25"""
+
+REVISED_ROLL = """voter_id,name,age,address,registration_date
+V000001,Raj Sharma,25,"12 MG Road, Ward 3",2020-01-15
+V000002,Priya Patel,31,"45 Gandhi Nagar, Ward 3",2019-03-20
+V000003,Amit Kumar,28,"78 Park Street, Ward 4",2021-05-10
+V000005,Vikram Reddy,22,"65 MG Road, Ward 5",2022-09-30"""
+
+
+def _upload(client, csv_text, filename, **form):
+    data = {'file': (BytesIO(csv_text.encode('utf-8')), filename), 'state': 'Delhi'}
+    data.update(form)
+    response = client.post('/api/upload', data=data, content_type='multipart/form-data')
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()
+
+
+def test_delta_upload_stores_only_changes(client):
+    """Delta mode stores changed rows plus tombstones and reconstructs the full view"""
+    base = _upload(client, BASE_ROLL, 'base.csv')
+    revised = _upload(client, REVISED_ROLL, 'revised.csv', storage_mode='delta')
+
+    assert revised['storage_mode'] == 'delta'
+    assert revised['base_upload_id'] == base['upload_id']
+    assert revised['stored_rows'] == 2, "Only the modified and the added voter should be stored"
+
+    with app.app_context():
+        assert VoterRecord.query.filter_by(upload_id=revised['upload_id']).count() == 2
+        tombstones = [t.voter_id for t in VoterTombstone.query.filter_by(upload_id=revised['upload_id'])]
+        assert tombstones == ['V000004']
+
+        view = load_roll_frame(revised['upload_id']).set_index('voter_id')
+        assert sorted(view.index) == ['V000001', 'V000002', 'V000003', 'V000005']
+        assert view.loc['V000002', 'age'] == 31
+
+        result = compare_rolls(base['upload_id'], revised['upload_id'])
+        assert [r['voter_id'] for r in result['added']] == ['V000005']
+        assert [r['voter_id'] for r in result['deleted']] == ['V000004']
+        assert [r['voter_id'] for r in result['modified']] == ['V000002']
+
+
+def test_invalid_storage_mode_rejected(client):
+    """Unknown storage modes are rejected before anything is stored"""
+    response = client.post(
+        '/api/upload',
+        data={'file': (BytesIO(BASE_ROLL.encode('utf-8')), 'base.csv'), 'state': 'Delhi', 'storage_mode': 'zip'},
+        content_type='multipart/form-data'
+    )
+    assert response.status_code == 400
+    assert 'storage_mode' in response.get_json()['error']
+    with app.app_context():
+        assert ElectoralRoll.query.count() == 0
+
+
+def test_snapshot_compare_matches_database(client, tmp_path, monkeypatch):
+    """Memory-mapped snapshots give the same diff as the database path"""
+    base = _upload(client, BASE_ROLL, 'base.csv')
+    revised = _upload(client, REVISED_ROLL, 'revised.csv')
+
+    with app.app_context():
+        from_db = compare_rolls(base['upload_id'], revised['upload_id'])
+
+        monkeypatch.setenv('ROLL_SNAPSHOT_DIR', str(tmp_path))
+        old, new = load_roll_columns(base['upload_id']), load_roll_columns(revised['upload_id'])
+        from_snapshot = format_diff(old, new, diff_columns(old, new))
+
+    assert os.path.exists(tmp_path / base['upload_id'] / 'row_hash.npy'), "Snapshot should be exported on first load"
+    assert from_snapshot == from_db
+
+
+def test_timeline_follows_upload_chain(client):
+    """The timeline diffs consecutive uploads of a state"""
+    first = _upload(client, BASE_ROLL, 'first.csv')
+    second = _upload(client, REVISED_ROLL, 'second.csv')
+    third = _upload(client, BASE_ROLL, 'third.csv')
+
+    response = client.get('/timeline', query_string={'state': 'Delhi'})
+    assert response.status_code == 200
+    points = response.get_json()
+    assert [p['upload_id'] for p in points] == [second['upload_id'], third['upload_id']]
+    assert points[0]['previous_upload_id'] == first['upload_id']
+    assert (points[0]['added'], points[0]['deleted'], points[0]['modified']) == (1, 1, 1)
+    assert (points[1]['added'], points[1]['deleted'], points[1]['modified']) == (1, 1, 1)
+    assert points[0]['constituencies']['Ward 5']['added'] == 1
+
+    clipped = client.get('/timeline', query_string={'old_upload_id': first['upload_id'], 'new_upload_id': second['upload_id']}).get_json()
+    assert len(clipped) == 1
+
+
+def test_heatmap_returns_region_per_constituency(client):
+    """The heatmap has one region per constituency with its own counts"""
+    base = _upload(client, BASE_ROLL, 'base.csv')
+    revised = _upload(client, REVISED_ROLL, 'revised.csv')
+
+    response = client.get('/heatmap', query_string={'old_upload_id': base['upload_id'], 'new_upload_id': revised['upload_id']})
+    assert response.status_code == 200
+    regions = {r['region']: r for r in response.get_json()}
+    assert set(regions) == {'Ward 3', 'Ward 4', 'Ward 5'}
+    assert regions['Ward 3']['modified'] == 1
+    assert regions['Ward 4']['deleted'] == 1
+    assert regions['Ward 5']['added'] == 1
+
+
+def test_cross_roll_index_matches_voters_across_states(client):
+    """The same person on the latest rolls of two states is reported once, with both rolls"""
+    delhi = _upload(client, BASE_ROLL, 'delhi.csv')
+    other_state = """voter_id,name,age,address,registration_date
+UP000001,"Sharma, Raj",26,"9 Civil Lines, Ward 1",2023-02-01
+UP000002,Meera Iyer,41,"3 Mall Road, Ward 1",2015-06-11"""
+    up = _upload(client, other_state, 'up.csv', state='Uttar Pradesh')
+
+    response = client.get('/api/cross-roll-voters')
+    assert response.status_code == 200
+    matches = response.get_json()['matches']
+    assert len(matches) == 1
+    assert {v['voter_id'] for v in matches[0]['voters']} == {'V000001', 'UP000001'}
+
+    # A newer Delhi roll without Raj Sharma replaces the old one in the index
+    revised = _upload(client, BASE_ROLL.replace('V000001,Raj Sharma', 'V000009,Rohan Das'), 'delhi2.csv')
+    assert client.get('/api/cross-roll-voters').get_json()['matches'] == []
+    with app.app_context():
+        from models import VoterIdentity
+        owners = {row.upload_id for row in VoterIdentity.query.filter_by(state='Delhi')}
+        assert owners == {revised['upload_id']}
+        assert VoterIdentity.query.filter_by(upload_id=up['upload_id']).count() == 2
+    assert delhi['upload_id'] != revised['upload_id']
+
+    assert client.get('/api/cross-roll-voters', query_string={'scope': 'ward'}).status_code == 400
+
+
+def test_identity_keys_match_between_upload_and_backfill(client):
+    """A roll indexed from its stored rows gets the keys it got at upload, relation column or not"""
+    from models import VoterIdentity, Counter
+    from identity_index import ensure_identity_index, IDENTITY_KEY_VERSION, KEY_VERSION_COUNTER
+
+    with_relation = BASE_ROLL.replace('registration_date', 'registration_date,father_name', 1)
+    with_relation = '\n'.join([with_relation.split('\n')[0]] + [f'{line},Mohan' for line in with_relation.split('\n')[1:]])
+    _upload(client, with_relation, 'delhi.csv')
+    at_upload = {r.voter_id: r.identity_key for r in VoterIdentity.query.all()}
+    assert len(at_upload) == 4
+
+    # Backfill of a state without index rows
+    VoterIdentity.query.delete()
+    db.session.commit()
+    ensure_identity_index()
+    assert {r.voter_id: r.identity_key for r in VoterIdentity.query.all()} == at_upload
+
+    # Rows keyed by an older key version are re-keyed once
+    VoterIdentity.query.update({'identity_key': '0' * 32})
+    db.session.get(Counter, KEY_VERSION_COUNTER).value = IDENTITY_KEY_VERSION - 1
+    db.session.commit()
+    ensure_identity_index()
+    assert {r.voter_id: r.identity_key for r in VoterIdentity.query.all()} == at_upload
+    assert db.session.get(Counter, KEY_VERSION_COUNTER).value == IDENTITY_KEY_VERSION
+
+
+def test_address_parts_stored_at_ingest(client):
+    """Normalized address, ward, house number and street are stored with each voter"""
+    roll = """voter_id,name,age,address,registration_date,constituency
+V000001,Raj Sharma,25,"H.No. 12, M.G. Rd, Ward-3",2020-01-15,AC-101
+V000002,Priya Patel,30,Near Temple,2019-03-20,AC-101"""
+    upload = _upload(client, roll, 'parts.csv')
+
+    with app.app_context():
+        raj = VoterRecord.query.filter_by(upload_id=upload['upload_id'], voter_id='V000001').one()
+        assert (raj.address_normalized, raj.ward, raj.house_number, raj.street) == (
+            'hno 12 mg road ward 3', 'Ward 3', '12', 'mg road')
+        priya = VoterRecord.query.filter_by(upload_id=upload['upload_id'], voter_id='V000002').one()
+        assert (priya.ward, priya.house_number) == (None, None)
+
+
+def test_heatmap_groups_by_ward(client):
+    """group_by=ward summarizes changes per parsed ward, independent of constituency"""
+    base = _upload(client, BASE_ROLL, 'base.csv')
+    revised = _upload(client, REVISED_ROLL, 'revised.csv')
+
+    response = client.get('/heatmap', query_string={
+        'old_upload_id': base['upload_id'], 'new_upload_id': revised['upload_id'], 'group_by': 'ward'
+    })
+    assert response.status_code == 200
+    assert {r['region'] for r in response.get_json()} == {'Ward 3', 'Ward 4', 'Ward 5'}
+
+
+def test_dataset_fingerprint_is_order_independent_and_verifiable(client):
+    """data_hash ignores row order, matches a chunked build, and verifies from stored rows"""
+    import pandas as pd
+    from io import StringIO
+    from diff_engine import calculate_dataset_hash, calculate_row_hashes
+    from fingerprint import DatasetFingerprint
+
+    frame = pd.read_csv(StringIO(BASE_ROLL))
+    shuffled = frame.iloc[::-1].reset_index(drop=True)
+    assert calculate_dataset_hash(frame) == calculate_dataset_hash(shuffled)
+
+    chunked = DatasetFingerprint()
+    hashes = calculate_row_hashes(frame, chunked, chunk_size=3)
+    assert hashes[0] == calculate_row_hash({**frame.iloc[0].to_dict(), 'constituency': 'Unknown'})
+    assert chunked.hexdigest() == calculate_dataset_hash(frame)
+    assert chunked.remove(hashes[:1].tolist()).hexdigest() == calculate_dataset_hash(frame.iloc[1:])
+
+    base = _upload(client, BASE_ROLL, 'base.csv')
+    revised = _upload(client, REVISED_ROLL, 'revised.csv', storage_mode='delta')
+    for upload in (base, revised):
+        result = client.get(f"/api/uploads/{upload['upload_id']}/verify").get_json()
+        assert result['verified'] is True
+        assert result['stored_row_count'] == 4
+
+    VoterRecord.query.filter_by(upload_id=base['upload_id'], voter_id='V000004').delete()
+    db.session.commit()
+    assert client.get(f"/api/uploads/{base['upload_id']}/verify").get_json()['verified'] is False
+
+    # A hash of the sorted CSV from before fingerprints cannot be checked either way
+    roll = ElectoralRoll.query.filter_by(upload_id=base['upload_id']).first()
+    roll.data_hash = 'd41d8cd98f00b204e9800998ecf8427e'
+    db.session.commit()
+    result = client.get(f"/api/uploads/{base['upload_id']}/verify").get_json()
+    assert (result['verified'], result['hash_version']) == (None, 'legacy')
+    assert client.get('/api/uploads/unknown/verify').status_code == 404
+
+
+def test_fingerprint_tree_localizes_compare(client, monkeypatch):
+    """Compares via the fingerprint trees load only differing buckets and match a full diff"""
+    import fingerprint
+    import roll_store
+    from roll_store import STORED_COLUMNS
+    from snapshot_store import roll_columns
+    from fingerprint import load_roll_tree, differing_buckets, load_bucket_rows
+
+    monkeypatch.setattr(fingerprint, 'ROLL_TREE_LEAF_SIZE', 8)
+    monkeypatch.setattr(fingerprint, 'ROLL_TREE_MAX_SHARE', 1.0)
+    header = 'voter_id,name,age,address,registration_date,constituency'
+    rows = {f'V{i:04d}': f'V{i:04d},Voter {i},{20 + i % 50},"{i} MG Road",2020-01-01,AC-{i % 3}' for i in range(1, 301)}
+    base = _upload(client, '\n'.join([header, *rows.values()]), 'base.csv')
+
+    rows['V0010'] = 'V0010,Voter 10,61,"10 MG Road",2020-01-01,AC-1'      # age changed
+    rows['V0020'] = 'V0020,Voter 20,40,"20 MG Road",2020-01-01,AC-0'      # moved constituency
+    del rows['V0150']
+    rows['V0301'] = 'V0301,Voter 301,33,"301 MG Road",2020-01-01,AC-1'
+    revised = _upload(client, '\n'.join([header, *rows.values()]), 'revised.csv')
+
+    ranges = differing_buckets(load_roll_tree(base['upload_id']), load_roll_tree(revised['upload_id']))
+    loaded = load_bucket_rows(revised['upload_id'], ranges)
+    assert 0 < len(loaded) <= 8 * len(ranges) < 100
+    assert list(loaded.columns) == STORED_COLUMNS
+
+    localized = compare_rolls(base['upload_id'], revised['upload_id'])
+    old = roll_columns(load_roll_frame(base['upload_id']), fixed_width=False)
+    new = roll_columns(load_roll_frame(revised['upload_id']), fixed_width=False)
+    full = format_diff(old, new, diff_columns(old, new))
+    assert localized['stats'] == full['stats']
+    assert localized['stats']['unchanged'] == 297
+    assert {m['voter_id']: sorted(m['changes']) for m in localized['modified']} == {'V0010': ['age'], 'V0020': ['constituency']}
+    assert [v['voter_id'] for v in localized['added']] == ['V0301']
+    assert [v['voter_id'] for v in localized['deleted']] == ['V0150']
+
+    # A delta-stored revision resolves only the voters of the differing buckets
+    delta = _upload(client, '\n'.join([header, *rows.values()]), 'delta.csv', storage_mode='delta',
+                    base_upload_id=base['upload_id'])
+    assert delta['storage_mode'] == 'delta'
+    with monkeypatch.context() as patched:
+        patched.setattr(roll_store, '_stored_rows', lambda *args, **kwargs: pytest.fail('view resolved'))
+        loaded_delta = load_bucket_rows(delta['upload_id'], ranges)
+        localized_delta = compare_rolls(base['upload_id'], delta['upload_id'])
+    assert sorted(loaded_delta['voter_id']) == sorted(loaded['voter_id'])
+    assert list(loaded_delta.columns) == STORED_COLUMNS
+    # V0020 moved out of its old bucket; its base row there is not reported as current
+    assert loaded_delta.loc[loaded_delta['voter_id'] == 'V0020', 'constituency'].tolist() == ['AC-0']
+    assert localized_delta['stats'] == full['stats']
+
+
+def test_revision_upload_against_explicit_base(client):
+    """base_upload_id stores only changes against that upload and seeds its diff"""
+    from diff_engine import peek_diff
+
+    base = _upload(client, BASE_ROLL, 'base.csv')
+    _upload(client, REVISED_ROLL, 'unrelated.csv')   # latest roll of the state, not the base
+    revision = _upload(client, REVISED_ROLL, 'revision.csv', base_upload_id=base['upload_id'])
+
+    assert revision['storage_mode'] == 'delta'
+    assert revision['base_upload_id'] == base['upload_id']
+    assert revision['stored_rows'] == 2
+    assert revision['diff']['stats']['total_added'] == 1
+    assert revision['diff']['stats']['total_modified'] == 1
+    assert peek_diff(base['upload_id'], revision['upload_id']) is not None
+    assert compare_rolls(base['upload_id'], revision['upload_id'])['stats'] == revision['diff']['stats']
+    assert sorted(load_roll_frame(revision['upload_id'])['voter_id']) == ['V000001', 'V000002', 'V000003', 'V000005']
+
+    full = _upload(client, REVISED_ROLL, 'full.csv', base_upload_id=base['upload_id'], storage_mode='full')
+    assert (full['storage_mode'], full['base_upload_id']) == ('full', None)
+    assert full['diff']['base_upload_id'] == base['upload_id']
+
+    response = client.post('/api/upload', data={'file': (BytesIO(REVISED_ROLL.encode('utf-8')), 'x.csv'),
+                                                'state': 'Delhi', 'base_upload_id': 'missing'},
+                           content_type='multipart/form-data')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Base upload not found'
+
+
+DELTA_FILE = """voter_id,name,age,address,registration_date,change
+V000005,Vikram Reddy,22,"65 MG Road, Ward 5",2022-09-30,Form 6
+V000002,Priya Patel,31,"45 Gandhi Nagar, Ward 3",2019-03-20,modify
+V000004,,,,,Form 7"""
+
+
+def test_delta_file_materializes_revision(client, monkeypatch):
+    """A delta file applied to a base gives the same roll, hash and diff as uploading the full revision"""
+    import fingerprint
+    import roll_store
+    monkeypatch.setattr(fingerprint, 'ROLL_TREE_LEAF_SIZE', 2)
+
+    base = _upload(client, BASE_ROLL, 'base.csv')
+    full = _upload(client, REVISED_ROLL, 'full.csv')
+    delta = _upload(client, DELTA_FILE, 'supplement.csv', format='delta', base_upload_id=base['upload_id'])
+
+    assert delta['delta'] == {'added': 1, 'modified': 1, 'deleted': 1}
+    assert (delta['storage_mode'], delta['stored_rows'], delta['row_count']) == ('delta', 2, 4)
+    roll = ElectoralRoll.query.filter_by(upload_id=delta['upload_id']).first()
+    assert roll.data_hash == ElectoralRoll.query.filter_by(upload_id=full['upload_id']).first().data_hash
+    # Verifying a delta roll works from row hashes, without resolving the view
+    with monkeypatch.context() as patched:
+        patched.setattr(roll_store, '_stored_rows', lambda *args, **kwargs: pytest.fail('view resolved'))
+        assert client.get(f"/api/uploads/{delta['upload_id']}/verify").get_json()['verified'] is True
+
+    expected = compare_rolls(base['upload_id'], full['upload_id'])['stats']
+    assert delta['diff']['stats'] == expected
+    from diff_engine import _diff_cache
+    _diff_cache.clear()
+    assert compare_rolls(base['upload_id'], delta['upload_id'])['stats'] == expected
+    assert compare_rolls(full['upload_id'], delta['upload_id'])['stats']['unchanged'] == 4
+
+    conflict = client.post('/api/upload', data={
+        'file': (BytesIO(b'voter_id,name,age,address,registration_date,change\n'
+                         b'V000001,Raj Sharma,25,12 MG Road,2020-01-15,add\nV000009,,,,,delete'), 'bad.csv'),
+        'state': 'Delhi', 'format': 'delta', 'base_upload_id': base['upload_id']
+    }, content_type='multipart/form-data').get_json()
+    assert conflict['error'] == 'Delta does not apply to base upload'
+    assert conflict['voter_ids'] == {'add_existing': ['V000001'], 'delete_missing': ['V000009']}
+
+
+def test_address_parts_fit_their_columns():
+    """Unbounded house numbers and streets are cut to the VoterRecord column widths"""
+    from utils.address import ADDRESS_WIDTHS, canonicalize_address
+
+    address = '1' * 40 + '/2 ' + 'Long Street ' * 40 + 'Ward ' + '9' * 30
+    _, ward, house_number, street = canonicalize_address(address)
+    assert len(ward) == ADDRESS_WIDTHS['ward'] and ward.startswith('Ward 999')
+    assert len(house_number) == ADDRESS_WIDTHS['house_number']
+    assert len(street) == ADDRESS_WIDTHS['street']
@@ -0,0 +1,78 @@
+"""
+Test Serialization
+Owner: Vansh (Backend Developer)
+Tests the JSON provider, response compression and Server-Timing
+"""
+
+import gzip
+import json
+import zlib
+import pytest
+import os
+import sys
+from datetime import datetime
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serialization
+from app import app
+from database import db
+from serialization import dumps_bytes
+
+
+@pytest.fixture
+def client():
+    """Create test client"""
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+
+    with app.app_context():
+        db.create_all()
+        yield app.test_client()
+        db.drop_all()
+
+
+PAYLOAD = {
+    'score': np.float64(72.5),
+    'counts': np.array([3, 1, 4], dtype=np.int64),
+    'flagged': np.bool_(True),
+    'at': datetime(2026, 2, 15, 11, 0),
+    'name': 'राज शर्मा',
+}
+
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_encoders_agree(monkeypatch, use_orjson):
+    """orjson and the stdlib fallback give the same document, numpy values included"""
+    if use_orjson and not serialization.ORJSON_AVAILABLE:
+        pytest.skip('orjson not installed')
+    monkeypatch.setattr(serialization, 'ORJSON_AVAILABLE', use_orjson)
+    assert json.loads(dumps_bytes(PAYLOAD)) == {
+        'at': 'Sun, 15 Feb 2026 11:00:00 GMT',
+        'counts': [3, 1, 4],
+        'flagged': True,
+        'name': 'राज शर्मा',
+        'score': 72.5,
+    }
+
+
+@pytest.mark.parametrize('encoding, decompress', [('gzip', gzip.decompress), ('deflate', zlib.decompress)])
+def test_large_responses_are_compressed(client, monkeypatch, encoding, decompress):
+    monkeypatch.setattr(serialization, 'COMPRESS_MIN_SIZE', 64)
+    plain = client.get('/')
+    assert 'Content-Encoding' not in plain.headers
+
+    response = client.get('/', headers={'Accept-Encoding': encoding})
+    assert response.headers['Content-Encoding'] == encoding
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert json.loads(decompress(response.data)) == plain.get_json()
+    assert 'compress;dur=' in response.headers['Server-Timing']
+
+
+def test_small_responses_stay_plain(client):
+    response = client.get('/health', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    timing = response.headers['Server-Timing']
+    assert timing.startswith('compute;dur=') and 'serialize;dur=' in timing
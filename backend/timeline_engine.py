@@ -0,0 +1,84 @@
+"""
+Timeline Engine - Real change time series across a chain of uploads
+Owner: Vansh (Backend Developer)
+
+Uploads of a state are ordered by uploaded_at and diffed pairwise
+(r0 -> r1, r1 -> r2, ...). Each roll is loaded and sorted once: the "new"
+side of one step is reused as the "old" side of the next. Per-step
+constituency counts are cached by upload pair, so extending the chain with
+a new upload only computes the last step.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from models import ElectoralRoll
+from diff_engine import CHANGE_TYPES, change_frame, diff_columns, peek_diff, summarize_changes
+from snapshot_store import load_roll_columns
+
+TIMELINE_CACHE_SIZE = int(os.getenv('TIMELINE_CACHE_SIZE', 1024))
+_step_cache = OrderedDict()
+_step_cache_lock = threading.Lock()
+
+
+def get_state_chain(state, start_upload_id=None, end_upload_id=None):
+    """Uploads for a state ordered by uploaded_at, optionally clipped to [start, end]"""
+    rolls = ElectoralRoll.query.filter_by(state=state).order_by(ElectoralRoll.uploaded_at.asc(), ElectoralRoll.id.asc()).all()
+    ids = [r.upload_id for r in rolls]
+    start = ids.index(start_upload_id) if start_upload_id in ids else 0
+    end = ids.index(end_upload_id) + 1 if end_upload_id in ids else len(rolls)
+    return rolls[start:end]
+
+
+def _cached_step(key):
+    with _step_cache_lock:
+        summary = _step_cache.get(key)
+        if summary is not None:
+            _step_cache.move_to_end(key)
+        return summary
+
+
+def _store_step(key, summary):
+    with _step_cache_lock:
+        _step_cache[key] = summary
+        while len(_step_cache) > TIMELINE_CACHE_SIZE:
+            _step_cache.popitem(last=False)
+
+
+def build_timeline(rolls, constituency=None):
+    """
+    Compute consecutive pairwise diffs over an ordered chain of rolls.
+    Returns one point per step with totals and per-constituency counts.
+    """
+    points = []
+    previous_columns = None
+    for prev, cur in zip(rolls, rolls[1:]):
+        key = (prev.upload_id, cur.upload_id)
+        summary = _cached_step(key)
+        current_columns = None
+        
+        if summary is None:
+            entry = peek_diff(*key)
+            if entry is not None:
+                summary = summarize_changes(entry['changes'])
+            else:
+                old = previous_columns if previous_columns is not None else load_roll_columns(prev.upload_id)
+                current_columns = load_roll_columns(cur.upload_id)
+                summary = summarize_changes(change_frame(old, current_columns, diff_columns(old, current_columns)))
+            _store_step(key, summary)
+        
+        # Keep the sorted columns only when the next step can reuse them
+        previous_columns = current_columns
+        
+        regions = {constituency: summary.get(constituency, dict.fromkeys(CHANGE_TYPES, 0))} if constituency else summary
+        point = {
+            'upload_id': cur.upload_id,
+            'previous_upload_id': prev.upload_id,
+            'uploaded_at': cur.uploaded_at.isoformat(),
+            'month': cur.uploaded_at.strftime('%b %Y'),
+            'constituencies': regions
+        }
+        for change in CHANGE_TYPES:
+            point[change] = sum(counts[change] for counts in regions.values())
+        points.append(point)
+    return points
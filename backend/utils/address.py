@@ -0,0 +1,85 @@
+"""Address Canonicalization - Parse voter addresses once at ingest
+
+Every address is reduced to:
+    address_normalized   lowercase, punctuation-free, single-spaced, common
+                         abbreviations expanded ('rd' -> 'road')
+    ward                 'Ward <n>' or None
+    house_number         leading house / plot number, e.g. '12', '45a', '7/2'
+    street               address_normalized without house number and ward clause
+
+ward, house_number and street are cut to ADDRESS_WIDTHS, the widths of their
+VoterRecord columns, so a pathological address cannot fail the roll's insert.
+These are stored on VoterRecord so forensic engines read the columns instead
+of re-parsing text. All patterns are compiled once, and canonicalize_addresses
+parses each distinct address of a roll only once.
+"""
+
+from functools import lru_cache
+import re
+import pandas as pd
+
+ADDRESS_COLUMNS = ['address_normalized', 'ward', 'house_number', 'street']
+# Column widths of the bounded parts (models.VoterRecord)
+ADDRESS_WIDTHS = {'ward': 20, 'house_number': 20, 'street': 255}
+
+WARD_PATTERN = re.compile(r'ward\s*[-:.]?\s*(\d+)', re.IGNORECASE)
+_WARD_CLAUSE = re.compile(r'\bward\s*(\d+)\b')
+_HOUSE = re.compile(r'^(?:(?:house|h|plot|flat|door)\s*no\s*)?(\d+[a-z]?(?:/\d+[a-z]?)*)\b')
+_DOTS = re.compile(r'\.')
+_PUNCTUATION = re.compile(r'[^\w\s/]|_')
+_SPACES = re.compile(r'\s+')
+
+# Applied to whole tokens of the normalized address
+ABBREVIATIONS = {
+    'rd': 'road',
+    'st': 'street',
+    'ngr': 'nagar',
+    'mkt': 'market',
+    'apt': 'apartment',
+    'opp': 'opposite',
+    'nr': 'near',
+    'sec': 'sector',
+}
+_ABBREVIATION = re.compile(r'\b(' + '|'.join(re.escape(k) for k in ABBREVIATIONS) + r')\b')
+
+
+def _expand(match):
+    return ABBREVIATIONS[match.group(1)]
+
+
+def canonicalize_address(address):
+    """(address_normalized, ward, house_number, street) for one raw address"""
+    if not isinstance(address, str) or not address:
+        return ('', None, None, '')
+    # 'M.G. Road' -> 'mg road': dots join initials, other punctuation separates words
+    text = _PUNCTUATION.sub(' ', _DOTS.sub('', address.lower()))
+    text = _ABBREVIATION.sub(_expand, _SPACES.sub(' ', text).strip())
+
+    ward = WARD_PATTERN.search(address)
+    house = _HOUSE.match(text)
+    street = _HOUSE.sub(' ', _WARD_CLAUSE.sub(' ', text), count=1)
+    return (
+        text,
+        f"Ward {ward.group(1)}"[:ADDRESS_WIDTHS['ward']] if ward else None,
+        house.group(1)[:ADDRESS_WIDTHS['house_number']] if house else None,
+        _SPACES.sub(' ', street).strip()[:ADDRESS_WIDTHS['street']]
+    )
+
+
+def canonicalize_addresses(addresses):
+    """
+    Canonical address columns for a sequence of raw addresses.
+    Each distinct address is parsed once. Returns a DataFrame with
+    ADDRESS_COLUMNS, aligned with the input order.
+    """
+    codes, uniques = pd.factorize(pd.Series(addresses, dtype=object), use_na_sentinel=False)
+    parsed = pd.DataFrame([canonicalize_address(a) for a in uniques], columns=ADDRESS_COLUMNS, dtype=object)
+    if parsed.empty:
+        return pd.DataFrame(columns=ADDRESS_COLUMNS, dtype=object)
+    return parsed.take(codes).reset_index(drop=True)
+
+
+@lru_cache(maxsize=65536)
+def normalize_address(address):
+    """address_normalized for a single address (cached; rolls repeat addresses heavily)"""
+    return canonicalize_address(address)[0]
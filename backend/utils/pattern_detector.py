@@ -1,41 +1,259 @@
-"""Pattern Detector - Detect suspicious patterns"""
+"""Pattern Detector - Detect suspicious patterns
 
-def detect_suspicious_patterns(diff_result):
-    alerts = []
-    added = diff_result.get('added', [])
-    deleted = diff_result.get('deleted', [])
+Alerts are produced by declarative rules evaluated over columnar diff data.
+Each change type (added / deleted / modified) is turned into one DataFrame,
+and every distinct aggregation (change type + group-by fields + date window)
+is computed once and shared by all rules that need it, so adding rules does
+not add passes over the data.
+
+Rule keys:
+    type, severity, message    alert fields; message is formatted with count,
+                               rate and the group values (for burst also
+                               window_days, start, end, expected, z_score);
+                               other placeholders are rejected at load time
+    change                     'added', 'deleted' or 'modified'
+    kind                       'count'       total rows of that change type
+                               'group_count' rows per group_by value(s)
+                               'rate'        count / stats[of]
+                               'burst'       sliding-window registration bursts
+                                             (forensics.burst), threshold is the
+                                             minimum window count
+    group_by                   list of fields for group_count; for burst at most
+                               one field (e.g. ['constituency'])
+    windows, min_z             burst window sizes in days and minimum z-score
+    window_days                bucket registration_date into fixed windows of
+                               this many days before grouping (group_count)
+    of                         stats key used as denominator for rate
+    threshold                  alert when value > threshold
+    labels                     rename group fields in the alert, e.g.
+                               {'registration_date': 'date'}
+"""
+
+import os
+import json
+import string
+import numpy as np
+import pandas as pd
+from forensics.burst import BurstDetectionEngine, to_day_numbers
+
+DEFAULT_RULES = [
+    {
+        'type': 'BULK_DELETION',
+        'severity': 'HIGH',
+        'change': 'deleted',
+        'kind': 'count',
+        'threshold': 100,
+        'message': '{count} voters deleted in single operation'
+    },
+    {
+        'type': 'BULK_ADDITION',
+        'severity': 'MEDIUM',
+        'change': 'added',
+        'kind': 'count',
+        'threshold': 100,
+        'message': '{count} new voters added'
+    },
+    {
+        'type': 'SAME_DAY_REGISTRATION',
+        'severity': 'HIGH',
+        'change': 'added',
+        'kind': 'group_count',
+        'group_by': ['registration_date'],
+        'threshold': 50,
+        'labels': {'registration_date': 'date'},
+        'message': '{count} voters registered on same day: {registration_date}'
+    },
+    {
+        'type': 'REGISTRATION_BURST',
+        'severity': 'HIGH',
+        'change': 'added',
+        'kind': 'burst',
+        'group_by': ['constituency'],
+        'windows': [7, 30],
+        'min_z': 3.0,
+        'threshold': 50,
+        'message': '{count} voters registered within {window_days} days ({start} to {end}) in {constituency}, z-score {z_score}'
+    },
+]
+
+RULE_KINDS = ('count', 'group_count', 'rate', 'burst')
+CHANGE_TYPES = ('added', 'deleted', 'modified')
+# Message fields every rule supplies, and those added per burst window
+MESSAGE_FIELDS = ('count', 'rate')
+BURST_FIELDS = ('window_days', 'start', 'end', 'expected', 'z_score')
+
+# path -> (mtime_ns, size, rules); the rules file is re-read only when it changes
+_rules_cache = {}
+
+
+def load_rules():
+    """Rules from the JSON file at PATTERN_RULES_PATH, or DEFAULT_RULES"""
+    path = os.getenv('PATTERN_RULES_PATH')
+    if not path:
+        return DEFAULT_RULES
+    stat = os.stat(path)
+    cached = _rules_cache.get(path)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    with open(path, encoding='utf-8') as f:
+        rules = validate_rules(json.load(f))
+    _rules_cache[path] = (stat.st_mtime_ns, stat.st_size, rules)
+    return rules
+
+
+def message_fields(rule):
+    """Fields a rule's message may use"""
+    fields = set(MESSAGE_FIELDS)
+    if rule['kind'] == 'group_count':
+        fields.update(rule['group_by'])
+    elif rule['kind'] == 'burst':
+        fields.update(BURST_FIELDS)
+        fields.add((rule.get('group_by') or ['constituency'])[0])
+    return fields
+
+
+def _validate_message(rule):
+    try:
+        placeholders = [field for _, field, _, _ in string.Formatter().parse(rule['message']) if field is not None]
+    except ValueError as e:
+        raise ValueError(f"Rule {rule['type']}: malformed message: {e}")
+    allowed = message_fields(rule)
+    # '{group.attr}' and '{group[0]}' are looked up on the field before the first '.' or '['
+    unknown = sorted({p for p in placeholders if p.split('.')[0].split('[')[0] not in allowed})
+    if unknown:
+        raise ValueError(f"Rule {rule['type']}: message uses unknown fields {', '.join(unknown) or '{}'}; "
+                         f"available: {', '.join(sorted(allowed))}")
+
+
+def validate_rules(rules):
+    """Raise ValueError for malformed rules; returns the rules unchanged"""
+    for rule in rules:
+        for key in ('type', 'change', 'kind', 'threshold'):
+            if key not in rule:
+                raise ValueError(f"Rule {rule.get('type', '?')} is missing '{key}'")
+        if rule['change'] not in CHANGE_TYPES:
+            raise ValueError(f"Rule {rule['type']}: change must be one of {', '.join(CHANGE_TYPES)}")
+        if rule['kind'] not in RULE_KINDS:
+            raise ValueError(f"Rule {rule['type']}: kind must be one of {', '.join(RULE_KINDS)}")
+        group_by = rule.get('group_by') or []
+        if not isinstance(group_by, (list, tuple)) or not all(isinstance(field, str) for field in group_by):
+            raise ValueError(f"Rule {rule['type']}: group_by must be a list of field names")
+        if rule['kind'] == 'group_count' and not group_by:
+            raise ValueError(f"Rule {rule['type']}: group_count needs group_by")
+        if rule['kind'] == 'rate' and not rule.get('of'):
+            raise ValueError(f"Rule {rule['type']}: rate needs 'of'")
+        if rule['kind'] == 'burst' and len(group_by) > 1:
+            raise ValueError(f"Rule {rule['type']}: burst groups by at most one field")
+        if 'message' in rule:
+            _validate_message(rule)
+    return rules
+
+
+class _DiffColumns:
+    """Lazily built per-change-type frames and memoized aggregations over them"""
+
+    def __init__(self, diff_result):
+        self.diff_result = diff_result
+        self.frames = {}
+        self.aggregates = {}
+
+    def frame(self, change):
+        if change not in self.frames:
+            records = self.diff_result.get(change, [])
+            if change == 'modified':
+                frame = pd.DataFrame.from_records([m['new'] for m in records])
+                frame['change_mask'] = [m.get('change_mask', 0) for m in records]
+            else:
+                frame = pd.DataFrame.from_records(records)
+            self.frames[change] = frame
+        return self.frames[change]
+
+    def group_counts(self, change, group_by, window_days=None):
+        key = (change, tuple(group_by), window_days)
+        if key not in self.aggregates:
+            frame = self.frame(change)
+            if frame.empty or any(field not in frame.columns for field in group_by):
+                self.aggregates[key] = pd.Series(dtype=np.int64)
+                return self.aggregates[key]
+            if window_days and 'registration_date' in group_by:
+                days = pd.to_datetime(frame['registration_date'], format='%Y-%m-%d', errors='coerce')
+                window_start = days.dt.floor(f'{int(window_days)}D').dt.strftime('%Y-%m-%d')
+                frame = frame.assign(registration_date=window_start)
+            self.aggregates[key] = frame.groupby(list(group_by), dropna=True).size()
+        return self.aggregates[key]
+
+    def day_numbers(self, change):
+        """registration_date of a change type as (int day numbers, valid mask), parsed once"""
+        key = (change, 'days')
+        if key not in self.aggregates:
+            frame = self.frame(change)
+            dates = frame['registration_date'] if 'registration_date' in frame.columns else []
+            self.aggregates[key] = to_day_numbers(dates)
+        return self.aggregates[key]
+
+    def bursts(self, change, group_field, windows, min_z, min_count):
+        key = (change, 'bursts', group_field, tuple(windows), min_z, min_count)
+        if key not in self.aggregates:
+            frame = self.frame(change)
+            groups = frame[group_field] if group_field and group_field in frame.columns else None
+            days, valid = self.day_numbers(change)
+            engine = BurstDetectionEngine(windows=windows, min_z=min_z, min_count=min_count)
+            self.aggregates[key] = engine.find_bursts(days, groups, valid=valid,
+                                                      group_field=group_field or 'constituency')
+        return self.aggregates[key]
+
+
+def _alert(rule, count, values=None, rate=None):
+    # Group keys come out of pandas as numpy scalars; alerts are serialized as JSON
+    values = {k: (v.item() if hasattr(v, 'item') else v) for k, v in (values or {}).items()}
+    alert = {
+        'type': rule['type'],
+        'severity': rule.get('severity', 'MEDIUM'),
+        'message': rule.get('message', '{count} matching voters').format(count=count, rate=rate, **values),
+        'count': int(count)
+    }
+    labels = rule.get('labels', {})
+    for field, value in values.items():
+        alert[labels.get(field, field)] = value
+    if rate is not None:
+        alert['rate'] = round(rate, 4)
+    return alert
+
+
+def detect_suspicious_patterns(diff_result, rules=None):
+    rules = load_rules() if rules is None else validate_rules(rules)
     stats = diff_result.get('stats', {})
-    
-    if stats['total_deleted'] > 100:
-        alerts.append({
-            'type': 'BULK_DELETION',
-            'severity': 'HIGH',
-            'message': f'{stats["total_deleted"]} voters deleted in single operation',
-            'count': stats['total_deleted']
-        })
-    
-    if stats['total_added'] > 100:
-        alerts.append({
-            'type': 'BULK_ADDITION',
-            'severity': 'MEDIUM',
-            'message': f'{stats["total_added"]} new voters added',
-            'count': stats['total_added']
-        })
-    
-    if added:
-        registration_dates = [r['registration_date'] for r in added]
-        date_counts = {}
-        for date in registration_dates:
-            date_counts[date] = date_counts.get(date, 0) + 1
-        
-        for date, count in date_counts.items():
-            if count > 50:
-                alerts.append({
-                    'type': 'SAME_DAY_REGISTRATION',
-                    'severity': 'HIGH',
-                    'message': f'{count} voters registered on same day: {date}',
-                    'date': date,
-                    'count': count
-                })
-    
+    columns = _DiffColumns(diff_result)
+    alerts = []
+
+    for rule in rules:
+        change, kind, threshold = rule['change'], rule['kind'], rule['threshold']
+
+        if kind == 'count':
+            count = stats.get(f'total_{change}', len(diff_result.get(change, [])))
+            if count > threshold:
+                alerts.append(_alert(rule, count))
+
+        elif kind == 'rate':
+            count = stats.get(f'total_{change}', len(diff_result.get(change, [])))
+            denominator = stats.get(rule['of']) or 0
+            rate = count / denominator if denominator else 0.0
+            if rate > threshold:
+                alerts.append(_alert(rule, count, rate=rate))
+
+        elif kind == 'burst':
+            group_by = rule.get('group_by') or [None]
+            bursts = columns.bursts(change, group_by[0], rule.get('windows', (1, 7, 30)), rule.get('min_z', 3.0), threshold)
+            for burst in bursts:
+                values = {k: v for k, v in burst.items() if k != 'count'}
+                alerts.append(_alert(rule, burst['count'], values))
+
+        else:
+            group_by = list(rule['group_by'])
+            counts = columns.group_counts(change, group_by, rule.get('window_days'))
+            hits = counts[counts > threshold]
+            for group_key, count in hits.items():
+                group_key = group_key if isinstance(group_key, tuple) else (group_key,)
+                alerts.append(_alert(rule, count, dict(zip(group_by, group_key))))
+
     return alerts
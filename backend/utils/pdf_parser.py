@@ -2,11 +2,34 @@
 PDF to CSV Parser for Electoral Roll Data
 Owner: Vansh (Backend Developer)
 Converts PDF electoral roll files to CSV format compatible with backend
+
+Text extraction is page-parallel: iter_pdf_voters shards page ranges across a
+process pool (each worker opens the PDF once for its shard) and yields voter
+dicts as shards finish, so a multi-thousand-page roll never sits in memory as
+one text blob. Per-page timings and failures are collected in an
+ExtractionReport.
+
+Each page is opened once and tried as a table first: the column layout
+(which column holds voter_id, name, ...) is learned from the first pages and
+applied to every later table with column selection instead of row-by-row
+mapping. Pages whose tables do not fit the layout fall back to text parsing
+individually.
+
+convert_pdf_to_csv checkpoints after every page batch: rows are appended to
+the output CSV and a manifest records how far it got, so a rerun after a
+crash resumes from the next batch and first retries the pages that failed. Parsed pages are also cached by a hash of
+their content streams and resources (fonts, XObjects), so unchanged pages of a
+re-published PDF are reused.
 """
 
 import pandas as pd
 import re
-from typing import List, Dict, Optional
+import time
+import json
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Iterator, Tuple, Callable
 import sys
 import os
 
@@ -30,17 +53,62 @@ except ImportError:
     TABULA_AVAILABLE = False
 
 
+# Processes used by iter_pdf_voters (0 = one per CPU)
+PDF_PARSE_WORKERS = int(os.getenv('PDF_PARSE_WORKERS', 0))
+PAGES_PER_SHARD = int(os.getenv('PDF_PAGES_PER_SHARD', 25))
+# Workers are started fresh rather than forked: the parser runs on a job thread of a
+# threaded server, and a fork would copy held locks (DB pool, SSE queues) into the child
+PDF_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+# Parsed voter dicts converted to a DataFrame at a time by read_pdf_frame
+PDF_FRAME_BATCH_ROWS = 10000
+
+REQUIRED_COLUMNS = ['voter_id', 'name', 'age', 'address', 'registration_date']
+MANIFEST_VERSION = 1
+
+# Common line layouts in electoral roll PDFs, compiled once
+VOTER_LINE_PATTERNS = [
+    # Pattern 1: Voter ID, Name, Age, Address, Date
+    re.compile(r'(\w+)\s+([A-Z][a-zA-Z\s\.]+?)\s+(\d+)\s+(.+?)\s+(\d{4}-\d{2}-\d{2})'),
+    # Pattern 2: Serial, Name, Father/Husband, Age, Address
+    re.compile(r'(\d+)\s+([A-Z][a-zA-Z\s\.]+?)\s+([A-Z][a-zA-Z\s\.]+?)?\s+(\d+)\s+(.+?)\s+(\d{4}-\d{2}-\d{2})'),
+    # Pattern 3: EPIC No, Name, Age, Address, Date
+    re.compile(r'([A-Z]{2}\d{7})\s+([A-Z][a-zA-Z\s\.]+?)\s+(\d+)\s+(.+?)\s+(\d{4}-\d{2}-\d{2})'),
+]
+
+# Lines without a YYYY-MM-DD date cannot match any pattern
+_HAS_DATE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+# Pages sampled to learn the table column layout
+LAYOUT_SAMPLE_PAGES = int(os.getenv('PDF_LAYOUT_SAMPLE_PAGES', 3))
+
+# Header cell keywords per field; name headers mentioning a relative are skipped
+HEADER_KEYWORDS = {
+    'voter_id': ('epic', 'voter id', 'voter_id', 'id no', 'card no'),
+    'name': ('name',),
+    'age': ('age',),
+    'address': ('address', 'house'),
+    'registration_date': ('date', 'registration'),
+}
+RELATION_HEADER_HINTS = ('father', 'husband', 'relation', 'guardian', 'mother')
+
+# Defaults for fields a table layout does not provide
+TABLE_FIELD_DEFAULTS = {'age': '0', 'address': '', 'registration_date': '2020-01-01'}
+
+_CELL_PATTERNS = {
+    'voter_id': re.compile(r'^[A-Z]{2,3}\d{6,8}$'),
+    'age': re.compile(r'^\d{1,3}$'),
+    'registration_date': re.compile(r'^\d{4}-\d{2}-\d{2}$'),
+}
+
+
 def extract_text_from_pdf_pypdf2(pdf_path: str) -> str:
     """Extract text from PDF using PyPDF2"""
     if not PDF2_AVAILABLE:
         raise ImportError("PyPDF2 is not installed. Install with: pip install PyPDF2")
     
-    text = ""
     with open(pdf_path, 'rb') as file:
         pdf_reader = PyPDF2.PdfReader(file)
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-    return text
+        return "\n".join(page.extract_text() or "" for page in pdf_reader.pages) + "\n"
 
 
 def extract_text_from_pdf_pdfplumber(pdf_path: str) -> str:
@@ -48,13 +116,8 @@ def extract_text_from_pdf_pdfplumber(pdf_path: str) -> str:
     if not PDFPLUMBER_AVAILABLE:
         raise ImportError("pdfplumber is not installed. Install with: pip install pdfplumber")
     
-    text = ""
     with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
-    return text
+        return "".join(page_text + "\n" for page_text in (page.extract_text() for page in pdf.pages) if page_text)
 
 
 def extract_tables_from_pdf(pdf_path: str) -> List[pd.DataFrame]:
@@ -78,18 +141,11 @@ def parse_voter_line(line: str) -> Optional[Dict[str, str]]:
     Parse a line of text to extract voter information
     Handles various formats of electoral roll data
     """
-    # Common patterns in electoral roll PDFs
-    patterns = [
-        # Pattern 1: Voter ID, Name, Age, Address, Date
-        r'(\w+)\s+([A-Z][a-zA-Z\s\.]+?)\s+(\d+)\s+(.+?)\s+(\d{4}-\d{2}-\d{2})',
-        # Pattern 2: Serial, Name, Father/Husband, Age, Address
-        r'(\d+)\s+([A-Z][a-zA-Z\s\.]+?)\s+([A-Z][a-zA-Z\s\.]+?)?\s+(\d+)\s+(.+?)\s+(\d{4}-\d{2}-\d{2})',
-        # Pattern 3: EPIC No, Name, Age, Address, Date
-        r'([A-Z]{2}\d{7})\s+([A-Z][a-zA-Z\s\.]+?)\s+(\d+)\s+(.+?)\s+(\d{4}-\d{2}-\d{2})',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, line)
+    if not _HAS_DATE.search(line):
+        return None
+    
+    for pattern in VOTER_LINE_PATTERNS:
+        match = pattern.search(line)
         if match:
             groups = match.groups()
             if len(groups) >= 5:
@@ -104,6 +160,369 @@ def parse_voter_line(line: str) -> Optional[Dict[str, str]]:
     return None
 
 
+def parse_page_text(text: Optional[str]) -> List[Dict[str, str]]:
+    """Voter dicts found in the text of one page"""
+    if not text:
+        return []
+    return [voter for voter in map(parse_voter_line, text.split('\n')) if voter]
+
+
+def _header_layout(row: List) -> Optional[Dict[str, int]]:
+    """Field -> column index from a header row, if at least voter_id and name are recognized"""
+    columns = {}
+    for index, cell in enumerate(row):
+        label = ' '.join(str(cell or '').lower().split())
+        for field, keywords in HEADER_KEYWORDS.items():
+            if field in columns or not any(k in label for k in keywords):
+                continue
+            if field == 'name' and any(h in label for h in RELATION_HEADER_HINTS):
+                continue
+            columns[field] = index
+            break
+    return columns if 'voter_id' in columns and 'name' in columns else None
+
+
+def _content_layout(rows: List[List]) -> Optional[Dict[str, int]]:
+    """Field -> column index inferred from cell contents of header-less tables"""
+    frame = pd.DataFrame(rows).fillna('').astype(str).apply(lambda col: col.str.strip())
+    columns = {}
+    for field, pattern in _CELL_PATTERNS.items():
+        share = {c: frame[c].str.match(pattern).mean() for c in frame.columns if c not in columns.values()}
+        best = max(share, key=share.get, default=None)
+        if best is not None and share[best] >= 0.8:
+            columns[field] = best
+    
+    # Remaining text columns: leftmost is the name, the longest is the address
+    text_cols = [c for c in frame.columns if c not in columns.values() and frame[c].str.contains('[A-Za-z]').mean() >= 0.8]
+    if text_cols:
+        columns['name'] = text_cols[0]
+        if len(text_cols) > 1:
+            columns['address'] = max(text_cols[1:], key=lambda c: frame[c].str.len().mean())
+    return columns if 'voter_id' in columns and 'name' in columns else None
+
+
+def learn_table_layout(tables: List[List[List]]) -> Optional[Dict]:
+    """
+    Learn the column layout of a roll's tables from a sample of pages.
+    
+    Returns {'width', 'columns': {field: index}, 'header': [cells] or None}, or None
+    when no layout can be identified. Tables with at least five columns and no
+    recognizable header fall back to the positional order
+    voter_id, name, age, address, registration_date.
+    """
+    tables = [t for t in tables if t and len(t[0]) >= 3]
+    if not tables:
+        return None
+    
+    for table in tables:
+        columns = _header_layout(table[0])
+        if columns:
+            return {'width': len(table[0]), 'columns': columns, 'header': [str(c or '') for c in table[0]]}
+    
+    # Header-less: use the most common table width
+    width = pd.Series([len(t[0]) for t in tables]).mode()[0]
+    rows = [row for t in tables if len(t[0]) == width for row in t][:500]
+    columns = _content_layout(rows)
+    if columns is None and width >= 5:
+        columns = {field: index for index, field in enumerate(REQUIRED_COLUMNS)}
+    return {'width': int(width), 'columns': columns, 'header': None} if columns else None
+
+
+def apply_table_layout(tables: List[List[List]], layout: Dict) -> List[Dict[str, str]]:
+    """Voter dicts from a page's tables using a learned layout; tables of another width are ignored"""
+    rows = [row for table in tables if table and len(table[0]) == layout['width'] for row in table]
+    if not rows:
+        return []
+    
+    frame = pd.DataFrame(rows)
+    voters = pd.DataFrame({
+        field: frame[index].fillna('').astype(str).str.replace('\n', ' ', regex=False).str.strip()
+        for field, index in layout['columns'].items()
+    })
+    if layout['header']:
+        # Header rows repeat on every page
+        voters = voters[voters['voter_id'] != layout['header'][layout['columns']['voter_id']].strip()]
+    voters = voters[(voters['voter_id'] != '') & (voters['name'] != '')]
+    for field, default in TABLE_FIELD_DEFAULTS.items():
+        if field not in voters.columns:
+            voters[field] = default
+    return voters[REQUIRED_COLUMNS].to_dict('records')
+
+
+class ExtractionReport:
+    """Per-page timings and failures of one PDF extraction"""
+    
+    def __init__(self, total_pages: int = 0):
+        self.total_pages = total_pages
+        self.page_seconds = {}
+        self.failed_pages = {}
+        self.cached_pages = 0
+        self.table_pages = 0
+        self.voter_count = 0
+        self.started_at = time.perf_counter()
+    
+    @property
+    def pages_done(self) -> int:
+        return len(self.page_seconds) + len(self.failed_pages)
+    
+    def record(self, page_number: int, seconds: float, voters: int, error: Optional[str] = None,
+               cached: bool = False, method: Optional[str] = None):
+        self.cached_pages += int(cached)
+        self.table_pages += int(method == 'table')
+        if error is None:
+            self.page_seconds[page_number] = seconds
+        else:
+            self.failed_pages[page_number] = error
+        self.voter_count += voters
+    
+    def to_dict(self) -> Dict:
+        timings = list(self.page_seconds.values())
+        return {
+            'total_pages': self.total_pages,
+            'pages_done': self.pages_done,
+            'failed_count': len(self.failed_pages),
+            'failed_pages': dict(sorted(self.failed_pages.items())),
+            'cached_pages': self.cached_pages,
+            'table_pages': self.table_pages,
+            'voter_count': self.voter_count,
+            'elapsed_seconds': round(time.perf_counter() - self.started_at, 3),
+            'mean_page_seconds': round(sum(timings) / len(timings), 4) if timings else 0,
+            'slowest_pages': sorted(self.page_seconds.items(), key=lambda item: item[1], reverse=True)[:5]
+        }
+
+
+def pdf_page_count(pdf_path: str) -> int:
+    if not PDFPLUMBER_AVAILABLE:
+        raise ImportError("pdfplumber is not installed. Install with: pip install pdfplumber")
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def inspect_pdf(pdf_path: str, sample_pages: int = None) -> Tuple[int, Optional[Dict]]:
+    """Page count and the table layout learned from the first pages, in one open"""
+    if not PDFPLUMBER_AVAILABLE:
+        raise ImportError("pdfplumber is not installed. Install with: pip install pdfplumber")
+    sample_pages = LAYOUT_SAMPLE_PAGES if sample_pages is None else sample_pages
+    tables = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages[:sample_pages]:
+            try:
+                tables.extend(page.extract_tables())
+            except Exception as e:
+                print(f"Layout sampling skipped page {page.page_number}: {e}")
+            finally:
+                page.close()
+        return len(pdf.pages), learn_table_layout(tables)
+
+
+def parse_page(page, layout: Optional[Dict]) -> Tuple[List[Dict[str, str]], str]:
+    """Voters of one open pdfplumber page: table layout first, page text as fallback"""
+    if layout:
+        voters = apply_table_layout(page.extract_tables(), layout)
+        if voters:
+            return voters, 'table'
+    return parse_page_text(page.extract_text()), 'text'
+
+
+def _digest_pdf_object(digest, obj, seen: set):
+    """Feed a resolved PDF object into digest: dicts by sorted key, streams by their attributes and data"""
+    from pdfminer.pdftypes import PDFObjRef, PDFStream
+    from pdfminer.psparser import PSLiteral
+
+    if isinstance(obj, PDFObjRef):
+        # Shared fonts and XObjects are digested once; later references only name them
+        if obj.objid in seen:
+            digest.update(f'ref {obj.objid};'.encode())
+            return
+        seen.add(obj.objid)
+        obj = obj.resolve()
+    if isinstance(obj, PDFStream):
+        _digest_pdf_object(digest, obj.attrs, seen)
+        digest.update(obj.get_data())
+    elif isinstance(obj, dict):
+        for key in sorted(obj, key=str):
+            digest.update(f'/{key};'.encode())
+            _digest_pdf_object(digest, obj[key], seen)
+    elif isinstance(obj, (list, tuple)):
+        digest.update(b'[')
+        for item in obj:
+            _digest_pdf_object(digest, item, seen)
+        digest.update(b']')
+    elif isinstance(obj, PSLiteral):
+        digest.update(f'/{obj.name};'.encode())
+    elif isinstance(obj, bytes):
+        digest.update(obj)
+    else:
+        digest.update(f'{obj!r};'.encode())
+
+
+def _page_content_hash(page) -> str:
+    """
+    sha256 of a page's media box, content streams and resources. Fonts (with
+    their encodings and ToUnicode maps) and Form/Image XObjects are part of the
+    hash, so a page that draws the same operators with different glyph mappings
+    or a changed form is parsed again. Still cheap compared to layout analysis.
+    """
+    from pdfminer.pdftypes import resolve1
+
+    digest = hashlib.sha256(repr(page.mediabox).encode())
+    for stream in page.page_obj.contents:
+        digest.update(resolve1(stream).get_data())
+    digest.update(b'/Resources;')
+    _digest_pdf_object(digest, page.page_obj.resources or {}, set())
+    return digest.hexdigest()
+
+
+def _cached_page(cache_dir: str, page_hash: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(cache_dir, f'{page_hash}.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _store_page(cache_dir: str, page_hash: str, entry: Dict):
+    path = os.path.join(cache_dir, f'{page_hash}.json')
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(entry, f)
+    os.replace(tmp_path, path)
+
+
+def _extract_page_range(shard: Tuple[str, int, int, Optional[str], Optional[Dict]]) -> List[Tuple]:
+    """
+    Worker: parse pages [start, end) of a PDF, opening it once.
+    Returns (page_number, voters, seconds, error, cached, method) per page; a failing page does not stop the shard.
+    With a cache_dir, pages whose content hash was parsed before (with the same layout) are not parsed again.
+    """
+    pdf_path, start, end, cache_dir, layout = shard
+    layout_key = json.dumps(layout, sort_keys=True).encode()
+    results = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for index in range(start, end):
+            began = time.perf_counter()
+            page = pdf.pages[index]
+            try:
+                page_hash = hashlib.sha256(_page_content_hash(page).encode() + layout_key).hexdigest() if cache_dir else None
+                cached_entry = _cached_page(cache_dir, page_hash) if page_hash else None
+                if cached_entry is not None:
+                    voters, method = cached_entry['voters'], cached_entry['method']
+                else:
+                    voters, method = parse_page(page, layout)
+                    if page_hash:
+                        _store_page(cache_dir, page_hash, {'voters': voters, 'method': method})
+                results.append((index + 1, voters, time.perf_counter() - began, None, cached_entry is not None, method))
+            except Exception as e:
+                results.append((index + 1, [], time.perf_counter() - began, f"{type(e).__name__}: {e}", False, None))
+            finally:
+                # Release the page's cached layout objects; shards can be hundreds of pages
+                page.close()
+    return results
+
+
+def iter_pdf_shards(pdf_path: str, workers: int = None, pages_per_shard: int = None,
+                    start_page: int = 0, cache_dir: str = None,
+                    inspection: Tuple[int, Optional[Dict]] = None) -> Iterator[Tuple[int, int, List[Tuple]]]:
+    """
+    Parse page ranges of a PDF in parallel, yielding (start, end, page results) in page order.
+    Pages before start_page (0-based) are skipped. inspection is a prior inspect_pdf result.
+    """
+    total_pages, layout = inspection or inspect_pdf(pdf_path)
+    pages_per_shard = max(1, pages_per_shard or PAGES_PER_SHARD)
+    workers = workers if workers is not None else PDF_PARSE_WORKERS
+    workers = workers or os.cpu_count() or 1
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    shards = [(pdf_path, start, min(start + pages_per_shard, total_pages), cache_dir, layout)
+              for start in range(start_page, total_pages, pages_per_shard)]
+    
+    if workers == 1 or len(shards) <= 1:
+        shard_results = map(_extract_page_range, shards)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(shards)),
+                                       mp_context=multiprocessing.get_context(PDF_START_METHOD))
+        shard_results = executor.map(_extract_page_range, shards)
+    
+    try:
+        for shard, pages in zip(shards, shard_results):
+            yield shard[1], shard[2], pages
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_pdf_voters(pdf_path: str, workers: int = None, pages_per_shard: int = None,
+                    report: ExtractionReport = None,
+                    progress: Callable[[ExtractionReport], None] = None,
+                    cache_dir: str = None) -> Iterator[Dict[str, str]]:
+    """
+    Stream voter dicts from a PDF (table layout, else text per page), page ranges parsed in parallel.
+    
+    Args:
+        pdf_path: Path to PDF file
+        workers: Process count (default PDF_PARSE_WORKERS, 0 = one per CPU; 1 parses in-process)
+        pages_per_shard: Pages handed to a worker at a time
+        report: Optional ExtractionReport filled in as pages complete
+        progress: Optional callback, called with the report after every page
+        cache_dir: Optional per-page content-hash cache directory
+    
+    Voters are yielded in page order.
+    """
+    if report is None:
+        report = ExtractionReport()
+    inspection = inspect_pdf(pdf_path)
+    report.total_pages = inspection[0]
+    
+    for _, _, pages in iter_pdf_shards(pdf_path, workers, pages_per_shard, cache_dir=cache_dir, inspection=inspection):
+        for page_number, voters, seconds, error, cached, method in pages:
+            report.record(page_number, seconds, len(voters), error, cached, method)
+            if progress is not None:
+                progress(report)
+            yield from voters
+
+
+def read_pdf_frame(pdf_path: str, report: ExtractionReport = None,
+                   progress: Callable[[ExtractionReport], None] = None, cache_dir: str = None,
+                   batch_rows: int = PDF_FRAME_BATCH_ROWS) -> pd.DataFrame:
+    """
+    All voters of a PDF as one REQUIRED_COLUMNS frame (empty when none were found).
+    
+    Parsed voter dicts are turned into a column frame every batch_rows rows, so
+    only one batch of dicts is alive at a time; the whole roll is still held as
+    columns, since validation, fingerprinting and delta detection need all of it.
+    """
+    frames, batch = [], []
+    for voter in iter_pdf_voters(pdf_path, report=report, progress=progress, cache_dir=cache_dir):
+        batch.append(voter)
+        if len(batch) >= batch_rows:
+            frames.append(pd.DataFrame.from_records(batch, columns=REQUIRED_COLUMNS))
+            batch = []
+    if batch or not frames:
+        frames.append(pd.DataFrame.from_records(batch, columns=REQUIRED_COLUMNS))
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+
+def clean_voter_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Normalize parsed voter rows to REQUIRED_COLUMNS, dropping rows without voter_id or name"""
+    df = df.copy()
+    for col in REQUIRED_COLUMNS:
+        if col not in df.columns:
+            df[col] = ''
+    
+    # Clean and validate data
+    df = df[df['voter_id'].notna() & (df['voter_id'] != '')]
+    df = df[df['name'].notna() & (df['name'] != '')]
+    
+    # Ensure age is numeric
+    df['age'] = pd.to_numeric(df['age'], errors='coerce').fillna(0).astype(int)
+    
+    # Ensure registration_date is in correct format
+    df['registration_date'] = df['registration_date'].fillna('2020-01-01').astype(str)
+    
+    return df[REQUIRED_COLUMNS]
+
+
 def parse_electoral_roll_pdf(pdf_path: str, method: str = 'pdfplumber') -> pd.DataFrame:
     """
     Parse electoral roll PDF and convert to DataFrame
@@ -118,44 +537,14 @@ def parse_electoral_roll_pdf(pdf_path: str, method: str = 'pdfplumber') -> pd.Da
     voters = []
     
     if method == 'pdfplumber' and PDFPLUMBER_AVAILABLE:
-        # Try to extract tables first (most accurate)
-        try:
-            tables = extract_tables_from_pdf(pdf_path)
-            for table_df in tables:
-                # Try to map table columns to our format
-                if len(table_df.columns) >= 3:
-                    for _, row in table_df.iterrows():
-                        voter = {}
-                        row_values = row.values.tolist()
-                        
-                        # Try to identify columns
-                        if len(row_values) >= 5:
-                            voter['voter_id'] = str(row_values[0]).strip()
-                            voter['name'] = str(row_values[1]).strip()
-                            voter['age'] = str(row_values[2]).strip() if len(row_values) > 2 else '0'
-                            voter['address'] = str(row_values[3]).strip() if len(row_values) > 3 else ''
-                            voter['registration_date'] = str(row_values[4]).strip() if len(row_values) > 4 else '2020-01-01'
-                            
-                            # Validate required fields
-                            if voter['voter_id'] and voter['name']:
-                                voters.append(voter)
-        except Exception as e:
-            print(f"Table extraction failed: {e}, trying text extraction...")
-        
-        # Fallback to text extraction
-        if not voters:
-            text = extract_text_from_pdf_pdfplumber(pdf_path)
-            for line in text.split('\n'):
-                voter = parse_voter_line(line)
-                if voter:
-                    voters.append(voter)
+        # Tables where the learned layout fits (most accurate), page text elsewhere
+        report = ExtractionReport()
+        voters = list(iter_pdf_voters(pdf_path, report=report, cache_dir=os.getenv('PDF_PAGE_CACHE_DIR') or None))
+        if report.failed_pages:
+            print(f"Extraction failed on {len(report.failed_pages)} of {report.total_pages} pages")
     
     elif method == 'pypdf2' and PDF2_AVAILABLE:
-        text = extract_text_from_pdf_pypdf2(pdf_path)
-        for line in text.split('\n'):
-            voter = parse_voter_line(line)
-            if voter:
-                voters.append(voter)
+        voters = parse_page_text(extract_text_from_pdf_pypdf2(pdf_path))
     
     elif method == 'tabula' and TABULA_AVAILABLE:
         try:
@@ -174,31 +563,35 @@ def parse_electoral_roll_pdf(pdf_path: str, method: str = 'pdfplumber') -> pd.Da
     if not voters:
         raise ValueError("No voter data could be extracted from PDF")
     
-    # Convert to DataFrame
-    df = pd.DataFrame(voters)
-    
-    # Ensure required columns exist
-    required_columns = ['voter_id', 'name', 'age', 'address', 'registration_date']
-    for col in required_columns:
-        if col not in df.columns:
-            df[col] = ''
-    
-    # Clean and validate data
-    df = df[df['voter_id'].notna() & (df['voter_id'] != '')]
-    df = df[df['name'].notna() & (df['name'] != '')]
-    
-    # Ensure age is numeric
-    df['age'] = pd.to_numeric(df['age'], errors='coerce').fillna(0).astype(int)
-    
-    # Ensure registration_date is in correct format
-    df['registration_date'] = df['registration_date'].apply(
-        lambda x: str(x) if pd.notna(x) else '2020-01-01'
-    )
-    
-    return df[required_columns]
+    return clean_voter_frame(pd.DataFrame(voters))
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_manifest(manifest_path: str) -> Optional[Dict]:
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get('version') == MANIFEST_VERSION else None
+
 
+def _save_manifest(manifest_path: str, manifest: Dict):
+    tmp_path = f'{manifest_path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
 
-def convert_pdf_to_csv(pdf_path: str, output_csv_path: str, method: str = 'pdfplumber') -> str:
+
+def convert_pdf_to_csv(pdf_path: str, output_csv_path: str, method: str = 'pdfplumber',
+                       resume: bool = True, cache_dir: str = None) -> str:
     """
     Convert PDF electoral roll to CSV format
     
@@ -206,6 +599,8 @@ def convert_pdf_to_csv(pdf_path: str, output_csv_path: str, method: str = 'pdfpl
         pdf_path: Path to input PDF file
         output_csv_path: Path to output CSV file
         method: Extraction method ('pdfplumber', 'pypdf2', or 'tabula')
+        resume: Continue from <output>.manifest.json if it belongs to the same PDF
+        cache_dir: Per-page cache (default PDF_PAGE_CACHE_DIR or <output>.pages)
     
     Returns:
         Path to created CSV file
@@ -213,12 +608,82 @@ def convert_pdf_to_csv(pdf_path: str, output_csv_path: str, method: str = 'pdfpl
     print(f"Converting PDF to CSV: {pdf_path}")
     print(f"Using method: {method}")
     
-    df = parse_electoral_roll_pdf(pdf_path, method)
+    if method != 'pdfplumber' or not PDFPLUMBER_AVAILABLE:
+        df = parse_electoral_roll_pdf(pdf_path, method)
+        print(f"Extracted {len(df)} voter records")
+        df.to_csv(output_csv_path, index=False)
+        print(f"CSV saved to: {output_csv_path}")
+        return output_csv_path
+    
+    manifest_path = f'{output_csv_path}.manifest.json'
+    pdf_sha256 = _file_sha256(pdf_path)
+    manifest = _load_manifest(manifest_path) if resume else None
+    inspection = inspect_pdf(pdf_path)
+    if manifest is None or manifest['pdf_sha256'] != pdf_sha256 or not os.path.exists(output_csv_path):
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'pdf_sha256': pdf_sha256,
+            'total_pages': inspection[0],
+            'pages_done': 0,
+            'rows_written': 0,
+            'csv_bytes': 0,
+            'failed_pages': {}
+        }
+    elif manifest['pages_done']:
+        print(f"Resuming after page {manifest['pages_done']} of {manifest['total_pages']}")
+    
+    cache_dir = cache_dir or os.getenv('PDF_PAGE_CACHE_DIR') or f'{output_csv_path}.pages'
+    os.makedirs(cache_dir, exist_ok=True)
+    report = ExtractionReport(manifest['total_pages'])
+    
+    with open(output_csv_path, 'a+b') as out:
+        # Anything after the last checkpoint is a partial batch from a crashed run
+        out.truncate(manifest['csv_bytes'])
+        out.seek(manifest['csv_bytes'])
+        if manifest['csv_bytes'] == 0:
+            out.write((','.join(REQUIRED_COLUMNS) + '\n').encode('utf-8'))
+        
+        def checkpoint(pages, pages_done):
+            rows = []
+            for page_number, voters, seconds, error, cached, method in pages:
+                report.record(page_number, seconds, len(voters), error, cached, method)
+                if error:
+                    manifest['failed_pages'][str(page_number)] = error
+                else:
+                    manifest['failed_pages'].pop(str(page_number), None)
+                rows.extend(voters)
+            
+            batch = clean_voter_frame(pd.DataFrame.from_records(rows, columns=REQUIRED_COLUMNS))
+            out.write(batch.to_csv(header=False, index=False).encode('utf-8'))
+            out.flush()
+            os.fsync(out.fileno())
+            
+            # Checkpoint only after the batch is durably on disk
+            manifest['pages_done'] = pages_done
+            manifest['rows_written'] += len(batch)
+            manifest['csv_bytes'] = out.tell()
+            _save_manifest(manifest_path, manifest)
+        
+        # Pages that failed in an earlier run (often transiently) are extracted again;
+        # their rows are appended after the rows already written
+        retry = sorted(int(page_number) for page_number in manifest['failed_pages'])
+        if retry:
+            print(f"Retrying {len(retry)} previously failed pages")
+            checkpoint([result for page_number in retry
+                        for result in _extract_page_range((pdf_path, page_number - 1, page_number, cache_dir, inspection[1]))],
+                       manifest['pages_done'])
+        
+        for start, end, pages in iter_pdf_shards(pdf_path, start_page=manifest['pages_done'],
+                                              cache_dir=cache_dir, inspection=inspection):
+            checkpoint(pages, end)
     
-    print(f"Extracted {len(df)} voter records")
+    if manifest['rows_written'] == 0:
+        raise ValueError("No voter data could be extracted from PDF")
     
-    # Save to CSV
-    df.to_csv(output_csv_path, index=False)
+    summary = report.to_dict()
+    print(f"Extracted {manifest['rows_written']} voter records "
+          f"({summary['pages_done']} pages this run, {summary['table_pages']} as tables, {summary['cached_pages']} from cache, "
+          f"{len(manifest['failed_pages'])} failed)")
     print(f"CSV saved to: {output_csv_path}")
     
     return output_csv_path
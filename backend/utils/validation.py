@@ -0,0 +1,78 @@
+"""Upload Validation - Evaluate every row rule in one vectorized pass
+
+Each rule sets one bit of a per-row error mask, so a single pass over the
+columns tells both how many rows break each rule and which rows they are.
+Uploads either reject the file when any bit is set, or quarantine the
+flagged rows and load the rest.
+
+Row numbers are spreadsheet rows: the header is row 1, the first voter row 2.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Rule -> message for a rejected upload; bit i of the error mask is the i-th rule
+VALIDATION_RULES = {
+    'empty_voter_id': '{count} rows have empty or null voter_id',
+    'invalid_age': '{count} rows have invalid age values',
+    'empty_name': '{count} rows have empty or null name',
+    'empty_address': '{count} rows have empty or null address',
+    'invalid_registration_date': 'registration_date must be in YYYY-MM-DD format',
+    'duplicate_voter_id': '{count} rows have duplicate voter_id values',
+}
+RULE_BITS = {rule: 1 << i for i, rule in enumerate(VALIDATION_RULES)}
+
+# Row numbers reported per rule
+SAMPLE_ROWS = 10
+
+ON_INVALID_MODES = ('reject', 'quarantine')
+
+
+def row_numbers(index):
+    """Spreadsheet row numbers for DataFrame index labels of a freshly read CSV"""
+    return (np.asarray(index, dtype=np.int64) + 2).tolist()
+
+
+def validate_roll_frame(df, sample_rows=SAMPLE_ROWS):
+    """
+    Error mask per row and a per-rule report for a cleaned roll frame.
+
+    Expects voter_id, name, address and registration_date as stripped strings
+    and age already numeric (NaN where unparseable).
+
+    Returns (mask, report): mask is a uint8 array aligned with df, report maps
+    each violated rule to {'count', 'rows'} with up to sample_rows row numbers.
+    """
+    dates = df['registration_date']
+    parsed = pd.to_datetime(dates, format='%Y-%m-%d', errors='coerce')
+    age = df['age']
+    checks = {
+        'empty_voter_id': df['voter_id'] == '',
+        'invalid_age': age.isna() | (age < 0) | (age > 150),
+        'empty_name': df['name'] == '',
+        'empty_address': df['address'] == '',
+        # Blank dates are allowed, as they always have been
+        'invalid_registration_date': parsed.isna() & (dates != ''),
+        'duplicate_voter_id': df['voter_id'].duplicated(keep=False) & (df['voter_id'] != ''),
+    }
+
+    mask = np.zeros(len(df), dtype=np.uint8)
+    for rule, failed in checks.items():
+        mask |= failed.to_numpy(dtype=bool).astype(np.uint8) * np.uint8(RULE_BITS[rule])
+
+    report = {}
+    for rule, bit in RULE_BITS.items():
+        hits = np.flatnonzero(mask & bit)
+        if len(hits):
+            report[rule] = {'count': int(len(hits)), 'rows': row_numbers(df.index[hits[:sample_rows]])}
+    return mask, report
+
+
+def rule_names(error_mask):
+    """Rules set in one row's error mask"""
+    return [rule for rule, bit in RULE_BITS.items() if error_mask & bit]
+
+
+def rejection_details(report):
+    """Human-readable messages for a rejected upload, in rule order"""
+    return [VALIDATION_RULES[rule].format(count=hit['count']) for rule, hit in report.items()]
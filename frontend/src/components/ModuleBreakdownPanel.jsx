@@ -5,13 +5,14 @@
 
 import { useState } from 'react'
 import { motion, AnimatePresence } from 'framer-motion'
-import { ChevronDown, Brain, Network, Zap, Info } from 'lucide-react'
+import { ChevronDown, Brain, Network, Zap, Users, Info } from 'lucide-react'
 import { Card } from './ui/Card'
 
 const MODULE_ICONS = {
     'Behavioral Fingerprinting': Brain,
     'Network Analysis': Network,
-    'Entropy Analysis': Zap
+    'Entropy Analysis': Zap,
+    'Duplicate Detection': Users
 }
 
 export function ModuleBreakdownPanel({ modules, className = '' }) {